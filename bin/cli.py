@@ -38,6 +38,8 @@ from jinja2 import Environment
 
 import hpecp
 from hpecp import ContainerPlatformClient
+from hpecp.cli.apply import apply
+from hpecp.cli.cache import CacheProxy
 from hpecp.cli.catalog import CatalogProxy
 from hpecp.cli.config import ConfigProxy
 from hpecp.cli.datatap import DatatapProxy
@@ -50,6 +52,7 @@ from hpecp.cli.k8sworker import K8sWorkerProxy
 from hpecp.cli.license import LicenseProxy
 from hpecp.cli.lock import LockProxy
 from hpecp.cli.role import RoleProxy
+from hpecp.cli.snapshot import SnapshotProxy
 from hpecp.cli.tenant import TenantProxy
 from hpecp.cli.user import UserProxy
 
@@ -431,6 +434,9 @@ class CLI(object):
         self.role = RoleProxy()
         self.version = version
         self.datatap = DatatapProxy()
+        self.snapshot = SnapshotProxy()
+        self.apply = apply
+        self.cache = CacheProxy()
 
 
 if __name__ == "__main__":
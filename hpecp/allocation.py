@@ -0,0 +1,393 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Allocate free k8s hosts to the clusters of a mass cluster creation.
+
+Each requested cluster shape has a number of masters and workers and the
+minimum resources of a master and of a worker.  The free hosts are
+grouped by resource profile (cores, memory, disks, gpus) - large fleets
+only have a few profiles - and each node is placed on a host of the
+smallest profile that fits it (best fit), the clusters with the largest
+demand first (decreasing).  A cluster is either completely allocated or
+not at all.  The cost of the planning grows with the number of nodes
+times the number of profiles, not with the number of hosts.
+
+Example
+-------
+>>> shapes = [
+...     ClusterShape("team-a", masters=3, workers=10,
+...                  worker=Requirements(cores=32, memory_mb=256 * 1024),
+...                  k8s_version="1.18.6"),
+...     ClusterShape("team-b", masters=1, workers=4),
+... ]
+>>> allocation = plan_allocation(free_hosts(client), shapes)
+>>> allocation.unplaced
+{}
+>>> ids = allocation.create(client.k8s_cluster)
+"""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .k8s_cluster import K8sClusterHostConfig
+from .k8s_worker import WorkerK8sStatus
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+_MB = 1024 * 1024
+
+
+class Requirements(object):
+    """The minimum resources of a cluster node."""
+
+    def __init__(self, cores=0, memory_mb=0, disks=0, gpus=0):
+        """Create Requirements.
+
+        Parameters
+        ----------
+        cores : int, optional
+            Minimum logical cores, by default 0
+        memory_mb : int, optional
+            Minimum memory in MiB, by default 0
+        disks : int, optional
+            Minimum number of disks, by default 0
+        gpus : int, optional
+            Minimum number of GPUs, by default 0
+        """
+        for (name, value) in [
+            ("cores", cores),
+            ("memory_mb", memory_mb),
+            ("disks", disks),
+            ("gpus", gpus),
+        ]:
+            assert (
+                isinstance(value, int) and value >= 0
+            ), "'{}' must be an int >= 0".format(name)
+        self.cores = cores
+        self.memory_mb = memory_mb
+        self.disks = disks
+        self.gpus = gpus
+
+    def key(self):
+        """Return the sort key, scarcest resource first."""
+        return (self.gpus, self.cores, self.memory_mb, self.disks)
+
+    def fits(self, host):
+        """Return True if a host has these resources."""
+        return (
+            host.cores >= self.cores
+            and host.memory_mb >= self.memory_mb
+            and host.disks >= self.disks
+            and host.gpus >= self.gpus
+        )
+
+    def __repr__(self):
+        """Return a representation of the Requirements."""
+        return "<Requirements cores:{} memory_mb:{} disks:{} gpus:{}>".format(
+            self.cores, self.memory_mb, self.disks, self.gpus
+        )
+
+
+class Host(Requirements):
+    """A free k8s host and its resources."""
+
+    def __init__(self, id, cores=0, memory_mb=0, disks=0, gpus=0):
+        """Create a Host.
+
+        Parameters
+        ----------
+        id : str
+            The host ID - format: '/api/v2/worker/k8shost/[0-9]+'
+        cores, memory_mb, disks, gpus : int, optional
+            The resources of the host
+        """
+        super(Host, self).__init__(cores, memory_mb, disks, gpus)
+        self.id = id
+
+    @classmethod
+    def from_json(cls, json):
+        """Create a Host from the json of a k8s host and its sysinfo.
+
+        The disks are the storage devices that are whole disks without a
+        mountpoint.  Missing sysinfo values count as 0.
+        """
+        sysinfo = json.get("sysinfo") or {}
+        storage = [s.get("info", {}) for s in sysinfo.get("storage") or []]
+        return cls(
+            id=json["_links"]["self"]["href"],
+            cores=int(sysinfo.get("cpu", {}).get("cpu_logical_cores", 0)),
+            memory_mb=int(sysinfo.get("memory", {}).get("mem_total", 0))
+            // _MB,
+            disks=len(
+                [
+                    d
+                    for d in storage
+                    if d.get("IsDisk") and not d.get("Mountpoint")
+                ]
+            ),
+            gpus=int(sysinfo.get("gpu", {}).get("gpu_count", 0)),
+        )
+
+    def __repr__(self):
+        """Return a representation of the Host."""
+        return "<Host {} cores:{} memory_mb:{} disks:{} gpus:{}>".format(
+            self.id, self.cores, self.memory_mb, self.disks, self.gpus
+        )
+
+
+class ClusterShape(object):
+    """A cluster to create: its nodes and the create() parameters."""
+
+    def __init__(
+        self, name, masters=1, workers=0, master=None, worker=None, **create
+    ):
+        """Create a ClusterShape.
+
+        Parameters
+        ----------
+        name : str
+            The cluster name
+        masters : int, optional
+            The number of masters, by default 1
+        workers : int, optional
+            The number of workers, by default 0
+        master : Requirements, optional
+            The minimum resources of a master, by default none
+        worker : Requirements, optional
+            The minimum resources of a worker, by default none
+        create : optional
+            Other parameters of
+            :py:meth:`.k8s_cluster.K8sClusterController.create`, e.g.
+            k8s_version or addons
+        """
+        assert (
+            isinstance(masters, int) and masters > 0
+        ), "'masters' must be an int > 0"
+        assert (
+            isinstance(workers, int) and workers >= 0
+        ), "'workers' must be an int >= 0"
+        assert (
+            "k8shosts_config" not in create
+        ), "'k8shosts_config' is computed by the allocation"
+        self.name = name
+        self.masters = masters
+        self.workers = workers
+        self.master = master or Requirements()
+        self.worker = worker or Requirements()
+        self.create = create
+
+    def nodes(self):
+        """Return the (role, Requirements) of each node, largest first."""
+        nodes = [("master", self.master)] * self.masters + [
+            ("worker", self.worker)
+        ] * self.workers
+        return sorted(nodes, key=lambda n: n[1].key(), reverse=True)
+
+    def demand(self):
+        """Return the sort key of the total demand of the cluster."""
+        return tuple(
+            sum(values)
+            for values in zip(*[r.key() for (_, r) in self.nodes()])
+        )
+
+
+def free_hosts(client):
+    """Return the k8s hosts that are ready and not in a cluster.
+
+    Parameters
+    ----------
+    client : ContainerPlatformClient
+        An authenticated client
+
+    Returns
+    -------
+    list[Host]
+    """
+    assigned = set(
+        config["node"]
+        for cluster in client.k8s_cluster.list(
+            fields=["k8shosts_config"], bypass_cache=True
+        )
+        for config in cluster.k8shosts_config or []
+    )
+    return [
+        Host.from_json(json)
+        for json in client.k8s_worker.list(bypass_cache=True).json
+        if json["status"] == WorkerK8sStatus.ready.name
+        and json["_links"]["self"]["href"] not in assigned
+    ]
+
+
+class _Profiles(object):
+    """The free hosts grouped by resources, smallest profile first."""
+
+    def __init__(self, hosts):
+        by_profile = OrderedDict()
+        for host in sorted(hosts, key=lambda h: (h.key(), h.id)):
+            by_profile.setdefault(host.key(), []).append(host)
+        # each list is used as a stack, pop the lowest ID first
+        self.profiles = [
+            (hosts[0], list(reversed(hosts))) for hosts in by_profile.values()
+        ]
+        self._stacks = dict((p.key(), s) for (p, s) in self.profiles)
+
+    def take(self, requirements):
+        """Remove and return the host of the smallest fitting profile."""
+        for (profile, hosts) in self.profiles:
+            if hosts and requirements.fits(profile):
+                return hosts.pop()
+        return None
+
+    def give_back(self, hosts):
+        for host in reversed(hosts):
+            self._stacks[host.key()].append(host)
+
+    def remaining(self):
+        return sorted(
+            (h for (_, hosts) in self.profiles for h in hosts),
+            key=lambda h: h.id,
+        )
+
+
+class Allocation(object):
+    """The hosts allocated to each cluster shape.
+
+    Attributes
+    ----------
+    shapes : OrderedDict
+        The ClusterShape of each cluster, by name
+    clusters : OrderedDict
+        The list of K8sClusterHostConfig of each allocated cluster, in the
+        order of the shapes
+    unplaced : OrderedDict
+        The reason each cluster that could not be allocated
+    free : list[Host]
+        The hosts left unallocated
+    """
+
+    def __init__(self, shapes, clusters, unplaced, free):
+        """Create an Allocation, see the class attributes."""
+        self.shapes = shapes
+        self.clusters = clusters
+        self.unplaced = unplaced
+        self.free = free
+
+    def __bool__(self):
+        """Return True if every cluster was allocated."""
+        return len(self.unplaced) == 0
+
+    __nonzero__ = __bool__
+
+    def create(self, controller, max_workers=8):
+        """Create the allocated clusters concurrently.
+
+        Parameters
+        ----------
+        controller : K8sClusterController
+            e.g. `client.k8s_cluster`
+        max_workers : int, optional
+            The maximum number of concurrent create requests, by default 8
+
+        Returns
+        -------
+        OrderedDict
+            The ID of each created cluster, or the exception raised by its
+            create request, by name
+        """
+        assert (
+            isinstance(max_workers, int) and max_workers > 0
+        ), "'max_workers' must be an int > 0"
+
+        def create(name):
+            try:
+                return controller.create(
+                    name=name,
+                    k8shosts_config=self.clusters[name],
+                    **self.shapes[name].create
+                )
+            except Exception as e:
+                _log.debug("Allocation: create {} failed: {}".format(name, e))
+                return e
+
+        if not self.clusters:
+            return OrderedDict()
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(self.clusters))
+        ) as executor:
+            return OrderedDict(
+                zip(self.clusters, executor.map(create, self.clusters))
+            )
+
+
+def plan_allocation(hosts, shapes):
+    """Allocate hosts to cluster shapes.
+
+    Parameters
+    ----------
+    hosts : list[Host]
+        The free hosts, see :py:func:`free_hosts`
+    shapes : list[ClusterShape]
+        The clusters to allocate, with unique names
+
+    Returns
+    -------
+    Allocation
+    """
+    names = [s.name for s in shapes]
+    assert len(set(names)) == len(names), "The cluster names must be unique"
+
+    profiles = _Profiles(hosts)
+    placed = {}
+    unplaced = {}
+    # decreasing: the largest clusters are placed while the most hosts
+    # are free
+    for shape in sorted(shapes, key=lambda s: s.demand(), reverse=True):
+        taken = []
+        for (role, requirements) in shape.nodes():
+            host = profiles.take(requirements)
+            if host is None:
+                profiles.give_back([h for (h, _) in taken])
+                unplaced[shape.name] = "no free host for a {} with {}".format(
+                    role, requirements
+                )
+                break
+            taken.append((host, role))
+        else:
+            placed[shape.name] = taken
+
+    clusters = OrderedDict()
+    for name in names:
+        if name in placed:
+            clusters[name] = [
+                K8sClusterHostConfig(host.id, role)
+                for (host, role) in sorted(
+                    placed[name], key=lambda t: (t[1], t[0].id)
+                )
+            ]
+    return Allocation(
+        shapes=OrderedDict((s.name, s) for s in shapes),
+        clusters=clusters,
+        unplaced=OrderedDict((n, unplaced[n]) for n in names if n in unplaced),
+        free=profiles.remaining(),
+    )
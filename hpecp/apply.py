@@ -0,0 +1,994 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+r"""Declarative management of the platform state.
+
+The desired state is a dict, usually loaded from YAML::
+
+    k8s_hosts:
+      - ipaddr: 10.1.0.10
+        ssh_key_file: ~/.ssh/id_rsa
+        ephemeral_disks: [/dev/nvme1n1]
+    k8s_clusters:
+      - name: prod
+        k8s_version: 1.18.6
+        addons: [istio]
+        k8shosts_config:
+          - {node: 10.1.0.10, role: master}
+    tenants:
+      - name: team-a
+        tenant_type: k8s
+        k8s_cluster: prod
+    datataps:
+      - name: lake
+        ...   # the arguments of create_hdfs_with_kerberos
+    role_assignments:
+      - {tenant: team-a, role: Admin, user: alice}
+
+Hosts are identified by their IP address, the other resources by name.
+
+Example
+-------
+>>> state = load_state("state.yaml")
+>>> plan = make_plan(client, state)
+>>> print("\n".join(plan.lines()))
+>>> plan.execute(max_workers=4)
+"""
+
+from __future__ import absolute_import
+
+import os
+import re
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from .k8s_cluster import K8sClusterHostConfig, K8sClusterStatus
+from .k8s_worker import WorkerK8sStatus
+from .logger import Logger
+from .tenant import TenantStatus
+from .workflow import SKIPPED, Workflow, wait_operation, wait_until
+
+_log = Logger.get_logger()
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+NOOP = "noop"
+
+KINDS = OrderedDict(
+    [
+        ("k8s_hosts", "k8s_host"),
+        ("k8s_clusters", "k8s_cluster"),
+        ("tenants", "tenant"),
+        ("datataps", "datatap"),
+        ("role_assignments", "role_assignment"),
+    ]
+)
+"""The sections of the desired state, mapped to the kind of their
+resources."""
+
+_SYMBOLS = {CREATE: "+", UPDATE: "~", DELETE: "-", NOOP: " "}
+
+# built-in tenants that are never pruned
+_SYSTEM_TENANTS = ["Site Admin"]
+
+_CLUSTER_KEYS = [
+    "name",
+    "description",
+    "k8s_version",
+    "pod_network_range",
+    "service_network_range",
+    "pod_dns_domain",
+    "persistent_storage_local",
+    "persistent_storage_nimble_csi",
+    "k8shosts_config",
+    "addons",
+    "external_identity_server",
+    "external_groups",
+]
+
+_TENANT_KEYS = [
+    "name",
+    "description",
+    "tenant_type",
+    "k8s_cluster",
+    "is_namespace_owner",
+    "map_services_to_gateway",
+    "specified_namespace_name",
+    "adopt_existing_namespace",
+    "quota_memory",
+    "quota_persistent",
+    "quota_gpus",
+    "quota_cores",
+    "quota_disk",
+    "quota_tenant_storage",
+    "features",
+]
+
+_HOST_KEYS = [
+    "ipaddr",
+    "ssh_key_data",
+    "ssh_key_file",
+    "tags",
+    "ephemeral_disks",
+    "persistent_disks",
+]
+
+
+def load_state(path):
+    """Load and validate a desired state file.
+
+    Parameters
+    ----------
+    path : str
+        A YAML (or json) file, '-' to read stdin
+
+    Returns
+    -------
+    dict
+        The desired state
+    """
+    if path == "-":
+        state = yaml.safe_load(sys.stdin)
+    else:
+        with open(path) as f:
+            state = yaml.safe_load(f)
+    validate_state(state)
+    return state
+
+
+def validate_state(state):
+    """Check the structure of a desired state.
+
+    Raises
+    ------
+    AssertionError
+        If the state is not valid
+    """
+    assert isinstance(state, dict), "the state must be a mapping"
+    for section in state:
+        assert section in KINDS, "unknown section '{}', expected {}".format(
+            section, list(KINDS.keys())
+        )
+    for (section, allowed) in [
+        ("k8s_hosts", _HOST_KEYS),
+        ("k8s_clusters", _CLUSTER_KEYS),
+        ("tenants", _TENANT_KEYS),
+        ("datataps", None),
+        ("role_assignments", ["tenant", "role", "user"]),
+    ]:
+        specs = state.get(section) or []
+        assert isinstance(specs, list), "'{}' must be a list".format(section)
+        required = ["ipaddr"] if section == "k8s_hosts" else ["name"]
+        if section == "role_assignments":
+            required = ["tenant", "role", "user"]
+        keys = []
+        for (i, spec) in enumerate(specs):
+            assert isinstance(
+                spec, dict
+            ), "'{}' item {} must be a mapping".format(section, i)
+            for key in required:
+                assert key in spec, "'{}' item {} has no '{}'".format(
+                    section, i, key
+                )
+            if allowed is not None:
+                for key in spec:
+                    assert (
+                        key in allowed
+                    ), "'{}' item {} has unknown key '{}'".format(
+                        section, i, key
+                    )
+            keys.append(_spec_key(section, spec))
+        duplicates = set(k for k in keys if keys.count(k) > 1)
+        assert len(duplicates) == 0, "'{}' has duplicate items: {}".format(
+            section, ", ".join(sorted(duplicates))
+        )
+
+
+def _spec_key(section, spec):
+    if section == "k8s_hosts":
+        return str(spec["ipaddr"])
+    if section == "role_assignments":
+        return "{}/{}/{}".format(spec["tenant"], spec["role"], spec["user"])
+    return str(spec["name"])
+
+
+def _version(version):
+    return tuple(int(n) for n in re.findall(r"\d+", str(version)))
+
+
+def _assigned_role(user_json):
+    """Return the role ID of a user listed by TenantController.users()."""
+    role = user_json.get("role")
+    if role is None:
+        role = user_json.get("_links", {}).get("role", {}).get("href")
+    return role
+
+
+class Action(object):
+    """A step of a :py:class:`Plan`.
+
+    Attributes
+    ----------
+    kind : str
+        The kind of resource, e.g. 'tenant'
+    key : str
+        The resource name, IP address for hosts
+    verb : str
+        One of 'create', 'update', 'delete' or 'noop'
+    id : str
+        The resource ID, None until a new resource is created
+    changes : list[str]
+        A description of each change made by an update
+    requires : list[str]
+        The names of the actions that must complete before this one
+    """
+
+    def __init__(
+        self, kind, key, verb, id=None, changes=None, requires=None, run=None
+    ):
+        self.kind = kind
+        self.key = key
+        self.verb = verb
+        self.id = id
+        self.changes = changes or []
+        self.requires = requires or []
+        self._run = run
+
+    @property
+    def name(self):
+        """The action name, e.g. 'tenant/team-a'."""
+        return "{}/{}".format(self.kind, self.key)
+
+    def run(self, ids):
+        """Make the API calls of the action.
+
+        Parameters
+        ----------
+        ids : dict
+            The resource ID for each action name, used to resolve the
+            resources created by the required actions
+
+        Returns
+        -------
+        str
+            The resource ID, None if it is unknown or was deleted
+        """
+        if self._run is None:
+            return self.id
+        return self._run(ids)
+
+    def __str__(self):
+        """Return the plan line of the Action."""
+        text = "{} {}".format(_SYMBOLS[self.verb], self.name)
+        if self.changes:
+            text += " ({})".format(", ".join(self.changes))
+        return text
+
+    def __repr__(self):
+        """Return a representation of the Action."""
+        return "<Action {} {}>".format(self.verb, self.name)
+
+
+class ApplyResult(object):
+    """The result of :py:meth:`Plan.execute`.
+
+    Attributes
+    ----------
+    done : list[str]
+        The names of the completed actions, in completion order
+    failed : dict
+        The exception for each failed action
+    skipped : list[str]
+        The names of the actions not run because a required action failed
+    ids : dict
+        The resource ID for each action name
+    workflow : WorkflowResult
+        The timings of the actions, see
+        :py:meth:`.workflow.WorkflowResult.report`
+    """
+
+    def __init__(self, ids, workflow):
+        self.done = workflow.done
+        self.failed = workflow.failed
+        self.skipped = workflow.skipped
+        self.ids = dict(ids)
+        self.workflow = workflow
+
+    @property
+    def elapsed(self):
+        """The seconds taken by the whole execution."""
+        return self.workflow.elapsed
+
+    def __bool__(self):
+        """Return True if every action of the plan was done."""
+        return len(self.failed) == 0 and len(self.skipped) == 0
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        """Return a representation of the ApplyResult."""
+        return "<ApplyResult done:{} failed:{} skipped:{} {:.1f}s>".format(
+            len(self.done), len(self.failed), len(self.skipped), self.elapsed
+        )
+
+
+class Plan(object):
+    """The actions that converge the platform to the desired state.
+
+    Attributes
+    ----------
+    actions : list[Action]
+        An action for each declared and pruned resource, including the
+        'noop' actions of the resources already in the desired state
+    warnings : list[str]
+        Differences that can not be applied, e.g. a tenant description,
+        as the API has no call to update it
+    """
+
+    def __init__(self, actions, warnings=None):
+        self.actions = actions
+        self.warnings = warnings or []
+
+    def changes(self):
+        """Return the actions that are not 'noop'."""
+        return [a for a in self.actions if a.verb != NOOP]
+
+    def summary(self):
+        """Return the number of actions for each verb."""
+        counts = OrderedDict((verb, 0) for verb in [CREATE, UPDATE, DELETE])
+        counts[NOOP] = 0
+        for action in self.actions:
+            counts[action.verb] += 1
+        return counts
+
+    def lines(self, verbose=False):
+        """Return the plan as text lines, with the 'noop' actions if verbose.
+
+        The lines start with '+' for a create, '~' for an update and '-'
+        for a delete.
+        """
+        lines = [str(a) for a in self.actions if verbose or a.verb != NOOP]
+        lines.extend("warning: {}".format(w) for w in self.warnings)
+        lines.append(
+            "{create} to create, {update} to update, {delete} to delete, "
+            "{noop} unchanged".format(**self.summary())
+        )
+        return lines
+
+    def __bool__(self):
+        """Return True if the plan changes anything."""
+        return len(self.changes()) > 0
+
+    __nonzero__ = __bool__
+
+    def execute(self, max_workers=4, progress=None):
+        """Run the changes, in parallel where they are independent.
+
+        The changes run as a :py:class:`.workflow.Workflow`: an action
+        starts when the actions it requires have completed, with at most
+        max_workers actions running.  The actions that require a failed
+        action are skipped, the others still run.  The 'noop' actions make
+        no API calls.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            The maximum number of concurrent actions, by default 4
+        progress : callable, optional
+            Called with (action, exception) when an action completes,
+            exception is None on success
+
+        Returns
+        -------
+        ApplyResult
+        """
+        ids = dict((a.name, a.id) for a in self.actions if a.id is not None)
+        changes = OrderedDict((a.name, a) for a in self.changes())
+
+        def node(action):
+            def run(values):
+                # the IDs of the resources created by the required actions
+                resolved = dict(ids)
+                resolved.update(
+                    (n, v) for (n, v) in values.items() if v is not None
+                )
+                return action.run(resolved)
+
+            return run
+
+        workflow = Workflow()
+        for action in changes.values():
+            workflow.add(action.name, node(action), requires=action.requires)
+
+        def report(node):
+            if progress is not None and node.status != SKIPPED:
+                progress(changes[node.name], node.error)
+
+        ran = workflow.run(max_workers=max_workers, progress=report)
+
+        for (name, value) in ran.values.items():
+            if changes[name].verb == DELETE:
+                ids.pop(name, None)
+            elif value is not None:
+                ids[name] = value
+        result = ApplyResult(ids, ran)
+        _log.debug("apply: {}".format(result))
+        return result
+
+
+def _fetch_current(client, names, max_workers):
+    """List the collections concurrently, return name -> ResourceList."""
+
+    def fetch(name):
+        return getattr(client, name).list(bypass_cache=True)
+
+    workers = max(1, min(max_workers, len(names)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(names, executor.map(fetch, names)))
+
+
+def make_plan(client, state, prune=False, max_workers=4, timeout_secs=3600):
+    """Compare the desired state with the platform and plan the changes.
+
+    The collections are listed concurrently, and for role assignments the
+    users of each declared tenant are fetched concurrently.
+
+    Parameters
+    ----------
+    client : ContainerPlatformClient
+        An authenticated client
+    state : dict
+        The desired state, see :py:func:`load_state`
+    prune : bool, optional
+        Delete the resources of the sections in the state that are not
+        declared, by default False.  The role assignments are only pruned
+        in the declared tenants.
+    max_workers : int, optional
+        The maximum number of concurrent API calls, by default 4
+    timeout_secs : int, optional
+        How long the actions wait for a resource to become ready or be
+        deleted, by default 3600
+
+    Returns
+    -------
+    Plan
+    """
+    validate_state(state)
+    assert (
+        isinstance(max_workers, int) and max_workers > 0
+    ), "'max_workers' must be an int > 0"
+
+    sections = [s for s in KINDS if s in state]
+    collections = []
+    if "k8s_hosts" in sections or "k8s_clusters" in sections:
+        collections.append("k8s_worker")
+    if "k8s_clusters" in sections or "tenants" in sections:
+        collections.append("k8s_cluster")
+    if "tenants" in sections or "role_assignments" in sections:
+        collections.append("tenant")
+    if "datataps" in sections:
+        collections.append("datatap")
+    if "role_assignments" in sections:
+        collections.extend(["user", "role"])
+    current = _fetch_current(client, collections, max_workers)
+
+    planner = _Planner(client, state, prune, max_workers, timeout_secs)
+    for section in sections:
+        getattr(planner, "plan_" + section)(current)
+    planner.order_deletes()
+    return Plan(planner.actions, planner.warnings)
+
+
+def apply(client, state, prune=False, max_workers=4, timeout_secs=3600):
+    """Plan and execute the changes to reach the desired state.
+
+    Returns
+    -------
+    (Plan, ApplyResult)
+    """
+    plan = make_plan(client, state, prune, max_workers, timeout_secs)
+    return (plan, plan.execute(max_workers))
+
+
+class _Planner(object):
+    def __init__(self, client, state, prune, max_workers, timeout_secs):
+        self.client = client
+        self.state = state
+        self.prune = prune
+        self.max_workers = max_workers
+        self.timeout_secs = timeout_secs
+        self.actions = []
+        self.warnings = []
+        self.by_name = {}
+
+    def add(self, action):
+        self.actions.append(action)
+        self.by_name[action.name] = action
+        return action
+
+    def changed(self, kind, key):
+        """Return the name of the action if it changes the resource."""
+        action = self.by_name.get("{}/{}".format(kind, key))
+        if action is not None and action.verb != NOOP:
+            return action.name
+        return None
+
+    def prune_missing(self, kind, resources, key_of, declared, skip=()):
+        if not self.prune:
+            return
+        for resource in resources:
+            key = key_of(resource)
+            if key in declared or key in skip:
+                continue
+            controller = getattr(self.client, _CONTROLLERS[kind])
+            self.add(
+                Action(
+                    kind,
+                    key,
+                    DELETE,
+                    id=_resource_id(resource),
+                    run=self.deleter(controller, _resource_id(resource)),
+                )
+            )
+
+    def deleter(self, controller, id):
+        timeout_secs = self.timeout_secs
+
+        def run(ids):
+            controller.delete(id)
+            if hasattr(controller, "status_class"):
+                wait_until(controller, id, [], timeout_secs)
+            return None
+
+        return run
+
+    def order_deletes(self):
+        """Delete tenants before clusters, and clusters before hosts."""
+        deletes = [a for a in self.actions if a.verb == DELETE]
+        for (kind, before) in [
+            ("k8s_cluster", "tenant"),
+            ("k8s_host", "k8s_cluster"),
+        ]:
+            first = [a.name for a in deletes if a.kind == before]
+            for action in deletes:
+                if action.kind == kind:
+                    action.requires.extend(first)
+
+    def plan_k8s_hosts(self, current):
+        hosts = current["k8s_worker"]
+        existing = dict((h.ipaddr, h) for h in hosts)
+        declared = set()
+        for spec in self.state["k8s_hosts"] or []:
+            ip = str(spec["ipaddr"])
+            declared.add(ip)
+            host = existing.get(ip)
+            if host is not None:
+                self.add(Action("k8s_host", ip, NOOP, id=host.id))
+                continue
+            assert (
+                "ssh_key_data" in spec or "ssh_key_file" in spec
+            ), "k8s host '{}' needs 'ssh_key_data' or 'ssh_key_file'".format(
+                ip
+            )
+            self.add(
+                Action("k8s_host", ip, CREATE, run=self.host_creator(spec))
+            )
+        self.prune_missing("k8s_host", hosts, lambda h: h.ipaddr, declared)
+
+    def host_creator(self, spec):
+        controller = self.client.k8s_worker
+        timeout_secs = self.timeout_secs
+
+        def run(ids):
+            ssh_key_data = spec.get("ssh_key_data")
+            if ssh_key_data is None:
+                path = os.path.expanduser(spec["ssh_key_file"])
+                with open(path) as f:
+                    ssh_key_data = f.read()
+            id = controller.create_with_ssh_key(
+                str(spec["ipaddr"]), ssh_key_data, spec.get("tags", [])
+            )
+            if spec.get("ephemeral_disks"):
+                wait_until(
+                    controller,
+                    id,
+                    [WorkerK8sStatus.storage_pending],
+                    timeout_secs,
+                )
+                controller.set_storage(
+                    id,
+                    spec["ephemeral_disks"],
+                    spec.get("persistent_disks", []),
+                )
+                wait_until(
+                    controller, id, [WorkerK8sStatus.ready], timeout_secs
+                )
+            return id
+
+        return run
+
+    def plan_k8s_clusters(self, current):
+        clusters = current["k8s_cluster"]
+        existing = dict((c.name, c) for c in clusters)
+        host_ids = dict((h.ipaddr, h.id) for h in current["k8s_worker"])
+        declared = set()
+        for spec in self.state["k8s_clusters"] or []:
+            name = str(spec["name"])
+            declared.add(name)
+            cluster = existing.get(name)
+            if cluster is None:
+                self.plan_cluster_create(spec, host_ids)
+            else:
+                self.plan_cluster_update(spec, cluster)
+        self.prune_missing("k8s_cluster", clusters, _name, declared)
+
+    def plan_cluster_create(self, spec, host_ids):
+        requires = []
+        nodes = []
+        for conf in spec.get("k8shosts_config", []):
+            node = str(conf["node"])
+            if not node.startswith("/api/"):
+                created = self.changed("k8s_host", node)
+                if created is not None:
+                    requires.append(created)
+                else:
+                    assert (
+                        node in host_ids
+                    ), "cluster '{}': k8s host '{}' does not exist".format(
+                        spec["name"], node
+                    )
+                    node = host_ids[node]
+            nodes.append((node, conf["role"]))
+
+        controller = self.client.k8s_cluster
+        timeout_secs = self.timeout_secs
+
+        def run(ids):
+            kwargs = dict(spec)
+            kwargs["k8shosts_config"] = [
+                K8sClusterHostConfig(
+                    ids.get("k8s_host/{}".format(node), node), role
+                )
+                for (node, role) in nodes
+            ]
+            id = controller.create(**kwargs)
+            wait_until(controller, id, [K8sClusterStatus.ready], timeout_secs)
+            return id
+
+        self.add(
+            Action(
+                "k8s_cluster",
+                spec["name"],
+                CREATE,
+                requires=requires,
+                run=run,
+            )
+        )
+
+    def plan_cluster_update(self, spec, cluster):
+        name = spec["name"]
+        changes = []
+        steps = []
+        controller = self.client.k8s_cluster
+        timeout_secs = self.timeout_secs
+
+        version = spec.get("k8s_version")
+        if version is not None and str(version) != cluster.k8s_version:
+            if _version(version) > _version(cluster.k8s_version):
+                changes.append(
+                    "k8s_version: {} -> {}".format(
+                        cluster.k8s_version, version
+                    )
+                )
+                steps.append(
+                    lambda id: controller.upgrade_cluster(
+                        id,
+                        str(version),
+                        as_operation=True,
+                        timeout_secs=timeout_secs,
+                    )
+                )
+            else:
+                self.warnings.append(
+                    "k8s_cluster/{}: can not downgrade {} to {}".format(
+                        name, cluster.k8s_version, version
+                    )
+                )
+
+        current_addons = cluster.addons or []
+        desired_addons = spec.get("addons", [])
+        addons = [a for a in desired_addons if a not in current_addons]
+        if addons:
+            changes.append("addons: +{}".format(", +".join(addons)))
+            steps.append(
+                lambda id: controller.add_addons(
+                    id, addons, as_operation=True, timeout_secs=timeout_secs
+                )
+            )
+        removed = [a for a in current_addons if a not in desired_addons]
+        if "addons" in spec and removed:
+            self.warnings.append(
+                "k8s_cluster/{}: addons can not be removed: {}".format(
+                    name, ", ".join(removed)
+                )
+            )
+
+        if "description" in spec and spec["description"] != _description(
+            cluster
+        ):
+            self.warnings.append(
+                "k8s_cluster/{}: the description can not be updated".format(
+                    name
+                )
+            )
+
+        if not steps:
+            self.add(Action("k8s_cluster", name, NOOP, id=cluster.id))
+            return
+
+        def run(ids):
+            # each change task requires a ready cluster: the operations
+            # complete when the cluster is ready with the change, not when
+            # it is still ready before the change task starts
+            for step in steps:
+                wait_operation(step(cluster.id))
+            return cluster.id
+
+        self.add(
+            Action(
+                "k8s_cluster",
+                name,
+                UPDATE,
+                id=cluster.id,
+                changes=changes,
+                run=run,
+            )
+        )
+
+    def plan_tenants(self, current):
+        tenants = current["tenant"]
+        existing = dict((t.name, t) for t in tenants)
+        cluster_ids = dict((c.name, c.id) for c in current["k8s_cluster"])
+        declared = set()
+        for spec in self.state["tenants"] or []:
+            name = str(spec["name"])
+            declared.add(name)
+            tenant = existing.get(name)
+            if tenant is not None:
+                for field in ["description", "tenant_type"]:
+                    if field in spec and spec[field] != getattr(tenant, field):
+                        self.warnings.append(
+                            "tenant/{}: the {} can not be updated".format(
+                                name, field
+                            )
+                        )
+                self.add(Action("tenant", name, NOOP, id=tenant.id))
+                continue
+
+            requires = []
+            cluster = spec.get("k8s_cluster")
+            if cluster is not None and not str(cluster).startswith("/api/"):
+                changed = self.changed("k8s_cluster", cluster)
+                if changed is not None:
+                    requires.append(changed)
+                else:
+                    assert (
+                        cluster in cluster_ids
+                    ), "tenant '{}': k8s cluster '{}' does not exist".format(
+                        name, cluster
+                    )
+                    cluster = cluster_ids[cluster]
+            self.add(
+                Action(
+                    "tenant",
+                    name,
+                    CREATE,
+                    requires=requires,
+                    run=self.tenant_creator(spec, cluster),
+                )
+            )
+        self.prune_missing(
+            "tenant", tenants, _name, declared, skip=_SYSTEM_TENANTS
+        )
+
+    def tenant_creator(self, spec, cluster):
+        controller = self.client.tenant
+        timeout_secs = self.timeout_secs
+
+        def run(ids):
+            kwargs = dict(spec)
+            kwargs.pop("k8s_cluster", None)
+            if cluster is not None:
+                kwargs["k8s_cluster_id"] = ids.get(
+                    "k8s_cluster/{}".format(cluster), cluster
+                )
+            id = controller.create(**kwargs)
+            wait_until(controller, id, [TenantStatus.ready], timeout_secs)
+            return id
+
+        return run
+
+    def plan_datataps(self, current):
+        datataps = current["datatap"]
+        existing = dict((d.name, d) for d in datataps)
+        declared = set()
+        controller = self.client.datatap
+        for spec in self.state["datataps"] or []:
+            name = str(spec["name"])
+            declared.add(name)
+            datatap = existing.get(name)
+            if datatap is not None:
+                if "description" in spec and (
+                    spec["description"] != datatap.description
+                ):
+                    self.warnings.append(
+                        "datatap/{}: the description can not be "
+                        "updated".format(name)
+                    )
+                self.add(Action("datatap", name, NOOP, id=datatap.self_href))
+                continue
+
+            def run(ids, spec=spec):
+                controller.create_hdfs_with_kerberos(**spec)
+                return None
+
+            self.add(Action("datatap", name, CREATE, run=run))
+        self.prune_missing("datatap", datataps, _name, declared)
+
+    def plan_role_assignments(self, current):
+        tenant_ids = dict((t.name, t.id) for t in current["tenant"])
+        user_ids = dict((u.name, u.id) for u in current["user"])
+        role_ids = dict((r.name, r.id) for r in current["role"])
+
+        # tenant name -> tenant ID, None if the tenant is created
+        self.assignment_tenants = OrderedDict()
+        declared = []
+        for spec in self.state["role_assignments"] or []:
+            tenant = str(spec["tenant"])
+            role_id = _lookup(role_ids, spec["role"], "role")
+            user_id = _lookup(user_ids, spec["user"], "user")
+            changed = self.changed("tenant", tenant)
+            if changed is None:
+                assert (
+                    tenant in tenant_ids
+                ), "tenant '{}' does not exist".format(tenant)
+            self.assignment_tenants[tenant] = (
+                None if changed is not None else tenant_ids[tenant]
+            )
+            declared.append((spec, tenant, changed, role_id, user_id))
+
+        assigned = self.fetch_assignments()
+        for (spec, tenant, changed, role_id, user_id) in declared:
+            key = _spec_key("role_assignments", spec)
+            if (user_id, role_id) in assigned.get(tenant, ()):
+                self.add(Action("role_assignment", key, NOOP))
+                continue
+            self.add(
+                Action(
+                    "role_assignment",
+                    key,
+                    CREATE,
+                    requires=[changed] if changed is not None else [],
+                    run=self.assigner(
+                        "assign_user_to_role", tenant, role_id, user_id
+                    ),
+                )
+            )
+
+        if not self.prune:
+            return
+        keep = set((d[1], d[4], d[3]) for d in declared)
+        role_names = dict((id, name) for (name, id) in role_ids.items())
+        user_names = dict((id, name) for (name, id) in user_ids.items())
+        for (tenant, pairs) in assigned.items():
+            for (user_id, role_id) in sorted(pairs):
+                if (tenant, user_id, role_id) in keep or role_id is None:
+                    continue
+                key = "{}/{}/{}".format(
+                    tenant,
+                    role_names.get(role_id, role_id),
+                    user_names.get(user_id, user_id),
+                )
+                self.add(
+                    Action(
+                        "role_assignment",
+                        key,
+                        DELETE,
+                        run=self.assigner(
+                            "revoke_user_from_role", tenant, role_id, user_id
+                        ),
+                    )
+                )
+
+    def fetch_assignments(self):
+        """Return the (user ID, role ID) pairs of each existing tenant."""
+        controller = self.client.tenant
+        existing = [
+            (name, id)
+            for (name, id) in self.assignment_tenants.items()
+            if id is not None
+        ]
+
+        def users(tenant_id):
+            return set(
+                (u.id, _assigned_role(u.json))
+                for u in controller.users(tenant_id)
+            )
+
+        assigned = {}
+        if existing:
+            workers = min(self.max_workers, len(existing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for ((name, _), pairs) in zip(
+                    existing,
+                    executor.map(users, [id for (_, id) in existing]),
+                ):
+                    assigned[name] = pairs
+        return assigned
+
+    def assigner(self, method, tenant, role_id, user_id):
+        controller = self.client.tenant
+        tenant_id = self.assignment_tenants[tenant]
+
+        def run(ids):
+            id = ids.get("tenant/{}".format(tenant), tenant_id)
+            getattr(controller, method)(id, role_id, user_id)
+            return None
+
+        return run
+
+
+_CONTROLLERS = {
+    "k8s_host": "k8s_worker",
+    "k8s_cluster": "k8s_cluster",
+    "tenant": "tenant",
+    "datatap": "datatap",
+}
+
+
+def _name(resource):
+    return resource.name
+
+
+def _description(resource):
+    try:
+        return resource.json["label"]["description"]
+    except KeyError:
+        return None
+
+
+def _resource_id(resource):
+    try:
+        return resource.id
+    except AttributeError:
+        # datataps have no id field
+        return resource.self_href
+
+
+def _lookup(ids, value, kind):
+    value = str(value)
+    if value.startswith("/api/"):
+        return value
+    assert value in ids, "{} '{}' does not exist".format(kind, value)
+    return ids[value]
@@ -21,7 +21,12 @@
 """Base classes for Controllers and Resources."""
 
 import abc
+import sys
+import threading
+import time
 import urllib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import polling
 import six
@@ -29,7 +34,14 @@ from tabulate import tabulate
 
 from hpecp.exceptions import APIItemNotFoundException
 
+from .cache import HIT, NOT_FOUND, STALE
+from .diff import diff_resource_lists
+from .informer import Informer
+from .interning import JsonInterner
 from .logger import Logger
+from .operation import Operation, WaitOutcome
+from .poll_schedule import PollSchedule
+from .where import Where, index_key
 
 _log = Logger.get_logger()
 
@@ -111,6 +123,11 @@ class AbstractResourceController:
         resource_list_path = "k8sclusters"
     """
 
+    intern_list_json = False
+    """Decode the `list()` responses with a
+    :py:class:`.interning.JsonInterner` unless `list()` is called with
+    `intern=False`."""
+
     def __init__(self, client):
         """Create a new instance.
 
@@ -121,7 +138,7 @@ class AbstractResourceController:
         """
         self.client = client
 
-    def get(self, id, params={}):
+    def get(self, id, params={}, fields=None, bypass_cache=False):
         """Make an API call to retrieve a Resource.
 
         Parameters
@@ -130,6 +147,13 @@ class AbstractResourceController:
             The ID with the format /resource/path/id
         params : str, optional
             API Parameters.
+        fields : list, optional
+            Only retain the json required by these fields from
+            `resource_class.all_fields`, by default None (retain all).
+            See :py:meth:`list`.
+        bypass_cache : bool, optional
+            Always call the API, even if the client cache is enabled.
+            See :py:meth:`.client.ContainerPlatformClient.enable_cache`.
 
         Returns
         -------
@@ -144,7 +168,9 @@ class AbstractResourceController:
         APIItemNotFoundException
             The item with {id} was not found.
         """
-        assert isinstance(id, str), "'id' must be provided and must be a str"
+        assert isinstance(
+            id, six.string_types
+        ), "'id' must be provided and must be a str"
         assert id.startswith(
             self.base_resource_path
         ), "'id' does not start with '{}'".format(self.base_resource_path)
@@ -157,31 +183,359 @@ class AbstractResourceController:
         else:
             p = ""
 
-        response = self.client._request(
+        json = self._get_json(
             url="{}{}".format(id, p),
-            http_method="get",
             description=self.__class__.__name__ + "/get",
+            fields=fields,
+            bypass_cache=bypass_cache,
         )
-        return self.resource_class(response.json())
+        return self.resource_class(json)
 
-    def list(self):
+    def list(self, fields=None, bypass_cache=False, intern=None):
         """Make an API call to retrieve a list of Resources.
 
+        Parameters
+        ----------
+        fields : list, optional
+            Only retain the json required by these fields from
+            `resource_class.all_fields`, by default None (retain all).
+            The other json attributes of each resource are discarded as
+            soon as the resource has been decoded, so large attributes
+            that are not required (e.g. 'sysinfo' or 'admin_kube_config')
+            are never held in memory for the whole list.  Accessing a
+            field that was not requested raises a KeyError.
+        bypass_cache : bool, optional
+            Always call the API, even if the client cache is enabled.
+            See :py:meth:`.client.ContainerPlatformClient.enable_cache`.
+        intern : bool, optional
+            Deduplicate the strings and small structures repeated across
+            the resources while decoding, see
+            :py:class:`.interning.JsonInterner`.  This reduces the memory
+            held by large lists, but the resources then share json that
+            must not be modified.  By default
+            :py:attr:`intern_list_json`.
+
+        If the client inventory database is enabled, a list read from the
+        API replaces the stored collection unless `fields` is provided, see
+        :py:meth:`.client.ContainerPlatformClient.enable_inventory_db`.  A
+        failure to store the list is logged, not raised.
+
         Returns
         -------
         ResourceList
             The ResourceList will contain instances of the class defined by
             the property self.resource_class
+
+        Example
+        -------
+        >>> client.k8s_cluster.list(fields=["id", "name", "status"])
         """
-        response = self.client._request(
+        if intern is None:
+            intern = self.intern_list_json
+        (json, cached) = self._read_json(
             url=self.base_resource_path,
-            http_method="get",
             description=self.__class__.__name__ + "/list",
+            fields=fields,
+            bypass_cache=bypass_cache,
+            intern=intern,
         )
-        return ResourceList(
-            self.resource_class,
-            response.json()["_embedded"][self.resource_list_path],
+        resources = json["_embedded"][self.resource_list_path]
+        # used by get_many() to choose between a list and many gets
+        self._collection_size = len(resources)
+        resource_list = ResourceList(
+            self.resource_class, self._select_listed(resources)
+        )
+        inventory_db = getattr(self.client, "inventory_db", None)
+        if inventory_db is not None and fields is None and not cached:
+            try:
+                inventory_db.store(resource_list)
+            except Exception as e:
+                # e.g. 'database is locked' by another process, the list
+                # does not depend on the database
+                _log.warning(
+                    "Inventory database store of {} failed: {}".format(
+                        self.base_resource_path, e
+                    )
+                )
+        return resource_list
+
+    def _select_listed(self, resources):
+        """Return the listed resources that belong to this controller.
+
+        Override when several controllers share a collection path.
+        """
+        return resources
+
+    list_item_cost = 0.02
+    """The cost of one resource in a `list()` response relative to the
+    round trip of one request.  Used by :py:meth:`get_many`."""
+
+    def get_many(
+        self,
+        ids,
+        max_workers=8,
+        fields=None,
+        bypass_cache=False,
+        use_list=None,
+    ):
+        """Retrieve many Resources by ID.
+
+        The resources are either retrieved with concurrent `get()` calls
+        or, when that is estimated to be cheaper, with one `list()` call
+        that is filtered by ID.  The estimate compares the number of
+        rounds of `max_workers` concurrent gets with the size of the
+        collection at the last `list()`, weighted by
+        :py:attr:`list_item_cost`.  If the collection has not been listed
+        yet, a list is used when the gets need more than one round.
+
+        Parameters
+        ----------
+        ids : list[str]
+            The IDs with the format /resource/path/id
+        max_workers : int, optional
+            Maximum number of concurrent gets, by default 8
+        fields : list, optional
+            Only retain the json for these fields, see :py:meth:`list`
+        bypass_cache : bool, optional
+            Always call the API, even if the client cache is enabled
+        use_list : bool, optional
+            Force (True) or prevent (False) the use of `list()`, by
+            default None (estimate)
+
+        Returns
+        -------
+        tuple(dict, list)
+            The resources keyed by ID, and the IDs that were not found
+
+        Raises
+        ------
+        APIException
+            The remote API returned an error other than not found.
+
+        Example
+        -------
+        >>> (clusters, not_found) = client.k8s_cluster.get_many(ids)
+        """
+        assert isinstance(ids, list), "'ids' must be a list"
+        for i, id in enumerate(ids):
+            assert isinstance(id, six.string_types) and id.startswith(
+                self.base_resource_path
+            ), "'ids' item '{}' must be a str starting with '{}'".format(
+                i, self.base_resource_path
+            )
+        assert (
+            isinstance(max_workers, int) and max_workers > 0
+        ), "'max_workers' must be an int > 0"
+
+        # de-duplicate, keeping the order
+        ids = list(OrderedDict.fromkeys(ids))
+
+        if use_list is None:
+            use_list = self._prefer_list(len(ids), max_workers)
+
+        found = OrderedDict()
+        not_found = []
+
+        if use_list:
+            _log.debug(
+                "get_many: listing {} for {} ids".format(
+                    self.base_resource_path, len(ids)
+                )
+            )
+            resources = self.list(fields=fields, bypass_cache=bypass_cache)
+            by_id = dict((r.id, r) for r in resources)
+            for id in ids:
+                if id in by_id:
+                    found[id] = by_id[id]
+                else:
+                    not_found.append(id)
+            return (found, not_found)
+
+        _log.debug(
+            "get_many: {} gets with {} workers".format(len(ids), max_workers)
+        )
+
+        def get(id):
+            try:
+                return self.get(id, fields=fields, bypass_cache=bypass_cache)
+            except APIItemNotFoundException:
+                return None
+
+        workers = max(1, min(max_workers, len(ids)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(get, ids))
+
+        for (id, resource) in zip(ids, results):
+            if resource is None:
+                not_found.append(id)
+            else:
+                found[id] = resource
+        return (found, not_found)
+
+    def _prefer_list(self, count, max_workers):
+        """Return True if one list() is estimated to be cheaper than gets."""
+        if count == 0:
+            return False
+        rounds = (count + max_workers - 1) // max_workers
+        size = getattr(self, "_collection_size", None)
+        if size is None:
+            return rounds > 1
+        cost_gets = rounds + count * self.list_item_cost
+        cost_list = 1 + size * self.list_item_cost
+        return cost_list <= cost_gets
+
+    def informer(self, interval=10, fields=None):
+        """Return a running :py:class:`.informer.Informer` for the collection.
+
+        The informer is shared by all callers of this controller, so the
+        `interval` and `fields` of the first call are used.  Stop the
+        informer with `informer.stop()` when it is no longer required; the
+        next call of this method will then start a new one.
+
+        Parameters
+        ----------
+        interval : int or float, optional
+            Seconds between `list()` calls, by default 10
+        fields : list, optional
+            Field projection passed to `list()`, by default None
+
+        Returns
+        -------
+        Informer
+            The running informer
+        """
+        informer = getattr(self, "_informer", None)
+        if informer is None or not informer.is_running():
+            informer = Informer(self, interval=interval, fields=fields)
+            self._informer = informer.start()
+        return informer
+
+    def _get_json(
+        self, url, description, fields=None, bypass_cache=False, intern=False
+    ):
+        """Retrieve the decoded json for url, reading through the cache.
+
+        A stale cache entry is returned immediately and refreshed by a
+        background thread, a cached 404 raises APIItemNotFoundException
+        without calling the API.
+        """
+        (json, _) = self._read_json(
+            url, description, fields, bypass_cache, intern
         )
+        return json
+
+    def _read_json(
+        self, url, description, fields=None, bypass_cache=False, intern=False
+    ):
+        """Return (json, cached) for url, see :py:meth:`_get_json`.
+
+        `cached` is True if the json was served by the cache.
+        """
+        cache = getattr(self.client, "cache", None)
+
+        if cache is not None and not bypass_cache:
+            (status, value) = cache.lookup(
+                self.base_resource_path, url, fields
+            )
+            if status == HIT:
+                return (value, True)
+            if status == NOT_FOUND:
+                raise APIItemNotFoundException(
+                    message=value.message,
+                    request_method=value.request_method,
+                    request_url=value.request_url,
+                    request_data=value.request_data,
+                )
+            if status == STALE:
+                if cache.begin_refresh(url, fields):
+                    thread = threading.Thread(
+                        target=self._refresh_json,
+                        args=(cache, url, description, fields, intern),
+                        name="hpecp-cache-refresh",
+                    )
+                    thread.daemon = True
+                    thread.start()
+                return (value, True)
+
+        return (
+            self._fetch_json(cache, url, description, fields, intern),
+            False,
+        )
+
+    def _fetch_json(self, cache, url, description, fields, intern):
+        # a write request while this request is in flight invalidates the
+        # cache, the response must not be cached
+        generation = None if cache is None else cache.generation
+        try:
+            response = self.client._request(
+                url=url,
+                http_method="get",
+                description=description,
+            )
+        except APIItemNotFoundException as e:
+            if cache is not None:
+                cache.put_not_found(
+                    self.base_resource_path, url, e, fields, generation
+                )
+            raise
+        json = self._decode(response, fields, intern)
+
+        if cache is not None:
+            cache.put(self.base_resource_path, url, json, fields, generation)
+
+        return json
+
+    def _refresh_json(self, cache, url, description, fields, intern):
+        """Refresh a stale cache entry, run by a background thread."""
+        try:
+            self._fetch_json(cache, url, description, fields, intern)
+        except Exception as e:
+            _log.debug("Cache refresh of {} failed: {}".format(url, e))
+        finally:
+            cache.end_refresh(url, fields)
+
+    def _decode(self, response, fields=None, intern=False):
+        """Decode the response json, applying the field projection."""
+        if fields is None:
+            if intern:
+                return response.json(object_pairs_hook=JsonInterner())
+            return response.json()
+
+        for field in fields:
+            assert (
+                field in self.resource_class.all_fields
+            ), "item '{}' is not a field in {}.all_fields".format(
+                field, self.resource_class.__name__
+            )
+
+        keys = self.resource_class.json_keys(fields)
+        collection_href = self.base_resource_path.rstrip("/")
+
+        def is_resource_href(href):
+            # '/api/v2/k8scluster/1' but not the list '/api/v2/k8scluster/'
+            return (
+                isinstance(href, six.string_types)
+                and href.startswith(collection_href + "/")
+                and href.rstrip("/") != collection_href
+            )
+
+        def prune_resource(pairs):
+            obj = dict(pairs)
+            try:
+                href = obj["_links"]["self"]["href"]
+            except (KeyError, TypeError):
+                return obj
+            if is_resource_href(href):
+                return dict((k, v) for (k, v) in pairs if k in keys)
+            return obj
+
+        # the hook is called for every json object as soon as it has been
+        # decoded, so the discarded attributes are released straight away
+        if intern:
+            return response.json(
+                object_pairs_hook=JsonInterner(hook=prune_resource)
+            )
+        return response.json(object_pairs_hook=prune_resource)
 
     def delete(self, id):
         """Make an API call to delete a Resources.
@@ -198,7 +552,9 @@ class AbstractResourceController:
         APIItemNotFoundException
             The item with {id} was not found.
         """
-        assert isinstance(id, str), "'id' must be provided and must be a str"
+        assert isinstance(
+            id, six.string_types
+        ), "'id' must be provided and must be a str"
         assert id.startswith(
             self.base_resource_path
         ), "'id' does not start with '{}'".format(self.base_resource_path)
@@ -264,9 +620,60 @@ class AbstractWaitableResourceController(AbstractResourceController):
         """See wait_for_status()."""
         return self.wait_for_status(id, states, timeout_secs)
 
+    poll_schedule = PollSchedule()
+    """The :py:class:`.poll_schedule.PollSchedule` used by the wait methods.
+
+    Override in the implementing class, or per client instance, e.g.
+
+    >>> client.k8s_worker.poll_schedule = PollSchedule(initial=5)
+    """
+
+    poll_transition_schedules = {}
+    """PollSchedules for specific status transitions.
+
+    Keyed by (from status name, to status name).  Use None as the from
+    status name to match any status, and None as the to status name for
+    a wait for the resource to be deleted.
+
+    Example
+    -------
+    class K8sClusterController(AbstractWaitableResourceController):
+        ...
+        poll_transition_schedules = {
+            ("creating", "ready"): PollSchedule(initial=30, max_step=60),
+        }
+    """
+
+    def get_poll_schedule(self, from_status=None, to_status=[]):
+        """Return the PollSchedule for a status transition.
+
+        Parameters
+        ----------
+        from_status: str, optional
+            The current status name, if known
+        to_status: list[:py:method:`status_class`]
+            The status(es) being waited for, empty for a deletion
+
+        Returns
+        -------
+        PollSchedule
+            The first matching entry of `poll_transition_schedules`,
+            otherwise `poll_schedule`
+        """
+        to_names = [s.name for s in to_status] or [None]
+        for to_name in to_names:
+            for key in [(from_status, to_name), (None, to_name)]:
+                if key in self.poll_transition_schedules:
+                    return self.poll_transition_schedules[key]
+        return self.poll_schedule
+
     def wait_for_status(self, id, status=[], timeout_secs=1200):
         """Wait for K8S worker status.
 
+        The resource is polled using the controller's
+        :py:meth:`get_poll_schedule` for the transition from its current
+        status.
+
         Parameters
         ----------
         id: str
@@ -294,6 +701,9 @@ class AbstractWaitableResourceController(AbstractResourceController):
         assert isinstance(timeout_secs, int), "'timeout_secs' must be an int"
         assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
 
+        started = time.time()
+        waiting_for_status = [s.name for s in status]
+
         # if status is empty return success when resource id not found
         if len(status) == 0:
             _log.debug(
@@ -301,53 +711,43 @@ class AbstractWaitableResourceController(AbstractResourceController):
                     timeout_secs, id
                 )
             )
-
-            def item_not_exists():
-                try:
-                    self.get(id)
-                    return False
-                except APIItemNotFoundException:
-                    return True
-
-            try:
-                polling.poll(
-                    lambda: item_not_exists(),
-                    step=10,
-                    poll_forever=False,
-                    timeout=timeout_secs,
-                )
-                return True
-            except polling.TimeoutException:
-                return False
-
-        # if state is not empty return success when resource current state is
-        # in desired state
         else:
-            waiting_for_status = [s.name for s in status]
-
             _log.debug(
                 "waiting {}s for item {} to have status in {}".format(
                     timeout_secs, id, waiting_for_status
                 )
             )
-            try:
 
-                def get_status():
-                    status = getattr(self.get(id), self.status_fieldname)
-                    return status
-
-                polling.poll(
-                    lambda: (get_status() in waiting_for_status),
-                    step=10,
-                    poll_forever=False,
-                    timeout=timeout_secs,
+        def get_status():
+            try:
+                return getattr(
+                    self.get(id, bypass_cache=True), self.status_fieldname
                 )
-                _log.debug(
-                    "Found item {} with status in {}".format(
-                        id, waiting_for_status
-                    )
+            except APIItemNotFoundException:
+                if len(status) == 0:
+                    return None
+                raise
+
+        def reached(current_status):
+            if len(status) == 0:
+                return current_status is None
+            return current_status in waiting_for_status
+
+        current_status = get_status()
+        if not reached(current_status):
+            schedule = self.get_poll_schedule(current_status, status)
+            _log.debug(
+                "polling {} from status {} with {}".format(
+                    id, current_status, schedule
+                )
+            )
+            try:
+                schedule.poll(
+                    lambda: reached(get_status()),
+                    timeout_secs,
+                    started=started,
+                    delay_first=True,
                 )
-                return True
             except polling.TimeoutException:
                 _log.debug(
                     "Timed out waiting for {} to have status in {}".format(
@@ -356,6 +756,339 @@ class AbstractWaitableResourceController(AbstractResourceController):
                 )
                 return False
 
+        _log.debug(
+            "Found item {} with status in {}".format(id, waiting_for_status)
+        )
+        return True
+
+    def wait_for_status_many(
+        self,
+        ids,
+        status=[],
+        timeout_secs=1200,
+        error_status=None,
+        fail_fast=False,
+        progress=None,
+        check=None,
+        fields=None,
+    ):
+        """Wait for many resources to have a status.
+
+        Rather than calling :py:meth:`wait_for_status` for each resource,
+        the collection is listed once per poll and every resource
+        is checked against the list.
+
+        Parameters
+        ----------
+        ids: list[str]
+            The resource IDs - format: '/resource/path/[0-9]+'
+        status: list[:py:method:`status_class`]
+            Status(es) to wait for.  Use an empty array if you want to
+            wait for the resources' existence to cease.
+        timeout_secs: int
+            How long to wait for the status(es).
+        error_status: list[:py:method:`status_class`], optional
+            Statuses that will never transition to the requested status.
+            By default the statuses with 'error' in their name.
+        fail_fast: bool, optional
+            Stop waiting as soon as a resource has an error status, by
+            default False
+        progress: callable, optional
+            Called after each poll with the number of resolved IDs and
+            the total number of IDs
+        check: callable, optional
+            Called with each listed resource that has a requested status,
+            the resource has only reached the status if it returns True,
+            e.g. a cluster is 'ready' until its upgrade starts
+        fields: list, optional
+            The fields read by check
+
+        Returns
+        -------
+        dict
+            The :py:class:`WaitOutcome` for each ID, in the order of ids
+
+        Example
+        -------
+        >>> outcomes = client.k8s_worker.wait_for_status_many(
+        ...     ids=worker_ids, status=[WorkerK8sStatus.ready])
+        >>> failed = [id for id, outcome in outcomes.items()
+        ...           if outcome != WaitOutcome.reached]
+        """
+        assert isinstance(ids, list), "'ids' must be a list"
+        assert isinstance(status, list), "'status' must be a list"
+        for i, s in enumerate(status):
+            assert isinstance(
+                s, self.status_class
+            ), "'status' item '{}' is not of type {}".format(
+                i, self.status_class
+            )
+        assert isinstance(timeout_secs, int), "'timeout_secs' must be an int"
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        if error_status is None:
+            error_status = [s for s in self.status_class if "error" in s.name]
+
+        waiting_for_status = [s.name for s in status]
+        error_status_names = [s.name for s in error_status]
+
+        outcomes = OrderedDict((id, None) for id in ids)
+
+        _log.debug(
+            "waiting {}s for {} items to have status in {}".format(
+                timeout_secs, len(ids), waiting_for_status
+            )
+        )
+
+        list_fields = ["id", self.status_fieldname]
+        list_fields += [f for f in fields or [] if f not in list_fields]
+
+        def poll():
+            resources = self.list(fields=list_fields, bypass_cache=True)
+            current = dict((r.id, r) for r in resources)
+            for id, outcome in outcomes.items():
+                if outcome is not None:
+                    continue
+                resource = current.get(id)
+                outcomes[id] = self._wait_outcome(
+                    None
+                    if resource is None
+                    else getattr(resource, self.status_fieldname),
+                    resource is not None,
+                    waiting_for_status,
+                    error_status_names,
+                    complete=resource is None
+                    or check is None
+                    or check(resource),
+                )
+                if fail_fast and outcomes[id] == WaitOutcome.error:
+                    return True
+            resolved = len([o for o in outcomes.values() if o is not None])
+            if progress is not None:
+                progress(resolved, len(outcomes))
+            return resolved == len(outcomes)
+
+        try:
+            self.get_poll_schedule(None, status).poll(poll, timeout_secs)
+        except polling.TimeoutException:
+            pass
+
+        early_exit = fail_fast and WaitOutcome.error in outcomes.values()
+        for id, outcome in outcomes.items():
+            if outcome is None:
+                if early_exit:
+                    outcomes[id] = WaitOutcome.pending
+                else:
+                    outcomes[id] = WaitOutcome.timeout
+
+        return outcomes
+
+    def delete_many(
+        self,
+        ids,
+        concurrency=8,
+        wait=True,
+        timeout_secs=1200,
+        progress=None,
+    ):
+        """Delete many resources and wait for all of them to disappear.
+
+        The deletes are issued concurrently, then the resources are
+        waited for with :py:meth:`wait_for_status_many`, which lists the
+        collection once per poll instead of polling each resource.
+
+        Parameters
+        ----------
+        ids: list[str]
+            The resource IDs - format: '/resource/path/[0-9]+'
+        concurrency: int, optional
+            Maximum number of concurrent delete requests, by default 8
+        wait: bool, optional
+            Wait for the resources to disappear, by default True
+        timeout_secs: int, optional
+            How long to wait for the resources to disappear
+        progress: callable, optional
+            Called with (stage, completed, total) as the deletes complete
+            (stage 'delete') and after each poll (stage 'wait')
+
+        Returns
+        -------
+        tuple(dict, dict)
+            The :py:class:`WaitOutcome` for each deleted ID
+            (`WaitOutcome.pending` if wait is False), and the exception
+            for each ID that could not be deleted
+
+        Example
+        -------
+        >>> (outcomes, errors) = client.k8s_cluster.delete_many(cluster_ids)
+        >>> failed = list(errors) + [id for (id, outcome) in outcomes.items()
+        ...                          if outcome != WaitOutcome.reached]
+        """
+        assert isinstance(ids, list), "'ids' must be a list"
+        for i, id in enumerate(ids):
+            assert isinstance(id, six.string_types) and id.startswith(
+                self.base_resource_path
+            ), "'ids' item '{}' must be a str starting with '{}'".format(
+                i, self.base_resource_path
+            )
+        assert (
+            isinstance(concurrency, int) and concurrency > 0
+        ), "'concurrency' must be an int > 0"
+        assert isinstance(timeout_secs, int), "'timeout_secs' must be an int"
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        ids = list(OrderedDict.fromkeys(ids))
+        errors = OrderedDict()
+        completed = [0]
+        lock = threading.Lock()
+
+        def delete(id):
+            try:
+                self.delete(id)
+                error = None
+            except Exception as e:
+                _log.debug("delete_many: {} failed: {}".format(id, e))
+                error = e
+            with lock:
+                completed[0] += 1
+                if progress is not None:
+                    progress("delete", completed[0], len(ids))
+            return error
+
+        workers = max(1, min(concurrency, len(ids)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(delete, ids))
+
+        deleted = []
+        for (id, error) in zip(ids, results):
+            if error is None:
+                deleted.append(id)
+            else:
+                errors[id] = error
+
+        if not wait or len(deleted) == 0:
+            outcomes = OrderedDict((id, WaitOutcome.pending) for id in deleted)
+            return (outcomes, errors)
+
+        def wait_progress(resolved, total):
+            if progress is not None:
+                progress("wait", resolved, total)
+
+        outcomes = self.wait_for_status_many(
+            deleted,
+            status=[],
+            timeout_secs=timeout_secs,
+            progress=wait_progress,
+        )
+        return (outcomes, errors)
+
+    def _wait_outcome(
+        self,
+        current_status,
+        exists,
+        waiting_for_status,
+        error_status_names,
+        complete=True,
+    ):
+        """Return the WaitOutcome for a resource status, None if pending.
+
+        A requested status only counts if `complete`, i.e. the caller's
+        check of the resource passed.
+        """
+        if not exists:
+            if len(waiting_for_status) == 0:
+                return WaitOutcome.reached
+            return WaitOutcome.disappeared
+        if current_status in waiting_for_status:
+            return WaitOutcome.reached if complete else None
+        if current_status in error_status_names:
+            return WaitOutcome.error
+        return None
+
+    def operation(
+        self,
+        id,
+        status=[],
+        timeout_secs=1200,
+        error_status=None,
+        check=None,
+        fields=None,
+    ):
+        """Track a resource status in the background.
+
+        The returned handle is serviced by the client's shared
+        :py:class:`.operation.OperationPoller`, so the calling thread is
+        not blocked.
+
+        Parameters
+        ----------
+        id: str
+            The resource ID - format: '/resource/path/[0-9]+'
+        status: list[:py:method:`status_class`]
+            Status(es) that complete the operation.  Use an empty array
+            if the operation completes when the resource is deleted.
+        timeout_secs: int
+            How long to track the operation for.
+        error_status: list[:py:method:`status_class`], optional
+            Statuses that fail the operation.  By default the statuses
+            with 'error' in their name.
+        check: callable, optional
+            Called with the resource when it has a requested status, the
+            operation only completes if it returns True, see
+            :py:class:`.operation.Operation`
+        fields: list, optional
+            The fields read by check
+
+        Returns
+        -------
+        Operation
+            The operation handle
+        """
+        assert isinstance(status, list), "'status' must be a list"
+        for i, s in enumerate(status):
+            assert isinstance(
+                s, self.status_class
+            ), "'status' item '{}' is not of type {}".format(
+                i, self.status_class
+            )
+        assert isinstance(timeout_secs, int), "'timeout_secs' must be an int"
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        return self.client.operation_poller.submit(
+            Operation(
+                self, id, status, timeout_secs, error_status, check, fields
+            )
+        )
+
+    def delete(self, id, as_operation=False, timeout_secs=1200):
+        """Make an API call to delete a Resources.
+
+        Parameters
+        ----------
+        id : str
+            The ID with the format /resource/path/id
+        as_operation : bool, optional
+            Return an :py:class:`.operation.Operation` that completes when
+            the resource no longer exists, by default False
+        timeout_secs : int, optional
+            How long to track the operation for if `as_operation` is True
+
+        Returns
+        -------
+        Operation
+            If `as_operation` is True, otherwise None
+
+        Raises
+        ------
+        APIException
+            The remote API returned an error.
+        APIItemNotFoundException
+            The item with {id} was not found.
+        """
+        super(AbstractWaitableResourceController, self).delete(id)
+        if as_operation:
+            return self.operation(id, [], timeout_secs)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class AbstractResource:
@@ -381,6 +1114,41 @@ class AbstractResource:
 
     all_fields = abc.abstractproperty(_get_all_fields, _set_all_fields)
 
+    field_json_keys = {}
+    """Map of field name to the top level json keys the field is read from.
+
+    Fields that are not in the map are read from the top level json key
+    with the same name as the field.  Used for field projections, see
+    :py:meth:`AbstractResourceController.list`.
+    """
+
+    required_json_keys = ["_links"]
+    """Top level json keys that are retained by every field projection.
+    The `id` field is read from '_links'."""
+
+    indexed_fields = ["id"]
+    """Fields that :py:meth:`ResourceList.filter` looks up with an index
+    when a `where` expression has an equality on the field."""
+
+    @classmethod
+    def json_keys(cls, fields):
+        """Return the set of top level json keys required by the fields.
+
+        Parameters
+        ----------
+        fields : list
+            Fields from `all_fields`
+
+        Returns
+        -------
+        set
+            The top level json keys
+        """
+        keys = set(cls.required_json_keys)
+        for field in fields:
+            keys.update(cls.field_json_keys.get(field, [field]))
+        return keys
+
     def __init__(self, json):
         """Create a new Resource class.
 
@@ -430,11 +1198,115 @@ class ResourceList:
         self.json = json
         self.resource_class = resource_class
         self.resources = [self.resource_class(j) for j in json]
+        self._indexes = {}
 
     def __getitem__(self, item):
         """Retrieve a field value."""
         return self.resources[item]
 
+    def index(self, field):
+        """Return the positions of the resources by field value.
+
+        The index is built on first use and kept for the lifetime of the
+        list.
+
+        Parameters
+        ----------
+        field : str
+            A field from the resource class `all_fields`
+
+        Returns
+        -------
+        dict
+            List of positions in the resource list, keyed by the string
+            value of the field
+        """
+        if field not in self._indexes:
+            index = {}
+            for (i, resource) in enumerate(self.resources):
+                try:
+                    value = getattr(resource, field)
+                except (AttributeError, KeyError):
+                    continue
+                index.setdefault(index_key(value), []).append(i)
+            self._indexes[field] = index
+        return self._indexes[field]
+
+    def filter(self, where):
+        """Return the resources matching a filter expression.
+
+        If the expression has an equality on one of the resource class
+        `indexed_fields` (or on a field that has already been indexed with
+        :py:meth:`index`), only the resources found with the index are
+        evaluated.
+
+        Parameters
+        ----------
+        where : str or Where
+            The filter expression, see :py:mod:`hpecp.where`
+
+        Returns
+        -------
+        ResourceList
+            The matching resources, in list order
+
+        Example
+        -------
+        >>> hpeclient.k8s_cluster.list().filter(
+        ...     "status=ready and k8s_version>=1.18")
+        """
+        if not isinstance(where, Where):
+            where = Where(where, self.resource_class)
+
+        candidates = None
+        for (field, value) in where.equalities:
+            if (
+                field not in self.resource_class.indexed_fields
+                and field not in self._indexes
+            ):
+                continue
+            positions = self.index(field).get(value, [])
+            if candidates is None:
+                candidates = positions
+            else:
+                found = set(positions)
+                candidates = [i for i in candidates if i in found]
+
+        if candidates is None:
+            resources = self.resources
+        else:
+            resources = [self.resources[i] for i in candidates]
+
+        return ResourceList(
+            self.resource_class, [r.json for r in resources if where(r)]
+        )
+
+    def diff(self, since, fields=None):
+        """Compare this list with an earlier snapshot of the same resources.
+
+        See :py:func:`hpecp.diff.diff_resource_lists`.
+
+        Parameters
+        ----------
+        since : ResourceList
+            The earlier snapshot
+        fields : list, optional
+            The fields to compare, by default all fields except '_links'
+
+        Returns
+        -------
+        ResourceListDiff
+            The added, removed and changed resources
+
+        Example
+        -------
+        >>> before = hpeclient.k8s_cluster.list()
+        >>> ...
+        >>> for change in hpeclient.k8s_cluster.list().diff(before).changed:
+        ...     print(change.id, change.fields)
+        """
+        return diff_resource_lists(since, self, fields)
+
     def tabulate(self, columns=[], style="pretty", display_headers=True):
         """Return a tabule output of the ResourceList.
 
@@ -486,6 +1358,74 @@ class ResourceList:
         >>> print(hpeclient.cluster.list().tabulate(
         ...     columns=['id', 'name','description']))
         """
+        columns = self._validate_columns(columns)
+
+        self.display_fields = columns
+
+        table = list(self._rows(columns))
+
+        if display_headers:
+            output = tabulate(table, headers=columns, tablefmt=style)
+        else:
+            output = tabulate(table, tablefmt=style)
+
+        if six.PY2:
+            return output.encode(encoding="UTF-8", errors="strict")
+        else:
+            return output
+
+    def write_table(
+        self,
+        stream=None,
+        columns=[],
+        style="pretty",
+        display_headers=True,
+        sample_size=None,
+    ):
+        """Write a table of the ResourceList to a stream, row by row.
+
+        Unlike :py:meth:`tabulate`, the table is not built up as a single
+        string, so this is the preferred method for printing large lists.
+
+        Parameters
+        ----------
+        stream : file, optional
+            Where to write the table, by default sys.stdout
+        columns : list, optional
+            List of columns to output. The default value of an empty list
+            will output all the available fields
+        style : str, optional
+            Table style, "pretty" or "plain", by default "pretty"
+        display_headers : bool, optional
+            Output the column names, by default True
+        sample_size : int, optional
+            Compute the column widths from the first `sample_size` rows
+            only, by default None (use all rows). See
+            :py:class:`hpecp.cli_utils.TableOutput`
+
+        Example
+        -------
+        >>> hpeclient.k8s_worker.list().write_table(
+        ...     columns=['id', 'status'], style="plain")
+        """
+        # imported on use, the library does not load the CLI helpers
+        from .cli_utils import TableOutput
+
+        columns = self._validate_columns(columns)
+
+        self.display_fields = columns
+
+        if stream is None:
+            stream = sys.stdout
+
+        TableOutput(
+            headers=columns,
+            style=style,
+            display_headers=display_headers,
+            sample_size=sample_size,
+        ).write(self._rows(columns), stream)
+
+    def _validate_columns(self, columns):
         assert isinstance(columns, list), "'columns' parameter must be list"
 
         if len(columns) == 0:
@@ -498,27 +1438,24 @@ class ResourceList:
                 field, self.__class__.__name__
             )
 
-        self.display_fields = columns
+        return columns
+
+    def _rows(self, columns):
+        """Yield the column values for each resource.
 
-        table = []
+        Each field is only evaluated once per resource.
+        """
+        missing = object()
         for resource in self.resources:
             row = []
             for col in columns:
-                if not hasattr(resource, col):
+                value = getattr(resource, col, missing)
+                if value is missing:
                     _log.warn(
                         "Field {} not found in {} - json {}".format(
-                            col, resource, self.json
+                            col, resource, resource.json
                         )
                     )
-                row.append(getattr(resource, col, ""))
-            table.append(row)
-
-        if display_headers:
-            output = tabulate(table, headers=columns, tablefmt=style)
-        else:
-            output = tabulate(table, tablefmt=style)
-
-        if six.PY2:
-            return output.encode(encoding="UTF-8", errors="strict")
-        else:
-            return output
+                    value = ""
+                row.append(value)
+            yield row
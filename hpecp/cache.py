@@ -0,0 +1,316 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Read-through cache for resource controller get and list calls."""
+
+from __future__ import absolute_import
+
+import threading
+import time
+from collections import OrderedDict
+
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+HIT = "hit"
+"""The entry is valid."""
+STALE = "stale"
+"""The entry expired less than `stale_ttl` seconds ago."""
+MISS = "miss"
+"""There is no valid entry."""
+NOT_FOUND = "not_found"
+"""The API responded 404 less than `not_found_ttl` seconds ago."""
+
+
+def _strip_path(url):
+    """Return the url path without the query string or trailing '/'."""
+    return url.split("?", 1)[0].rstrip("/")
+
+
+class ResourceCache(object):
+    """A TTL and LRU bounded cache of decoded API responses.
+
+    An instance of this class is created with
+    :py:meth:`ContainerPlatformClient.enable_cache
+    <hpecp.client.ContainerPlatformClient.enable_cache>`.  Entries are
+    stored per resource collection (the controller's
+    `base_resource_path`) so that each collection can have its own TTL.
+
+    Any post, put or delete request made by the client invalidates the
+    cached entries for the affected resource and the lists of its
+    collection.
+
+    The cached json is shared between callers and must not be modified.
+
+    With a `stale_ttl`, an expired entry is still returned by
+    :py:meth:`lookup` for `stale_ttl` seconds, as :py:data:`STALE`, so the
+    caller can serve it while refreshing it in the background.  With a
+    `not_found_ttl`, the 404 responses are cached too.
+    """
+
+    def __init__(
+        self,
+        ttl=30,
+        ttls=None,
+        max_entries=1000,
+        stale_ttl=0,
+        not_found_ttl=0,
+    ):
+        """Create a ResourceCache.
+
+        Parameters
+        ----------
+        ttl : int or float, optional
+            Seconds an entry is valid for, by default 30
+        ttls : dict, optional
+            TTL overrides by resource base path, e.g.
+            {"/api/v2/k8scluster": 300}
+        max_entries : int, optional
+            Maximum number of entries, the least recently used entries
+            are evicted first, by default 1000
+        stale_ttl : int or float, optional
+            Seconds an expired entry can still be served while it is
+            refreshed, by default 0 (never)
+        not_found_ttl : int or float, optional
+            Seconds a 404 response is cached for, by default 0 (never)
+        """
+        assert ttl >= 0, "'ttl' must be >= 0"
+        assert ttls is None or isinstance(ttls, dict), "'ttls' must be a dict"
+        assert (
+            isinstance(max_entries, int) and max_entries > 0
+        ), "'max_entries' must be an int > 0"
+        assert stale_ttl >= 0, "'stale_ttl' must be >= 0"
+        assert not_found_ttl >= 0, "'not_found_ttl' must be >= 0"
+
+        self.ttl = ttl
+        self.ttls = dict(
+            (_strip_path(path), t) for (path, t) in (ttls or {}).items()
+        )
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.not_found_ttl = not_found_ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # the keys being refreshed in the background, see begin_refresh()
+        self._refreshing = set()
+        # incremented by invalidate(), see put()
+        self.generation = 0
+
+    def ttl_for(self, collection):
+        """Return the TTL for a resource base path."""
+        return self.ttls.get(_strip_path(collection), self.ttl)
+
+    def get(self, collection, url, fields=None):
+        """Return the cached json or None if not cached or expired.
+
+        Parameters
+        ----------
+        collection : str
+            The controller's base resource path
+        url : str
+            The request url, including the query string
+        fields : list, optional
+            The field projection of the request
+        """
+        (status, value) = self.lookup(collection, url, fields)
+        return value if status == HIT else None
+
+    def lookup(self, collection, url, fields=None):
+        """Return the state of the entry for a request and its value.
+
+        Parameters
+        ----------
+        collection : str
+            The controller's base resource path
+        url : str
+            The request url, including the query string
+        fields : list, optional
+            The field projection of the request
+
+        Returns
+        -------
+        tuple
+            (status, value) where status is :py:data:`HIT`,
+            :py:data:`STALE`, :py:data:`MISS` or :py:data:`NOT_FOUND`.
+            The value is the json, or the APIItemNotFoundException for
+            NOT_FOUND.
+        """
+        key = self._key(url, fields)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return (MISS, None)
+            (expires, _, value, not_found) = entry
+            now = time.time()
+            if now >= expires + (0 if not_found else self.stale_ttl):
+                _log.debug("Cache expired: {}".format(url))
+                return (MISS, None)
+            # re-insert to mark as most recently used
+            self._entries[key] = entry
+            if not_found:
+                _log.debug("Cache hit (not found): {}".format(url))
+                return (NOT_FOUND, value)
+            if now >= expires:
+                _log.debug("Cache hit (stale): {}".format(url))
+                return (STALE, value)
+            _log.debug("Cache hit: {}".format(url))
+            return (HIT, value)
+
+    def put(self, collection, url, value, fields=None, generation=None):
+        """Add a json value to the cache.
+
+        Parameters
+        ----------
+        collection : str
+            The controller's base resource path
+        url : str
+            The request url, including the query string
+        value : obj
+            The decoded json
+        fields : list, optional
+            The field projection of the request
+        generation : int, optional
+            The :py:attr:`generation` read before the request.  The value
+            is discarded if the cache has been invalidated since.
+        """
+        self._put(
+            collection,
+            url,
+            value,
+            fields,
+            ttl=self.ttl_for(collection),
+            not_found=False,
+            generation=generation,
+        )
+
+    def put_not_found(
+        self, collection, url, exception, fields=None, generation=None
+    ):
+        """Cache a 404 response for `not_found_ttl` seconds.
+
+        Parameters
+        ----------
+        collection : str
+            The controller's base resource path
+        url : str
+            The request url, including the query string
+        exception : APIItemNotFoundException
+            The exception raised for the request
+        fields : list, optional
+            The field projection of the request
+        generation : int, optional
+            The :py:attr:`generation` read before the request.  The 404
+            is discarded if the cache has been invalidated since, e.g. by
+            the create of the resource.
+        """
+        self._put(
+            collection,
+            url,
+            exception,
+            fields,
+            ttl=self.not_found_ttl,
+            not_found=True,
+            generation=generation,
+        )
+
+    def _put(
+        self, collection, url, value, fields, ttl, not_found, generation=None
+    ):
+        if ttl <= 0:
+            return
+
+        key = self._key(url, fields)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                _log.debug("Cache invalidated during request: {}".format(url))
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (
+                time.time() + ttl,
+                _strip_path(collection),
+                value,
+                not_found,
+            )
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, url, fields=None):
+        """Claim the background refresh of an entry.
+
+        Returns
+        -------
+        bool
+            False if the entry is already being refreshed
+        """
+        key = self._key(url, fields)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, url, fields=None):
+        """Release an entry claimed by :py:meth:`begin_refresh`."""
+        with self._lock:
+            self._refreshing.discard(self._key(url, fields))
+
+    def invalidate(self, url):
+        """Invalidate the entries affected by a write request to url.
+
+        The entries for the resource at url (and its parent resources),
+        and the lists of the collections containing it, are removed.
+
+        Parameters
+        ----------
+        url : str
+            The url of the post, put or delete request
+        """
+        path = _strip_path(url)
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries.keys()):
+                (_, collection, _, _) = self._entries[key]
+                if not (
+                    path == collection or path.startswith(collection + "/")
+                ):
+                    continue
+                entry_path = _strip_path(key[0])
+                if (
+                    entry_path == collection
+                    or path == entry_path
+                    or path.startswith(entry_path + "/")
+                ):
+                    _log.debug("Cache invalidated: {}".format(key[0]))
+                    del self._entries[key]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        """Return the number of entries, including expired entries."""
+        return len(self._entries)
+
+    @staticmethod
+    def _key(url, fields):
+        return (url, tuple(fields) if fields is not None else None)
@@ -57,6 +57,18 @@ class Catalog(AbstractResource):
     # TODO: Pick a smaller subset, again based on the API response
     default_display_fields = all_fields
 
+    field_json_keys = {
+        "label_name": ["label"],
+        "label_description": ["label"],
+        "self_href": ["_links"],
+        "feed": ["_links"],
+        "logo_checksum": ["logo"],
+        "logo_url": ["logo"],
+        "documentation_checksum": ["documentation"],
+        "documentation_mimetype": ["documentation"],
+        "documentation_file": ["documentation"],
+    }
+
     @property
     def label_name(self):
         """@Field: from json['label']['name']"""
@@ -0,0 +1,84 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""HPE Container Platform CLI."""
+
+from __future__ import print_function
+
+import os
+import sys
+
+from hpecp.apply import load_state, make_plan
+from hpecp.cli import base
+
+
+@base.intercept_exception
+def apply(
+    file,
+    prune=False,
+    dry_run=False,
+    verbose=False,
+    max_workers=4,
+    timeout_secs=3600,
+):
+    """Converge the platform to the state declared in a YAML file.
+
+    :param file: the desired state file, '-' to read stdin
+    :param prune: delete the undeclared resources of the declared sections
+    :param dry_run: print the plan without applying it
+    :param verbose: also print the unchanged resources
+    :param max_workers: maximum number of concurrent requests and actions
+    :param timeout_secs: how long to wait for each resource to be ready
+    """
+    if file != "-":
+        file = os.path.expanduser(file)
+    state = load_state(file)
+    plan = make_plan(
+        base.get_client(),
+        state,
+        prune=prune,
+        max_workers=max_workers,
+        timeout_secs=timeout_secs,
+    )
+    for line in plan.lines(verbose=verbose):
+        print(line)
+
+    if dry_run or not plan:
+        return
+
+    def progress(action, error):
+        if error is None:
+            print("done: {}".format(action.name), file=sys.stderr)
+        else:
+            print("failed: {}: {}".format(action.name, error), file=sys.stderr)
+
+    result = plan.execute(max_workers=max_workers, progress=progress)
+    for name in result.skipped:
+        print("skipped: {}".format(name), file=sys.stderr)
+    print(
+        "{} done, {} failed, {} skipped in {:.0f}s".format(
+            len(result.done),
+            len(result.failed),
+            len(result.skipped),
+            result.elapsed,
+        )
+    )
+    if not result:
+        sys.exit(1)
@@ -26,6 +26,8 @@ import abc
 import json
 import os
 import sys
+import time
+import configparser
 import jmespath
 import six
 import yaml
@@ -41,12 +43,15 @@ from hpecp import (
     ContainerPlatformClientException,
 )
 
+from hpecp.base_resource import ResourceList, WaitOutcome
 from hpecp.exceptions import (
     APIForbiddenException,
     APIItemNotFoundException,
     APIUnknownException,
 )
 from hpecp.cli_utils import TextOutput
+from hpecp.snapshot import Snapshot, is_snapshot
+from hpecp.where import Where
 
 _log = Logger.get_logger()
 
@@ -122,6 +127,73 @@ def intercept_exception(wrapped, instance, args, kwargs):
         _unknown_exception_handler(ex)
 
 
+def get_offline_snapshot(offline=None):
+    """Retrieve the path of the snapshot to use instead of the API.
+
+    The path is taken from the `offline` parameter, then from the
+    HPECP_OFFLINE_SNAPSHOT environment variable and then from the
+    'offline_snapshot' setting of the profile.  None means online.
+    """
+    if offline is not None:
+        return os.path.expanduser(str(offline))
+
+    if "HPECP_OFFLINE_SNAPSHOT" in os.environ:
+        return os.path.expanduser(os.getenv("HPECP_OFFLINE_SNAPSHOT"))
+
+    config_file = os.path.expanduser(get_config_file())
+    if not os.path.exists(config_file):
+        return None
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    profile = get_profile()
+    for section in [profile, "default"]:
+        if config.has_option(section, "offline_snapshot"):
+            _log.debug(
+                "Found 'offline_snapshot' in profile '{}'".format(section)
+            )
+            return os.path.expanduser(config.get(section, "offline_snapshot"))
+    return None
+
+
+DEFAULT_INVENTORY_DB = "~/.hpecp_inventory.db"
+
+
+def get_inventory_db(database=None):
+    """Retrieve the path of the inventory database.
+
+    The path is taken from the `database` parameter, then from the
+    HPECP_INVENTORY_DB environment variable and then from the
+    'inventory_db' setting of the profile.  None means that the inventory
+    database is not configured.
+    """
+    if database is not None:
+        return os.path.expanduser(str(database))
+
+    if "HPECP_INVENTORY_DB" in os.environ:
+        return os.path.expanduser(os.getenv("HPECP_INVENTORY_DB"))
+
+    config_file = os.path.expanduser(get_config_file())
+    if not os.path.exists(config_file):
+        return None
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    profile = get_profile()
+    for section in [profile, "default"]:
+        if config.has_option(section, "inventory_db"):
+            _log.debug("Found 'inventory_db' in profile '{}'".format(section))
+            return os.path.expanduser(config.get(section, "inventory_db"))
+    return None
+
+
+def _format_age(seconds):
+    minutes = int(seconds) // 60
+    if minutes < 60:
+        return "{}m".format(minutes)
+    if minutes < 60 * 24:
+        return "{}h {}m".format(minutes // 60, minutes % 60)
+    return "{}d {}h".format(minutes // (60 * 24), minutes // 60 % 24)
+
+
 @intercept_exception
 def get_client(start_session=True):
     """Retrieve a reference to an authenticated client object."""
@@ -131,6 +203,9 @@ def get_client(start_session=True):
     )
     if start_session:
         client.create_session()
+    inventory_db = get_inventory_db()
+    if inventory_db is not None:
+        client.enable_inventory_db(inventory_db)
     return client
 
 
@@ -151,21 +226,69 @@ class BaseProxy:
         self.resource_class = resource_class
         super(BaseProxy, self).__init__()
 
+    def open_snapshot(self, path):
+        """Open an offline snapshot and print its age to stderr.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot file path, see :py:mod:`hpecp.snapshot`
+
+        Returns
+        -------
+        Snapshot
+            The snapshot, which contains this proxy's collection.  The
+            caller closes it.
+        """
+        snapshot = Snapshot(path)
+        if self.client_module_name not in snapshot.counts:
+            snapshot.close()
+            raise AssertionError(
+                "The snapshot '{}' does not contain '{}'".format(
+                    path, self.client_module_name
+                )
+            )
+        print(
+            "OFFLINE: snapshot '{}' taken {} ({} ago)".format(
+                path,
+                time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(snapshot.created)
+                ),
+                _format_age(snapshot.age()),
+            ),
+            file=sys.stderr,
+        )
+        return snapshot
+
     @intercept_exception
-    def get(self, id, output="yaml", params=None):
+    def get(self, id, output="yaml", params=None, offline=None):
         """Retrieve a Resource by ID.
 
         id: string
             the id of the resource with format: '/api/path/[0-9]+'
         output: string
             how to display the output, either 'yaml' or 'json', default 'yaml'
+        offline: string
+            read the resource from a snapshot file instead of the API, see
+            `hpecp snapshot export`
         """
-        self.client = get_client()
-        self.client_module_property = getattr(
-            self.client, self.client_module_name
-        )
-        response = self.client_module_property.get(id=id, params=params)
-        json_data = response.json
+        offline = get_offline_snapshot(offline)
+        if offline is not None:
+            with self.open_snapshot(offline) as snapshot:
+                json_data = snapshot.find(self.client_module_name, id)
+            if json_data is None:
+                print(
+                    "'{}' does not exist in the snapshot".format(id),
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+        else:
+            self.client = get_client()
+            self.client_module_property = getattr(
+                self.client, self.client_module_name
+            )
+            response = self.client_module_property.get(id=id, params=params)
+            json_data = response.json
 
         if output == "json":
             print(json.dumps(json_data))
@@ -206,7 +329,89 @@ class BaseProxy:
             self.wait_for_delete(id=id, timeout_secs=wait_for_delete_sec)
 
     @intercept_exception
-    def list(self, output="table", columns="DEFAULT", query={}):
+    def delete_many(
+        self, ids=None, file=None, concurrency=8, wait_for_delete_sec=1200
+    ):
+        """Delete many resources in parallel.
+
+        Parameters
+        ----------
+        ids : list/tuple/str, optional
+            The resource IDs, e.g. "/api/v2/k8scluster/1,/api/v2/k8scluster/2"
+        file : str, optional
+            Path to a file with one resource ID per line, '-' for stdin
+        concurrency : int, optional
+            Maximum number of concurrent delete requests, by default 8
+        wait_for_delete_sec : int, optional
+            Wait for all the resources to be deleted, by default 1200
+            (0 = do not wait)
+        """
+        if isinstance(ids, tuple):
+            ids = list(ids)
+        elif isinstance(ids, str):
+            ids = [id for id in ids.split(",") if id.strip()]
+        elif ids is None:
+            ids = []
+
+        if file is not None:
+            if file == "-":
+                lines = sys.stdin.readlines()
+            else:
+                with open(os.path.expanduser(file)) as f:
+                    lines = f.readlines()
+            ids += [line for line in lines if line.strip()]
+
+        ids = [str(id).strip() for id in ids]
+        if len(ids) == 0:
+            print("Provide resource IDs with --ids or --file", file=sys.stderr)
+            sys.exit(1)
+
+        def progress(stage, completed, total):
+            print(
+                "{}: {}/{}".format(
+                    "deleted" if stage == "delete" else "gone",
+                    completed,
+                    total,
+                ),
+                file=sys.stderr,
+            )
+
+        self.client = get_client()
+        self.client_module_property = getattr(
+            self.client, self.client_module_name
+        )
+        (outcomes, errors) = self.client_module_property.delete_many(
+            ids,
+            concurrency=concurrency,
+            wait=wait_for_delete_sec > 0,
+            timeout_secs=wait_for_delete_sec,
+            progress=progress,
+        )
+
+        for (id, error) in errors.items():
+            print("Failed to delete {}: {}".format(id, error), file=sys.stderr)
+        not_deleted = [
+            id
+            for (id, outcome) in outcomes.items()
+            if outcome not in [WaitOutcome.reached, WaitOutcome.pending]
+        ]
+        for id in not_deleted:
+            print(
+                "{} was not deleted: {}".format(id, outcomes[id].name),
+                file=sys.stderr,
+            )
+        if len(errors) > 0 or len(not_deleted) > 0:
+            sys.exit(1)
+
+    @intercept_exception
+    def list(
+        self,
+        output="table",
+        columns="DEFAULT",
+        query={},
+        where=None,
+        offline=None,
+    ):
         """Retrieve the list of resources.
 
         Parameters
@@ -221,6 +426,15 @@ class BaseProxy:
         query : dict, optional
             Query in jmespath (https://jmespath.org/) format, by default {}
             if using a query, output must be "json" or "json-pp"
+        where : str, optional
+            Only list the resources matching a filter expression, e.g.
+            "status=ready and k8s_version>=1.18", see
+            :py:mod:`hpecp.where`.  Applied before the query.
+        offline : str, optional
+            Read the resources from a snapshot file instead of the API,
+            see `hpecp snapshot export`.  By default the
+            HPECP_OFFLINE_SNAPSHOT environment variable or the
+            'offline_snapshot' profile setting, if set.
         """
         if columns is not None:
             if columns == "DEFAULT":
@@ -240,11 +454,32 @@ class BaseProxy:
             query=query,
         )
 
-        self.client = get_client()
-        self.client_module_property = getattr(
-            self.client, self.client_module_name
-        )
-        list_instance = self.client_module_property.list()
+        # compile the filter before calling the API to report errors early
+        if where is not None:
+            where = Where(str(where), self.resource_class)
+
+        offline = get_offline_snapshot(offline)
+        if offline is not None:
+            with self.open_snapshot(offline) as snapshot:
+                list_instance = snapshot.resources(self.client_module_name)
+        else:
+            self.client = get_client()
+            self.client_module_property = getattr(
+                self.client, self.client_module_name
+            )
+            # a jmes query runs against the full json, otherwise only the
+            # json for the displayed and filtered columns needs to be
+            # retained
+            if len(query) == 0:
+                fields = list(columns)
+                if where is not None:
+                    fields += [f for f in where.fields if f not in fields]
+                list_instance = self.client_module_property.list(fields=fields)
+            else:
+                list_instance = self.client_module_property.list()
+
+        if where is not None:
+            list_instance = list_instance.filter(where)
 
         self.print_list(
             list_instance=list_instance,
@@ -253,6 +488,80 @@ class BaseProxy:
             query=query,
         )
 
+    @intercept_exception
+    def diff(self, since, output="text", fields=None):
+        """Compare the current resources with a snapshot.
+
+        Parameters
+        ----------
+        since : str
+            Path to a snapshot file written by `hpecp snapshot export`,
+            or to a json file holding a list of resources as output by
+            `list --output json --query "[]"`
+        output : str, optional
+            "text", "json" or "json-pp", by default "text"
+        fields : list/tuple/str, optional
+            Only compare these fields, by default all fields except _links
+        """
+        if output not in ["text", "json", "json-pp"]:
+            print(
+                "'output' must be 'text', 'json' or 'json-pp'",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        if isinstance(fields, tuple):
+            fields = list(fields)
+        elif isinstance(fields, str):
+            fields = fields.split(",")
+
+        since = os.path.expanduser(since)
+        if is_snapshot(since):
+            snapshot = Snapshot(since)
+            assert (
+                self.client_module_name in snapshot.counts
+            ), "The snapshot '{}' does not contain '{}'".format(
+                since, self.client_module_name
+            )
+        else:
+            with open(since) as f:
+                snapshot = json.load(f)
+            assert isinstance(
+                snapshot, list
+            ), "The snapshot '{}' must contain a json list".format(since)
+
+        self.client = get_client()
+        self.client_module_property = getattr(
+            self.client, self.client_module_name
+        )
+        current = self.client_module_property.list()
+        if isinstance(snapshot, Snapshot):
+            # only the compared field columns of an indexed snapshot are
+            # decoded
+            with snapshot:
+                diff = snapshot.diff(
+                    self.client_module_name, current, fields=fields
+                )
+        else:
+            diff = current.diff(
+                ResourceList(self.resource_class, snapshot), fields=fields
+            )
+
+        if output == "json":
+            print(json.dumps(diff.to_dict()))
+        elif output == "json-pp":
+            print(json.dumps(diff.to_dict(), indent=4, sort_keys=True))
+        else:
+            for resource in diff.added:
+                print("+ {}".format(resource.id))
+            for resource in diff.removed:
+                print("- {}".format(resource.id))
+            for change in diff.changed:
+                print("~ {}".format(change.id))
+                for field in sorted(change.fields.keys()):
+                    (old, new) = change.fields[field]
+                    print("    {}: {} -> {}".format(field, old, new))
+
     @intercept_exception
     def validate_list_params(self, all_fields, output, columns, query):
         """Print a list of resources.
@@ -322,15 +631,16 @@ class BaseProxy:
             query=query,
         )
 
-        # use tabulate for simplified user output
+        # stream the table rows for simplified user output
         if len(query) == 0:
             if output == "table":
-                print(list_instance.tabulate(columns=columns))
+                list_instance.write_table(stream=sys.stdout, columns=columns)
             else:
-                print(
-                    list_instance.tabulate(
-                        columns=columns, style="plain", display_headers=False
-                    )
+                list_instance.write_table(
+                    stream=sys.stdout,
+                    columns=columns,
+                    style="plain",
+                    display_headers=False,
                 )
 
         # user has provided a jmes query
@@ -0,0 +1,154 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+"""HPE Container Platform CLI."""
+
+from __future__ import print_function
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hpecp.cli import base
+from hpecp.cli_utils import TableOutput
+from hpecp.inventory_db import InventoryDatabase
+from hpecp.snapshot import RESOURCE_CLASSES
+
+
+def _inventory_db_path(database):
+    path = base.get_inventory_db(database)
+    if path is None:
+        path = base.get_inventory_db(base.DEFAULT_INVENTORY_DB)
+    return path
+
+
+def _open_inventory_db(database):
+    path = _inventory_db_path(database)
+    assert os.path.exists(path), (
+        "The inventory database '{}' does not exist, run "
+        "'hpecp cache refresh' to create it".format(path)
+    )
+    return InventoryDatabase(path)
+
+
+class CacheProxy(object):
+    """Proxy object to :py:mod:`<hpecp.inventory_db>`."""
+
+    def __dir__(self):
+        """Return the CLI method names."""
+        return [
+            "info",
+            "query",
+            "refresh",
+        ]
+
+    @base.intercept_exception
+    def refresh(self, collections=None, database=None, max_workers=4):
+        """Store the platform inventory in the inventory database.
+
+        :param collections: comma separated collections, e.g.
+            'k8s_cluster,k8s_worker' (default: all)
+        :param database: the database file (default: HPECP_INVENTORY_DB,
+            the profile 'inventory_db' setting or ~/.hpecp_inventory.db)
+        :param max_workers: maximum number of concurrent list requests
+        """
+        if collections is None:
+            collections = list(RESOURCE_CLASSES)
+        elif isinstance(collections, tuple):
+            collections = list(collections)
+        elif isinstance(collections, str):
+            collections = collections.split(",")
+        for collection in collections:
+            assert (
+                collection in RESOURCE_CLASSES
+            ), "Unknown collection '{}', must be one of {}".format(
+                collection, list(RESOURCE_CLASSES)
+            )
+
+        client = base.get_client()
+        client.enable_inventory_db(_inventory_db_path(database))
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                counts = executor.map(
+                    lambda c: len(
+                        getattr(client, c).list(bypass_cache=True).resources
+                    ),
+                    collections,
+                )
+                for (collection, count) in zip(collections, counts):
+                    print("{:<12} {}".format(collection, count))
+        finally:
+            client.disable_inventory_db()
+
+    @base.intercept_exception
+    def query(self, sql, output="table", database=None):
+        """Run a SQL query on the inventory database, without calling the API.
+
+        The tables are named after the collections (see 'hpecp cache info')
+        and have a column for each field and a 'json' column, e.g.
+        "SELECT k.hostname, k.status FROM k8s_worker k WHERE k.status !=
+        'ready'".
+
+        :param sql: the SELECT statement
+        :param output: how to display the rows, 'table', 'text' or 'json'
+        :param database: the database file (default: HPECP_INVENTORY_DB,
+            the profile 'inventory_db' setting or ~/.hpecp_inventory.db)
+        """
+        assert output in [
+            "table",
+            "text",
+            "json",
+        ], "'output' parameter must be 'table', 'text' or 'json'"
+
+        with _open_inventory_db(database) as db:
+            try:
+                (columns, rows) = db.query(sql)
+            except sqlite3.Error as e:
+                print("Query failed: {}".format(e), file=sys.stderr)
+                sys.exit(1)
+
+        if output == "json":
+            print(json.dumps([dict(zip(columns, row)) for row in rows]))
+        elif output == "table":
+            TableOutput(headers=columns).write(rows, sys.stdout)
+        else:
+            TableOutput(
+                headers=columns, style="plain", display_headers=False
+            ).write(rows, sys.stdout)
+
+    @base.intercept_exception
+    def info(self, database=None):
+        """Print the collections of the inventory database and their age.
+
+        :param database: the database file (default: HPECP_INVENTORY_DB,
+            the profile 'inventory_db' setting or ~/.hpecp_inventory.db)
+        """
+        with _open_inventory_db(database) as db:
+            print("database:    {}".format(db.path))
+            for (collection, (count, updated)) in db.collections().items():
+                print(
+                    "{:<12} {:<6} {} ago".format(
+                        collection,
+                        count,
+                        base._format_age(time.time() - updated),
+                    )
+                )
@@ -44,6 +44,7 @@ class CatalogProxy(base.BaseProxy):
             "get",
             "list",
             "delete",
+            "diff",
             "examples",
             "wait_for_state",
             "refresh",
@@ -41,6 +41,7 @@ class DatatapProxy(base.BaseProxy):
             "get",
             "list",
             "delete",
+            "diff",
             # "examples",
             "wait_for_state",
         ]
@@ -35,6 +35,8 @@ class GatewayProxy(base.BaseProxy):
         return [
             "create_with_ssh_key",
             "delete",
+            "delete_many",
+            "diff",
             "get",
             "list",
             "states",
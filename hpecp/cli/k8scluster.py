@@ -51,7 +51,10 @@ class K8sClusterProxy(base.BaseProxy):
             "dashboard_url",
             "dashboard_token",
             "delete",
+            "delete_many",
+            "diff",
             "examples",
+            "export_kubeconfig",
             "get",
             "get_available_addons",
             "get_installed_addons",
@@ -62,6 +65,7 @@ class K8sClusterProxy(base.BaseProxy):
             "list",
             "statuses",
             "upgrade_cluster",
+            "upgrade_fleet",
             "wait_for_status",
         ]
 
@@ -151,6 +155,47 @@ class K8sClusterProxy(base.BaseProxy):
             )
         )
 
+    @base.intercept_exception
+    def export_kubeconfig(
+        self, path, ids=None, where=None, max_workers=8, force=False
+    ):
+        """Export the Admin Kube Config of many K8s Clusters to one file.
+
+        The clusters whose config has not changed since the last export
+        to the same path are not parsed again.
+
+        :param path: the kubeconfig file to write
+        :param ids: the cluster IDs, e.g.
+            "/api/v2/k8scluster/1,/api/v2/k8scluster/2", by default all
+        :param where: only export the clusters matching this filter, e.g.
+            "status=ready"
+        :param max_workers: the maximum number of concurrent requests
+        :param force: write the file even if no config changed
+
+        Example::
+
+        hpecp k8scluster export-kubeconfig --path ~/.kube/hpecp
+            --where "status=ready"
+        """
+        if isinstance(ids, tuple):
+            ids = list(ids)
+        elif isinstance(ids, str):
+            ids = [id.strip() for id in ids.split(",") if id.strip()]
+
+        export = base.get_client().k8s_cluster.export_kubeconfig(
+            path, ids=ids, where=where, max_workers=max_workers, force=force
+        )
+        for (id, reason) in export.failed.items():
+            print("{} not exported: {}".format(id, reason), file=sys.stderr)
+        print(
+            "{} {} contexts ({} changed, {} unchanged)".format(
+                "Wrote" if export.written else "Unchanged",
+                len(export.contexts),
+                len(export.changed),
+                len(export.unchanged),
+            )
+        )
+
     def dashboard_url(
         self,
         id,
@@ -363,6 +408,64 @@ class K8sClusterProxy(base.BaseProxy):
             id, k8s_upgrade_version, worker_upgrade_percent
         )
 
+    @base.intercept_exception
+    def upgrade_fleet(
+        self,
+        ids,
+        k8s_upgrade_version,
+        window=4,
+        canaries=1,
+        max_failures=0,
+        worker_upgrade_percent=20,
+        canary_worker_upgrade_percent=None,
+        timeout_secs=3600,
+    ):
+        """Upgrade many clusters, canaries first, within a window.
+
+        The report of the upgrade is printed when all the clusters are
+        upgraded or the upgrade halted.
+
+        :param ids: the cluster IDs in upgrade order, e.g.
+            "/api/v2/k8scluster/1,/api/v2/k8scluster/2"
+        :param k8s_upgrade_version: the Kubernetes version to upgrade to
+        :param window: the maximum number of clusters upgrading at once
+        :param canaries: the number of clusters upgraded before the others
+        :param max_failures: halt when more clusters have failed
+        :param worker_upgrade_percent: the percentage of the workers of a
+            cluster upgraded at once
+        :param canary_worker_upgrade_percent: the worker_upgrade_percent
+            of the canaries
+        :param timeout_secs: how long each cluster is waited for
+
+        Example::
+
+        hpecp k8scluster upgrade_fleet
+            --ids /api/v2/k8scluster/1,/api/v2/k8scluster/2
+            --k8s-upgrade-version 1.18.6 --window 2 --max-failures 1
+        """
+        if isinstance(ids, tuple):
+            ids = list(ids)
+        elif isinstance(ids, str):
+            ids = [id.strip() for id in ids.split(",") if id.strip()]
+
+        def progress(upgrade):
+            print("{}: {}".format(upgrade.id, upgrade.state), file=sys.stderr)
+
+        result = base.get_client().k8s_cluster.upgrade_fleet(
+            ids,
+            k8s_upgrade_version,
+            progress=progress,
+            window=window,
+            canaries=canaries,
+            max_failures=max_failures,
+            worker_upgrade_percent=worker_upgrade_percent,
+            canary_worker_upgrade_percent=canary_worker_upgrade_percent,
+            timeout_secs=timeout_secs,
+        )
+        print("\n".join(result.report()))
+        if not result:
+            sys.exit(1)
+
     @base.intercept_exception
     def import_generic_cluster(
         self, name, description, pod_dns_domain, server_url, ca, bearer_token
@@ -35,6 +35,8 @@ class K8sWorkerProxy(base.BaseProxy):
         return [
             "create_with_ssh_key",
             "delete",
+            "delete_many",
+            "diff",
             "get",
             "list",
             "set_storage",
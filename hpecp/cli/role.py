@@ -32,7 +32,7 @@ class RoleProxy(base.BaseProxy):
 
     def __dir__(self):
         """Return the CLI method names."""
-        return ["delete", "examples", "get", "list"]
+        return ["delete", "diff", "examples", "get", "list"]
 
     def __init__(self):
         """Create instance of proxy class with the client module name."""
@@ -0,0 +1,96 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""HPE Container Platform CLI."""
+
+from __future__ import print_function
+
+import os
+import time
+
+from hpecp.cli import base
+from hpecp.snapshot import Snapshot, export_snapshot
+
+
+class SnapshotProxy(object):
+    """Proxy object to :py:mod:`<hpecp.snapshot>`."""
+
+    def __dir__(self):
+        """Return the CLI method names."""
+        return [
+            "export",
+            "info",
+        ]
+
+    @base.intercept_exception
+    def export(
+        self,
+        path,
+        format="jsonl",
+        collections=None,
+        compress=None,
+        max_workers=4,
+    ):
+        """Export the platform inventory to a snapshot file.
+
+        :param path: the snapshot file path
+        :param format: 'jsonl', 'binary' or 'indexed' (memory-mapped when
+            read, for large inventories)
+        :param collections: comma separated collections, e.g.
+            'k8s_cluster,k8s_worker' (default: all)
+        :param compress: gzip the file (disable with --nocompress),
+            'indexed' snapshots are never compressed
+        :param max_workers: maximum number of concurrent list requests
+        """
+        if isinstance(collections, tuple):
+            collections = list(collections)
+        elif isinstance(collections, str):
+            collections = collections.split(",")
+
+        counts = export_snapshot(
+            base.get_client(),
+            os.path.expanduser(path),
+            collections=collections,
+            format=format,
+            compress=compress,
+            max_workers=max_workers,
+        )
+        for (collection, count) in counts.items():
+            print("{:<12} {}".format(collection, count))
+
+    @base.intercept_exception
+    def info(self, path):
+        """Print the version, age and collection sizes of a snapshot.
+
+        :param path: the snapshot file path
+        """
+        with Snapshot(os.path.expanduser(path)) as snapshot:
+            print("version:     {}".format(snapshot.version))
+            print("format:      {}".format(snapshot.format))
+            print(
+                "created:     {} ({}s ago)".format(
+                    time.strftime(
+                        "%Y-%m-%d %H:%M:%S", time.localtime(snapshot.created)
+                    ),
+                    int(snapshot.age()),
+                )
+            )
+            for (collection, count) in snapshot.counts.items():
+                print("{:<12} {}".format(collection, count))
@@ -37,6 +37,8 @@ class TenantProxy(base.BaseProxy):
             "assign_user_to_role",
             "create",
             "delete",
+            "delete_many",
+            "diff",
             "delete_external_user_group",
             "examples",
             "get",
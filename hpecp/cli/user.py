@@ -32,7 +32,7 @@ class UserProxy(base.BaseProxy):
 
     def __dir__(self):
         """Return the CLI method names."""
-        return ["create", "get", "delete", "examples", "list"]
+        return ["create", "get", "delete", "diff", "examples", "list"]
 
     def __init__(self):
         """Create instance of proxy class with the client module name."""
@@ -95,3 +95,237 @@ class TextOutput(object):
         result = io.getvalue()
         io.close()
         return str(result)
+
+
+class TableOutput(object):
+    """Write rows as a table to a stream, one line at a time.
+
+    Column widths are computed in a single pass over the rows. If
+    ``sample_size`` is provided, only the first ``sample_size`` rows are
+    buffered to compute the widths and the remaining rows are streamed
+    through without being held in memory. Cells in the streamed rows
+    that are wider than the sampled width are written in full, so the
+    table may lose alignment but never loses data.
+
+    The output of the "pretty" and "plain" styles matches the output of
+    the same styles in https://pypi.org/project/tabulate/ with its default
+    number formats: in "plain" tables, the columns of numbers that are
+    not all integers are formatted with "%g" and aligned on the decimal
+    point.
+    """
+
+    STYLES = ["pretty", "plain"]
+
+    def __init__(
+        self, headers, style="pretty", display_headers=True, sample_size=None
+    ):
+        """Create a TableOutput instance.
+
+        Parameters
+        ----------
+        headers : list
+            The column names
+        style : str, optional
+            Table style, "pretty" or "plain", by default "pretty"
+        display_headers : bool, optional
+            Write the header row, by default True
+        sample_size : int, optional
+            The number of rows used to compute the column widths, by
+            default None (all rows are used)
+        """
+        assert style in TableOutput.STYLES, "'style' must be one of {}".format(
+            TableOutput.STYLES
+        )
+        assert sample_size is None or (
+            isinstance(sample_size, int) and sample_size > 0
+        ), "'sample_size' if provided must be an int > 0"
+
+        self.headers = [TableOutput._to_text(h) for h in headers]
+        self.style = style
+        self.display_headers = display_headers
+        self.sample_size = sample_size
+
+    @staticmethod
+    def _to_text(value):
+        if value is None:
+            return ""
+        if isinstance(value, string_types):
+            return value
+        return six.text_type(value)
+
+    @staticmethod
+    def _is_number(value):
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, six.integer_types + (float,)):
+            return True
+        if isinstance(value, string_types):
+            try:
+                float(value)
+                return True
+            except ValueError:
+                return False
+        return False
+
+    @staticmethod
+    def _is_int(value):
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, six.integer_types):
+            return True
+        if isinstance(value, string_types):
+            try:
+                int(value)
+                return True
+            except ValueError:
+                return False
+        return False
+
+    @staticmethod
+    def _decimals(text):
+        """Return the number of characters after the point, -1 if none."""
+        position = text.rfind(".")
+        if position < 0:
+            position = text.lower().rfind("e")
+        if position < 0:
+            return -1
+        return len(text) - position - 1
+
+    @staticmethod
+    def _cells(row, floats):
+        """Return the text of the cells of a row, "%g" for the floats."""
+        cells = []
+        for (value, is_float) in zip(row, floats):
+            text = TableOutput._to_text(value)
+            if is_float and text != "" and TableOutput._is_number(value):
+                text = format(float(value), "g")
+            cells.append(text)
+        return cells
+
+    @staticmethod
+    def _pad(cells, decimals):
+        """Pad the float cells so that their points line up."""
+        return [
+            cell
+            if d is None
+            else cell + " " * max(d - TableOutput._decimals(cell), 0)
+            for (cell, d) in zip(cells, decimals)
+        ]
+
+    def _align(self, text, width, numeric):
+        if self.style == "pretty":
+            return format(text, "^{}".format(width))
+        if numeric:
+            return text.rjust(width)
+        return text.ljust(width)
+
+    def _lines(self, cells, widths, numeric):
+        """Return the physical lines for one row of (multiline) cells."""
+        split = [c.split("\n") for c in cells]
+        height = max([len(s) for s in split] or [1])
+        lines = []
+        for i in range(height):
+            parts = [
+                self._align(
+                    s[i] if i < len(s) else "",
+                    max(widths[j], len(s[i]) if i < len(s) else 0),
+                    numeric[j],
+                )
+                for j, s in enumerate(split)
+            ]
+            if self.style == "pretty":
+                lines.append("| " + " | ".join(parts) + " |")
+            else:
+                lines.append("  ".join(parts).rstrip())
+        return lines
+
+    def _write(self, stream, line):
+        if six.PY2:
+            stream.write(line.encode(encoding="UTF-8", errors="strict"))
+            stream.write("\n")
+        else:
+            stream.write(line + "\n")
+
+    def write(self, rows, stream):
+        """Write the rows to the stream.
+
+        Parameters
+        ----------
+        rows : iterable
+            An iterable of rows, where each row is a list of cell values.
+            The rows are consumed lazily.
+        stream : file
+            A file like object with a write() method, e.g. sys.stdout
+        """
+        rows = iter(rows)
+        columns = len(self.headers)
+
+        buffered = []
+        numeric = [True] * columns
+        floats = [False] * columns
+        seen_value = [False] * columns
+
+        for row in rows:
+            row = list(row)
+            for i, cell in enumerate(row):
+                if TableOutput._to_text(cell) == "":
+                    continue
+                seen_value[i] = True
+                if numeric[i] and not TableOutput._is_number(cell):
+                    numeric[i] = False
+                if not TableOutput._is_int(cell):
+                    floats[i] = True
+            buffered.append(row)
+            if self.sample_size and len(buffered) >= self.sample_size:
+                break
+
+        if self.style == "pretty":
+            # pretty centres every column and does not parse numbers
+            numeric = [False] * columns
+        else:
+            numeric = [n and s for n, s in zip(numeric, seen_value)]
+        floats = [f and n for f, n in zip(floats, numeric)]
+
+        buffered = [TableOutput._cells(row, floats) for row in buffered]
+        # the most characters after the point in each float column
+        decimals = [
+            max([TableOutput._decimals(cells[i]) for cells in buffered])
+            if floats[i]
+            else None
+            for i in range(columns)
+        ]
+        buffered = [TableOutput._pad(cells, decimals) for cells in buffered]
+
+        widths = [0] * columns
+        if self.display_headers:
+            # plain has a minimum padding of 2 around the header text
+            padding = 2 if self.style == "plain" else 0
+            widths = [len(h) + padding for h in self.headers]
+        for cells in buffered:
+            for i, cell in enumerate(cells):
+                for line in cell.split("\n"):
+                    if len(line) > widths[i]:
+                        widths[i] = len(line)
+
+        if self.style == "pretty":
+            border = "+" + "+".join(["-" * (w + 2) for w in widths]) + "+"
+            self._write(stream, border)
+
+        if self.display_headers:
+            for line in self._lines(self.headers, widths, numeric):
+                self._write(stream, line)
+            if self.style == "pretty":
+                self._write(stream, border)
+
+        for cells in buffered:
+            for line in self._lines(cells, widths, numeric):
+                self._write(stream, line)
+        del buffered
+
+        for row in rows:
+            cells = TableOutput._pad(TableOutput._cells(row, floats), decimals)
+            for line in self._lines(cells, widths, numeric):
+                self._write(stream, line)
+
+        if self.style == "pretty":
+            self._write(stream, border)
@@ -41,6 +41,7 @@ from urllib3.exceptions import (
 
 from hpecp.exceptions import APIForbiddenException
 
+from .cache import ResourceCache
 from .catalog import CatalogController
 from .config import ConfigController
 from .datatap import DatatapController
@@ -54,11 +55,14 @@ from .exceptions import (
 )
 from .gateway import GatewayController
 from .install import InstallController
+from .inventory_db import InventoryDatabase
 from .k8s_cluster import K8sClusterController
+from .k8s_manifest import K8sManifestCache
 from .k8s_worker import K8sWorkerController
 from .license import LicenseController
 from .lock import LockController
 from .logger import Logger
+from .operation import OperationPoller
 from .role import RoleController
 from .tenant import TenantController
 from .user import UserController
@@ -444,6 +448,18 @@ class ContainerPlatformClient(object):
             scheme, self.api_host, self.api_port
         )
 
+        # See enable_cache()
+        self.cache = None
+
+        # See enable_inventory_db()
+        self.inventory_db = None
+
+        # See enable_k8s_manifest_cache()
+        self.k8s_manifest_cache = None
+
+        # Services the operation handles of all controllers with one thread
+        self.operation_poller = OperationPoller()
+
         # Register endpoint modules - see @property definitions at end of file
         # for each module
         self._tenant = TenantController(self)
@@ -552,6 +568,159 @@ class ContainerPlatformClient(object):
 
         return self
 
+    def enable_cache(
+        self,
+        ttl=30,
+        ttls=None,
+        max_entries=1000,
+        stale_ttl=0,
+        not_found_ttl=0,
+    ):
+        """Cache the results of controller `get()` and `list()` calls.
+
+        Subsequent calls for the same resource within the TTL are served
+        from the cache.  Any post, put or delete request made through this
+        client invalidates the cached entries of the resource it modifies.
+        Pass `bypass_cache=True` to `get()` or `list()` to always call the
+        API.
+
+        With a `stale_ttl` (stale-while-revalidate), a call made up to
+        `stale_ttl` seconds after an entry expired returns the expired
+        entry immediately, and a background thread refreshes it.  With a
+        `not_found_ttl`, a `get()` of a resource that does not exist raises
+        APIItemNotFoundException without calling the API again until the
+        404 response expires.
+
+        Parameters
+        ----------
+        ttl : int, optional
+            Seconds a cached response is valid for, by default 30
+        ttls : dict, optional
+            TTL overrides by resource base path, e.g.
+            {"/api/v2/k8scluster": 300, "/api/v1/user": 3600}
+        max_entries : int, optional
+            The maximum number of cached responses, by default 1000
+        stale_ttl : int, optional
+            Seconds an expired response can be returned while it is
+            refreshed in the background, by default 0 (never)
+        not_found_ttl : int, optional
+            Seconds a 404 response is cached for, by default 0 (never)
+
+        Returns
+        -------
+        ResourceCache
+            The cache instance, also available as `client.cache`
+
+        Example
+        -------
+        >>> client = ContainerPlatformClient(...).create_session()
+        >>> client.enable_cache(ttl=60)
+        >>> client.k8s_cluster.get("/api/v2/k8scluster/1")  # API call
+        >>> client.k8s_cluster.get("/api/v2/k8scluster/1")  # cached
+        >>> # dashboards: never block on the API once the list is cached
+        >>> client.enable_cache(ttl=10, stale_ttl=600, not_found_ttl=30)
+        """
+        self.cache = ResourceCache(
+            ttl=ttl,
+            ttls=ttls,
+            max_entries=max_entries,
+            stale_ttl=stale_ttl,
+            not_found_ttl=not_found_ttl,
+        )
+        return self.cache
+
+    def disable_cache(self):
+        """Disable and discard the cache, see :py:meth:`enable_cache`."""
+        self.cache = None
+
+    def enable_inventory_db(self, path):
+        """Store the result of every `list()` call in a SQLite database.
+
+        Each unfiltered `list()` call replaces the table of its collection,
+        which can then be queried offline, see
+        :py:class:`.inventory_db.InventoryDatabase`.
+
+        Parameters
+        ----------
+        path : str
+            The SQLite database file, ':memory:' for a database that is
+            not persisted
+
+        Returns
+        -------
+        InventoryDatabase
+            The database, also available as `client.inventory_db`
+
+        Example
+        -------
+        >>> db = client.enable_inventory_db("~/.hpecp_inventory.db")
+        >>> client.k8s_worker.list()
+        >>> db.query("SELECT hostname FROM k8s_worker WHERE status = ?",
+        ...          ("ready",))
+        """
+        self.disable_inventory_db()
+        self.inventory_db = InventoryDatabase(path)
+        return self.inventory_db
+
+    def enable_k8s_manifest_cache(
+        self, path=None, max_age=3600, platform_version=None
+    ):
+        """Cache the k8smanifest.
+
+        By default every k8smanifest read calls the API.  Once the cache
+        is enabled, the k8s cluster controller reads the k8smanifest
+        through it and also validates the addons of `create()` and
+        `add_addons()` against the cached manifest.  The manifest is held
+        in memory for `max_age` seconds.  With a `path`, the manifest is
+        also kept in a json file shared by the processes using the
+        platform.  With a `platform_version`, the manifest is kept until
+        the version changes; provide it, or keep `max_age` short, so that
+        a platform upgrade is not validated against an outdated manifest.
+
+        Parameters
+        ----------
+        path : str, optional
+            A json file to persist the manifest in, by default None
+        max_age : int, optional
+            Seconds the manifest is kept for if `platform_version` is not
+            provided, by default 3600
+        platform_version : str, optional
+            The platform version, by default None (unknown)
+
+        Returns
+        -------
+        K8sManifestCache
+            The cache, also available as `client.k8s_manifest_cache`
+
+        Example
+        -------
+        >>> client.enable_k8s_manifest_cache(
+        ...     "~/.hpecp_k8smanifest.json", platform_version="5.1"
+        ... )
+        >>> client.k8s_cluster.k8s_supported_versions()  # API call
+        >>> client.k8s_cluster.get_available_addons(k8s_version="1.18.6")
+        """
+        self.k8s_manifest_cache = K8sManifestCache(
+            path=path, max_age=max_age, platform_version=platform_version
+        )
+        return self.k8s_manifest_cache
+
+    def disable_k8s_manifest_cache(self):
+        """Disable and discard the k8smanifest cache.
+
+        See :py:meth:`enable_k8s_manifest_cache`.
+        """
+        self.k8s_manifest_cache = None
+
+    def disable_inventory_db(self):
+        """Stop storing `list()` results.
+
+        See :py:meth:`enable_inventory_db`.
+        """
+        if self.inventory_db is not None:
+            self.inventory_db.close()
+        self.inventory_db = None
+
     def _request_headers(self):
 
         headers = {
@@ -610,7 +779,8 @@ class ContainerPlatformClient(object):
         all_headers.update(headers)
         all_headers.update(additional_headers)
 
-        url = url = self.base_url + url
+        path = url
+        url = self.base_url + url
 
         if self.warn_ssl is False:
             import urllib3
@@ -716,6 +886,9 @@ class ContainerPlatformClient(object):
                     request_data=json.dumps(data),
                 )
 
+        if self.cache is not None and http_method != "get":
+            self.cache.invalidate(path)
+
         try:
             self.log.debug(
                 "RES: {} : {} {} : {} {}".format(
@@ -50,6 +50,13 @@ class Datatap(AbstractResource):
     # TODO: Pick a smaller subset, again based on the API response
     default_display_fields = all_fields
 
+    field_json_keys = {
+        "name": ["_embedded"],
+        "description": ["_embedded"],
+        "type": ["_embedded"],
+        "status": ["_embedded"],
+    }
+
     @property
     def name(self):
         """@Field: from json['_embedded']['label']['name']."""
@@ -0,0 +1,236 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Compare two snapshots of a resource list."""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+from collections import OrderedDict
+
+
+def field_values(resource, fields):
+    """Return the values of fields for a resource.
+
+    Fields that are missing from the resource json have the value None.
+    """
+    values = []
+    for field in fields:
+        try:
+            values.append(getattr(resource, field))
+        except (AttributeError, KeyError):
+            values.append(None)
+    return values
+
+
+def fingerprint(values):
+    """Return a digest of field values that is stable between processes."""
+    canonical = json.dumps(
+        values, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ResourceChange(object):
+    """A resource that is present in both snapshots with different fields.
+
+    Attributes
+    ----------
+    id : str
+        The resource ID
+    fields : dict
+        (old value, new value) keyed by field name, only for the fields
+        that changed
+    old : AbstractResource
+        The resource in the old snapshot
+    new : AbstractResource
+        The resource in the new snapshot
+    """
+
+    def __init__(self, id, fields, old, new):
+        self.id = id
+        self.fields = fields
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        """Return a representation of the ResourceChange."""
+        return "<ResourceChange id:{} fields:{}>".format(
+            self.id, sorted(self.fields.keys())
+        )
+
+
+class ResourceListDiff(object):
+    """The result of :py:func:`diff_resource_lists`.
+
+    Attributes
+    ----------
+    added : list
+        Resources only in the new snapshot
+    removed : list
+        Resources only in the old snapshot
+    changed : list[ResourceChange]
+        Resources in both snapshots with different field values
+    """
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        """Return True if the snapshots differ."""
+        return bool(self.added or self.removed or self.changed)
+
+    __nonzero__ = __bool__
+
+    def to_dict(self):
+        """Return the diff as a dict that can be serialised as json.
+
+        Returns
+        -------
+        dict
+            With the keys 'added' and 'removed' (lists of resource json)
+            and 'changed' (a list of {'id', 'fields': {field: {'old',
+            'new'}}})
+        """
+        return {
+            "added": [r.json for r in self.added],
+            "removed": [r.json for r in self.removed],
+            "changed": [
+                {
+                    "id": c.id,
+                    "fields": dict(
+                        (f, {"old": old, "new": new})
+                        for (f, (old, new)) in c.fields.items()
+                    ),
+                }
+                for c in self.changed
+            ],
+        }
+
+    def __repr__(self):
+        """Return a representation of the ResourceListDiff."""
+        return "<ResourceListDiff added:{} removed:{} changed:{}>".format(
+            len(self.added), len(self.removed), len(self.changed)
+        )
+
+
+def diff_resource_lists(old, new, fields=None):
+    """Compare two ResourceList snapshots of the same resource type.
+
+    Resources are matched by `id`.  Each resource's compared fields are
+    reduced to a digest, so unchanged resources are skipped after one
+    comparison and the diff runs in time linear to the snapshot sizes.
+    Field level changes are only computed for resources whose digests
+    differ.
+
+    Parameters
+    ----------
+    old : ResourceList
+        The earlier snapshot
+    new : ResourceList
+        The later snapshot
+    fields : list, optional
+        The fields to compare, by default the resource class
+        `all_fields` without '_links'
+
+    Returns
+    -------
+    ResourceListDiff
+        The added, removed and changed resources, in snapshot order
+    """
+    assert (
+        old.resource_class is new.resource_class
+    ), "'old' and 'new' must be lists of the same resource class"
+
+    fields = compared_fields(new.resource_class, fields)
+    previous = (
+        (r.id, field_values(r, fields), lambda r=r: r) for r in old.resources
+    )
+    return diff_values(previous, new, fields)
+
+
+def compared_fields(resource_class, fields=None):
+    """Validate the fields to compare, by default all but '_links'."""
+    if fields is None:
+        return [f for f in resource_class.all_fields if f != "_links"]
+    for field in fields:
+        assert (
+            field in resource_class.all_fields
+        ), "item '{}' is not a field in {}.all_fields".format(
+            field, resource_class.__name__
+        )
+    return fields
+
+
+def diff_values(previous, new, fields):
+    """Compare earlier field values with a ResourceList.
+
+    This is :py:func:`diff_resource_lists` for an earlier snapshot that is
+    not held as resources, e.g. the field columns of a
+    :py:class:`.snapshot.Snapshot`: an earlier resource is only loaded if
+    it was removed or changed.
+
+    Parameters
+    ----------
+    previous : iterable
+        (id, field values, load) for each earlier resource, where load is
+        a callable returning the resource
+    new : ResourceList
+        The later snapshot
+    fields : list
+        The compared fields, in the order of the values
+
+    Returns
+    -------
+    ResourceListDiff
+        The added, removed and changed resources, in snapshot order
+    """
+    previous = OrderedDict(
+        (id, (values, fingerprint(values), load))
+        for (id, values, load) in previous
+    )
+
+    added = []
+    changed = []
+    seen = set()
+    for resource in new.resources:
+        seen.add(resource.id)
+        if resource.id not in previous:
+            added.append(resource)
+            continue
+        (old_values, old_digest, load) = previous[resource.id]
+        values = field_values(resource, fields)
+        if fingerprint(values) == old_digest:
+            continue
+        changes = dict(
+            (field, (a, b))
+            for (field, a, b) in zip(fields, old_values, values)
+            if a != b
+        )
+        changed.append(ResourceChange(resource.id, changes, load(), resource))
+
+    removed = [
+        load() for (id, (_, _, load)) in previous.items() if id not in seen
+    ]
+
+    return ResourceListDiff(added, removed, changed)
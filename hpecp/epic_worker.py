@@ -26,11 +26,7 @@ from requests.structures import CaseInsensitiveDict
 
 from hpecp.exceptions import APIItemNotFoundException
 
-from .base_resource import (
-    AbstractResource,
-    AbstractWaitableResourceController,
-    ResourceList,
-)
+from .base_resource import AbstractResource, AbstractWaitableResourceController
 
 try:
     basestring
@@ -70,6 +66,15 @@ class WorkerEpic(AbstractResource):
 
     default_display_fields = ["id", "state", "ip", "purpose"]
 
+    field_json_keys = {
+        "href": ["_links"],
+    }
+
+    # EpicWorkerController filters the workers by purpose
+    required_json_keys = ["_links", "purpose"]
+
+    indexed_fields = ["id", "state", "ip"]
+
     @property
     def worker_id(self):
         return int(self.json["_links"]["self"]["href"].split("/")[-1])
@@ -157,13 +162,18 @@ class EpicWorkerController(AbstractWaitableResourceController):
         )
         return CaseInsensitiveDict(response.headers)["location"]
 
-    def get(self, id, params={}):
+    def get(self, id, params={}, fields=None, bypass_cache=False):
         """Retrieve an EPIC Worker by ID.
 
         Parameters
         ----------
         id: str
             The worker ID - format: '/api/v1/workers/[0-9]+'
+        fields: list
+            Only retain the json for these fields, see
+            :py:meth:`.base_resource.AbstractResourceController.list`
+        bypass_cache: bool
+            Always call the API, even if the client cache is enabled
 
         Returns
         -------
@@ -174,7 +184,9 @@ class EpicWorkerController(AbstractWaitableResourceController):
         ------
         APIException
         """
-        worker = super(EpicWorkerController, self).get(id, params)
+        worker = super(EpicWorkerController, self).get(
+            id, params, fields, bypass_cache
+        )
         if worker.purpose != "worker":
             raise APIItemNotFoundException(
                 message="worker not found with id: " + id,
@@ -183,20 +195,12 @@ class EpicWorkerController(AbstractWaitableResourceController):
             )
         return worker
 
-    def list(self):
-        """Make an API call to retrieve a list of Resources.
+    def _select_listed(self, resources):
+        """Return the hosts of the list response with purpose 'worker'.
 
-        Returns
-        -------
-        ResourceList
-            The ResourceList will contain instances of the class defined by
-            the property self.resource_class
+        Epic workers and gateways share the '/api/v1/workers' collection.
         """
-        resourceList = super(EpicWorkerController, self).list()
-        workers = [
-            wkr for wkr in resourceList.json if wkr["purpose"] == "worker"
-        ]
-        return ResourceList(self.resource_class, workers)
+        return [wkr for wkr in resources if wkr["purpose"] == "worker"]
 
     def set_storage(self, worker_id, ephemeral_disks=[], persistent_disks=[]):
         """Set storage for a Epic worker.
@@ -79,3 +79,11 @@ class APIItemConflictException(APIException):
         super(APIItemConflictException, self).__init__(
             message, request_method, request_url, request_data, *args
         )
+
+
+class OperationTimeoutException(ContainerPlatformClientException):
+    pass
+
+
+class OperationCancelledException(ContainerPlatformClientException):
+    pass
@@ -0,0 +1,431 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+r"""Rolling Kubernetes upgrades of many clusters.
+
+:py:meth:`.k8s_cluster.K8sClusterController.upgrade_cluster` submits the
+upgrade of one cluster and returns.  A :py:class:`FleetUpgrade` upgrades
+many clusters: the canary clusters are upgraded first, then at most
+`window` clusters are upgrading at any time.  The upgrading clusters are
+tracked by listing the cluster collection once per poll.  A poll whose
+list fails is counted and retried, only the `timeout_secs` of the
+upgrading clusters decide their outcome.  No more upgrades are
+submitted when a canary fails or when more than `max_failures` clusters
+failed; the clusters already upgrading are still waited for.
+
+Example
+-------
+>>> result = FleetUpgrade(
+...     client.k8s_cluster, "1.18.6", window=5, canaries=2, max_failures=1
+... ).run(ids)
+>>> print("\n".join(result.report()))
+"""
+
+from __future__ import absolute_import
+
+import time
+from collections import OrderedDict
+
+from .k8s_cluster import K8sClusterStatus
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+PENDING = "pending"
+"""The upgrade has not been submitted."""
+UPGRADING = "upgrading"
+"""The upgrade was submitted, the cluster is not ready at the version."""
+DONE = "done"
+"""The cluster is ready at the requested version."""
+CURRENT = "current"
+"""The cluster was already ready at the requested version."""
+FAILED = "failed"
+"""The submission failed, the cluster reached an error status,
+disappeared or timed out."""
+SKIPPED = "skipped"
+"""Not submitted because the upgrade was halted."""
+
+
+class ClusterUpgrade(object):
+    """The progress of the upgrade of one cluster.
+
+    `submitted` and `finished` are seconds since the start of the run.
+    """
+
+    def __init__(self, id, canary):
+        """Create a pending ClusterUpgrade."""
+        self.id = id
+        self.canary = canary
+        self.state = PENDING
+        self.submitted = None
+        self.finished = None
+        self.error = None
+
+    @property
+    def elapsed(self):
+        """The seconds from the submit to the end of the upgrade."""
+        if self.submitted is None or self.finished is None:
+            return 0.0
+        return self.finished - self.submitted
+
+    def __repr__(self):
+        """Return a representation of the ClusterUpgrade."""
+        return "<ClusterUpgrade {} {}{}>".format(
+            self.id, self.state, " canary" if self.canary else ""
+        )
+
+
+class FleetUpgradeResult(object):
+    """The outcome and timings of a :py:meth:`FleetUpgrade.run`.
+
+    Attributes
+    ----------
+    upgrades : OrderedDict
+        The :py:class:`ClusterUpgrade` of each cluster, in run order
+    halted : str
+        Why no more upgrades were submitted, None if not halted
+    elapsed : float
+        The duration of the run in seconds
+    polls : int
+        The number of collection polls
+    peak : int
+        The largest number of clusters upgrading at once
+    list_errors : int
+        The number of polls whose collection list failed
+    """
+
+    def __init__(self, upgrades, halted, elapsed, polls, peak, list_errors=0):
+        """Create a FleetUpgradeResult, see the class attributes."""
+        self.upgrades = upgrades
+        self.halted = halted
+        self.elapsed = elapsed
+        self.polls = polls
+        self.peak = peak
+        self.list_errors = list_errors
+
+    def ids(self, state):
+        """Return the IDs of the clusters in a state."""
+        return [u.id for u in self.upgrades.values() if u.state == state]
+
+    def report(self):
+        """Return the timings of the upgrades and a summary as lines."""
+        width = max([len(id) for id in self.upgrades] + [7])
+        lines = [
+            "{:<{w}}  {:>8}  {:>8}  {}".format(
+                "cluster", "start", "elapsed", "state", w=width
+            )
+        ]
+        for u in sorted(
+            self.upgrades.values(),
+            key=lambda u: (u.submitted is None, u.submitted),
+        ):
+            lines.append(
+                "{:<{w}}  {:>8}  {:>8.1f}  {}{}{}".format(
+                    u.id,
+                    "-" if u.submitted is None else "%.1f" % u.submitted,
+                    u.elapsed,
+                    u.state,
+                    " (canary)" if u.canary else "",
+                    "" if u.error is None else ": " + u.error,
+                    w=width,
+                )
+            )
+        upgraded = [u.elapsed for u in self.upgrades.values() if u.finished]
+        counts = OrderedDict(
+            (state, len(self.ids(state)))
+            for state in [DONE, CURRENT, FAILED, SKIPPED]
+        )
+        lines.append(
+            "{} in {:.1f}s, {} polls{}, peak {} upgrading, "
+            "slowest {:.1f}s{}".format(
+                ", ".join("{} {}".format(n, s) for (s, n) in counts.items()),
+                self.elapsed,
+                self.polls,
+                ""
+                if not self.list_errors
+                else " ({} failed)".format(self.list_errors),
+                self.peak,
+                max(upgraded + [0.0]),
+                "" if self.halted is None else ", halted: " + self.halted,
+            )
+        )
+        return lines
+
+    def __bool__(self):
+        """Return True if every cluster is at the requested version."""
+        return all(u.state in (DONE, CURRENT) for u in self.upgrades.values())
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        """Return a representation of the FleetUpgradeResult."""
+        return "<FleetUpgradeResult {}{}{:.1f}s>".format(
+            "".join(
+                "{}:{} ".format(state, len(self.ids(state)))
+                for state in [DONE, FAILED, SKIPPED]
+            ),
+            ""
+            if not self.list_errors
+            else "list_errors:{} ".format(self.list_errors),
+            self.elapsed,
+        )
+
+
+class FleetUpgrade(object):
+    """Upgrade many clusters, canaries first, within a window."""
+
+    def __init__(
+        self,
+        controller,
+        k8s_upgrade_version,
+        window=4,
+        canaries=1,
+        max_failures=0,
+        worker_upgrade_percent=20,
+        canary_worker_upgrade_percent=None,
+        timeout_secs=3600,
+        poll_schedule=None,
+    ):
+        """Create a FleetUpgrade.
+
+        Parameters
+        ----------
+        controller : K8sClusterController
+            e.g. `client.k8s_cluster`
+        k8s_upgrade_version : str
+            The Kubernetes version to upgrade to
+        window : int, optional
+            The maximum number of clusters upgrading at once, by default 4
+        canaries : int, optional
+            The number of clusters, first in the run order, upgraded and
+            waited for before the others, by default 1
+        max_failures : int, optional
+            Halt when more clusters have failed, by default 0
+        worker_upgrade_percent : int, optional
+            The percentage of the workers of a cluster upgraded at once,
+            by default 20
+        canary_worker_upgrade_percent : int, optional
+            The worker_upgrade_percent of the canaries, by default
+            `worker_upgrade_percent`
+        timeout_secs : int, optional
+            How long each cluster is waited for after its submission, by
+            default 3600.  Before any cluster is upgrading, the run halts
+            when the collection could not be listed for this long.
+        poll_schedule : PollSchedule, optional
+            The delays between the collection polls, by default the
+            controller's schedule for 'upgrading' to 'ready'
+        """
+        assert (
+            isinstance(window, int) and window > 0
+        ), "'window' must be an int > 0"
+        assert (
+            isinstance(canaries, int) and canaries >= 0
+        ), "'canaries' must be an int >= 0"
+        assert (
+            isinstance(max_failures, int) and max_failures >= 0
+        ), "'max_failures' must be an int >= 0"
+        for (name, percent) in [
+            ("worker_upgrade_percent", worker_upgrade_percent),
+            ("canary_worker_upgrade_percent", canary_worker_upgrade_percent),
+        ]:
+            assert percent is None or (
+                isinstance(percent, int) and 0 < percent <= 100
+            ), "'{}' must be an int between 1 and 100".format(name)
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        if canary_worker_upgrade_percent is None:
+            canary_worker_upgrade_percent = worker_upgrade_percent
+        if poll_schedule is None:
+            poll_schedule = controller.get_poll_schedule(
+                "upgrading", [K8sClusterStatus.ready]
+            )
+        self.controller = controller
+        self.k8s_upgrade_version = k8s_upgrade_version
+        self.window = window
+        self.canaries = canaries
+        self.max_failures = max_failures
+        self.worker_upgrade_percent = worker_upgrade_percent
+        self.canary_worker_upgrade_percent = canary_worker_upgrade_percent
+        self.timeout_secs = timeout_secs
+        self.poll_schedule = poll_schedule
+
+    def run(self, ids, progress=None):
+        """Upgrade the clusters.
+
+        Parameters
+        ----------
+        ids : list[str]
+            The cluster IDs, in upgrade order - format:
+            '/api/v2/k8scluster/[0-9]+'
+        progress : callable, optional
+            Called with the :py:class:`ClusterUpgrade` of each cluster that
+            changed state
+
+        Returns
+        -------
+        FleetUpgradeResult
+        """
+        assert isinstance(ids, list), "'ids' must be a list"
+        assert len(set(ids)) == len(ids), "'ids' must be unique"
+
+        started = time.time()
+        upgrades = OrderedDict(
+            (id, ClusterUpgrade(id, i < self.canaries))
+            for (i, id) in enumerate(ids)
+        )
+        queue = list(upgrades.values())
+        upgrading = []
+        state = {
+            "halted": None,
+            "polls": 0,
+            "peak": 0,
+            "list_errors": 0,
+            "listed": 0.0,
+        }
+        error_status = [K8sClusterStatus.error.name]
+
+        def now():
+            return time.time() - started
+
+        def change(upgrade, new_state, error=None):
+            upgrade.state = new_state
+            upgrade.error = error
+            _log.debug("FleetUpgrade: {}".format(upgrade))
+            if progress is not None:
+                progress(upgrade)
+
+        def finish(upgrade, new_state, error=None):
+            upgrade.finished = now()
+            if upgrade in upgrading:
+                upgrading.remove(upgrade)
+            change(upgrade, new_state, error)
+
+        def check_halt():
+            failed = [u for u in upgrades.values() if u.state == FAILED]
+            if state["halted"] is not None:
+                return
+            if any(u.canary for u in failed):
+                state["halted"] = "canary {} failed".format(
+                    next(u.id for u in failed if u.canary)
+                )
+            elif len(failed) > self.max_failures:
+                state["halted"] = "{} failures".format(len(failed))
+
+        def submit(upgrade, current):
+            status, version = current.get(upgrade.id, (None, None))
+            if (
+                status == K8sClusterStatus.ready.name
+                and version == self.k8s_upgrade_version
+            ):
+                finish(upgrade, CURRENT)
+                return
+            upgrade.submitted = now()
+            try:
+                self.controller.upgrade_cluster(
+                    upgrade.id,
+                    self.k8s_upgrade_version,
+                    self.canary_worker_upgrade_percent
+                    if upgrade.canary
+                    else self.worker_upgrade_percent,
+                )
+            except Exception as e:
+                finish(upgrade, FAILED, str(e) or repr(e))
+                return
+            upgrading.append(upgrade)
+            change(upgrade, UPGRADING)
+
+        def list_failed(error):
+            state["list_errors"] += 1
+            _log.warning(
+                "FleetUpgrade: listing the clusters failed: {}".format(error)
+            )
+            for upgrade in list(upgrading):
+                if now() - upgrade.submitted > self.timeout_secs:
+                    finish(upgrade, FAILED, "timeout")
+            check_halt()
+            if (
+                not upgrading
+                and state["halted"] is None
+                and now() - state["listed"] > self.timeout_secs
+            ):
+                state["halted"] = "listing the clusters failed: {}".format(
+                    error
+                )
+            return not upgrading and (not queue or state["halted"])
+
+        def poll():
+            state["polls"] += 1
+            try:
+                current = dict(
+                    (c.id, (c.status, c.k8s_version))
+                    for c in self.controller.list(
+                        fields=["id", "status", "k8s_version"],
+                        bypass_cache=True,
+                    )
+                )
+            except Exception as e:
+                return list_failed(str(e) or repr(e))
+            state["listed"] = now()
+            for upgrade in list(upgrading):
+                if upgrade.id not in current:
+                    finish(upgrade, FAILED, "disappeared")
+                    continue
+                status, version = current[upgrade.id]
+                if (
+                    status == K8sClusterStatus.ready.name
+                    and version == self.k8s_upgrade_version
+                ):
+                    finish(upgrade, DONE)
+                elif status in error_status:
+                    finish(upgrade, FAILED, "status " + status)
+                elif now() - upgrade.submitted > self.timeout_secs:
+                    finish(upgrade, FAILED, "timeout")
+            check_halt()
+
+            if state["halted"] is None:
+                while queue and len(upgrading) < self.window:
+                    if not queue[0].canary and any(
+                        u.canary for u in upgrading
+                    ):
+                        # the canaries must succeed before the fleet
+                        break
+                    submit(queue.pop(0), current)
+                    check_halt()
+                    if state["halted"] is not None:
+                        break
+            state["peak"] = max(state["peak"], len(upgrading))
+            # a cluster submitted in this poll is first checked by the next
+            return not upgrading and (not queue or state["halted"])
+
+        steps = self.poll_schedule.steps()
+        while not poll():
+            time.sleep(next(steps))
+
+        for upgrade in queue:
+            change(upgrade, SKIPPED)
+        return FleetUpgradeResult(
+            upgrades,
+            state["halted"],
+            now(),
+            state["polls"],
+            state["peak"],
+            state["list_errors"],
+        )
@@ -24,8 +24,6 @@ from enum import Enum
 
 from requests.structures import CaseInsensitiveDict
 
-from hpecp.base_resource import ResourceList
-
 from .base_resource import AbstractResource, AbstractWaitableResourceController
 from .exceptions import APIItemNotFoundException
 
@@ -112,6 +110,11 @@ class Gateway(AbstractResource):
         "tags",
     ]
 
+    # GatewayController filters the workers by purpose
+    required_json_keys = ["_links", "purpose"]
+
+    indexed_fields = ["id", "state", "hostname", "ip"]
+
     @property
     def state(self):
         """@Field: from json['state']"""
@@ -258,13 +261,18 @@ class GatewayController(AbstractWaitableResourceController):
         )
         return CaseInsensitiveDict(response.headers)["location"]
 
-    def get(self, id):
+    def get(self, id, fields=None, bypass_cache=False):
         """Retrieve a Gateway by ID.
 
         Parameters
         ----------
         id: str
             The gateway ID - format: '/api/v1/workers/[0-9]+'
+        fields: list
+            Only retain the json for these fields, see
+            :py:meth:`.base_resource.AbstractResourceController.list`
+        bypass_cache: bool
+            Always call the API, even if the client cache is enabled
 
         Returns
         -------
@@ -275,7 +283,9 @@ class GatewayController(AbstractWaitableResourceController):
         ------
         APIException
         """
-        worker = super(GatewayController, self).get(id)
+        worker = super(GatewayController, self).get(
+            id, fields=fields, bypass_cache=bypass_cache
+        )
         if worker.purpose != "proxy":
             raise APIItemNotFoundException(
                 message="gateway not found with id: " + id,
@@ -284,18 +294,12 @@ class GatewayController(AbstractWaitableResourceController):
             )
         return worker
 
-    def list(self):
-        """Make an API call to retrieve a list of Resources.
+    def _select_listed(self, resources):
+        """Return the hosts of the list response with purpose 'proxy'.
 
-        Returns
-        -------
-        ResourceList
-            The ResourceList will contain instances of the class defined by
-            the property self.resource_class
+        Epic workers and gateways share the '/api/v1/workers' collection.
         """
-        resourceList = super(GatewayController, self).list()
-        gateways = [gw for gw in resourceList.json if gw["purpose"] == "proxy"]
-        return ResourceList(self.resource_class, gateways)
+        return [gw for gw in resources if gw["purpose"] == "proxy"]
 
     # TODO refactor clients so implementation not required
     def wait_for_state(self, gateway_id, state=[], timeout_secs=1200):
@@ -0,0 +1,276 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Local mirror of a resource collection, kept up to date by polling."""
+
+from __future__ import absolute_import
+
+import threading
+import time
+from enum import Enum
+
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+
+class InformerEvent(Enum):
+    """The events an :py:class:`Informer` notifies its subscribers of.
+
+    Bases: enum.Enum
+    """
+
+    added = 1
+    updated = 2
+    deleted = 3
+
+
+class Informer(object):
+    """Keep an in-memory mirror of a resource collection.
+
+    A background thread calls the controller's `list()` every `interval`
+    seconds, compares the result with the previous snapshot and notifies
+    the subscribers of the resources that were added, updated or deleted.
+
+    Any number of callers can read from the mirror or wait for a resource
+    status for the cost of one `list()` call per interval.
+
+    Users will normally retrieve an Informer with
+    :py:meth:`.base_resource.AbstractResourceController.informer`.
+
+    Example
+    -------
+    >>> informer = client.k8s_worker.informer(interval=5)
+    >>> informer.subscribe(lambda event, host: print(event.name, host.id))
+    >>> informer.wait_for_status(host_id, [WorkerK8sStatus.ready])
+    >>> informer.stop()
+    """
+
+    def __init__(self, controller, interval=10, fields=None):
+        """Create an Informer.  The informer must be started with start().
+
+        Parameters
+        ----------
+        controller : AbstractResourceController
+            The controller whose collection is mirrored
+        interval : int or float, optional
+            Seconds between `list()` calls, by default 10
+        fields : list, optional
+            Field projection passed to `list()`, by default None
+        """
+        assert interval > 0, "'interval' must be > 0"
+
+        self.controller = controller
+        self.interval = interval
+        self.fields = fields
+
+        self._store = {}
+        self._synced = False
+        self._subscribers = []
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background list loop.
+
+        Returns
+        -------
+        Informer
+            self
+        """
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="Informer-{}".format(
+                        self.controller.__class__.__name__
+                    ),
+                )
+                self._thread.daemon = True
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the background list loop.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the background thread to finish
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_running(self):
+        """Return True if the background list loop is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def has_synced(self):
+        """Return True once the mirror has been populated."""
+        return self._synced
+
+    def subscribe(self, subscriber):
+        """Subscribe to added, updated and deleted events.
+
+        Parameters
+        ----------
+        subscriber : callable or queue
+            Either a callable that is called with (InformerEvent, resource)
+            or an object with a `put()` method, e.g. a `queue.Queue`, that
+            is sent (InformerEvent, resource) tuples.  Subscribers are
+            notified from the informer's background thread.
+        """
+        assert callable(subscriber) or hasattr(
+            subscriber, "put"
+        ), "'subscriber' must be callable or have a put() method"
+        with self._condition:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber added with :py:meth:`subscribe`."""
+        with self._condition:
+            self._subscribers.remove(subscriber)
+
+    def get(self, id):
+        """Return the mirrored resource or None if it does not exist."""
+        with self._condition:
+            return self._store.get(id)
+
+    def list(self):
+        """Return a list of the mirrored resources."""
+        with self._condition:
+            return list(self._store.values())
+
+    def wait_for_sync(self, timeout_secs=None):
+        """Wait until the mirror has been populated.
+
+        Returns
+        -------
+        bool
+            True if the mirror was populated before the timeout
+        """
+        return self._wait(lambda: self._synced, timeout_secs)
+
+    def wait_for_status(self, id, status=[], timeout_secs=1200):
+        """Wait for a resource status using the mirror.
+
+        The arguments and return value are the same as for
+        :py:meth:`.base_resource.AbstractWaitableResourceController.wait_for_status`.
+        """  # noqa: E501
+        assert isinstance(status, list), "'status' must be a list"
+        assert isinstance(timeout_secs, int), "'timeout_secs' must be an int"
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        waiting_for_status = [s.name for s in status]
+        status_fieldname = self.controller.status_fieldname
+
+        def reached():
+            if not self._synced:
+                return False
+            resource = self._store.get(id)
+            if len(waiting_for_status) == 0:
+                return resource is None
+            return (
+                resource is not None
+                and getattr(resource, status_fieldname) in waiting_for_status
+            )
+
+        _log.debug(
+            "waiting {}s for item {} to have status in {} (informer)".format(
+                timeout_secs, id, waiting_for_status
+            )
+        )
+        return self._wait(reached, timeout_secs)
+
+    def sync(self):
+        """List the collection and update the mirror.
+
+        This is called by the background loop, but can also be called
+        directly to refresh the mirror immediately.
+        """
+        resources = self.controller.list(fields=self.fields, bypass_cache=True)
+
+        current = {}
+        for resource in resources:
+            current[resource.id] = resource
+
+        events = []
+        with self._condition:
+            previous = self._store
+            for id, resource in current.items():
+                if id not in previous:
+                    events.append((InformerEvent.added, resource))
+                elif previous[id].json != resource.json:
+                    events.append((InformerEvent.updated, resource))
+            for id, resource in previous.items():
+                if id not in current:
+                    events.append((InformerEvent.deleted, resource))
+
+            self._store = current
+            self._synced = True
+            subscribers = list(self._subscribers)
+            self._condition.notify_all()
+
+        for (event, resource) in events:
+            for subscriber in subscribers:
+                try:
+                    if callable(subscriber):
+                        subscriber(event, resource)
+                    else:
+                        subscriber.put((event, resource))
+                except Exception as e:
+                    _log.error(
+                        "Informer subscriber {} failed: {}".format(
+                            subscriber, e
+                        )
+                    )
+
+        return events
+
+    def _wait(self, predicate, timeout_secs):
+        deadline = None if timeout_secs is None else time.time() + timeout_secs
+        with self._condition:
+            while not predicate():
+                if self._stop_event.is_set():
+                    return predicate()
+                if deadline is None:
+                    self._condition.wait(self.interval)
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, self.interval))
+            return True
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                # the controller may be temporarily unavailable, keep
+                # serving the last snapshot and retry on the next interval
+                _log.warning("Informer list failed: {}".format(e))
+            self._stop_event.wait(self.interval)
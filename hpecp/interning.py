@@ -0,0 +1,127 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Memory efficient decoding of large json responses."""
+
+from __future__ import absolute_import
+
+import six
+
+_STRING_TYPES = (six.text_type, str)
+
+
+class JsonInterner(object):
+    """A json `object_pairs_hook` that deduplicates the decoded values.
+
+    Every string is replaced by the first equal string decoded, and every
+    small object or array is replaced by the first equal object or array
+    decoded, so a list of thousands of similar resources holds one copy
+    of each key, status, version, tag and shared sub-structure.
+
+    The decoded json shares objects between resources and must not be
+    modified.
+
+    An interner is used for one decode; its tables are released with it.
+
+    Example
+    -------
+    >>> json.loads(text, object_pairs_hook=JsonInterner())
+    """
+
+    max_shared_size = 8
+    """Objects and arrays with more items are never shared.  Larger
+    structures are rarely identical, and their lookup keys cost more than
+    sharing saves."""
+
+    def __init__(self, hook=None):
+        """Create a JsonInterner.
+
+        Parameters
+        ----------
+        hook : callable, optional
+            Another object_pairs_hook, called with the deduplicated pairs
+            before the resulting object is shared
+        """
+        self._hook = hook
+        self._strings = {}
+        self._shared = {}
+        self._shared_ids = set()
+
+    def __call__(self, pairs):
+        """Return the deduplicated object for the decoded pairs."""
+        strings = self._strings
+        # the key identifies equal pairs, None if they can not be shared
+        key = [] if len(pairs) <= self.max_shared_size else None
+        values = []
+        for (k, v) in pairs:
+            k = strings.setdefault(k, k)
+            t = type(v)
+            if t in _STRING_TYPES:
+                v = strings.setdefault(v, v)
+            elif t is list:
+                v = self._list(v)
+            if key is not None:
+                key = self._extend_key(key, k, t, v)
+            values.append((k, v))
+
+        if self._hook is not None:
+            obj = self._hook(values)
+        else:
+            obj = dict(values)
+        if key is None:
+            return obj
+        return self._share(("dict", tuple(key)), obj)
+
+    def string(self, value):
+        """Return the first decoded string equal to value."""
+        return self._strings.setdefault(value, value)
+
+    def _list(self, items):
+        strings = self._strings
+        key = [] if len(items) <= self.max_shared_size else None
+        values = []
+        for v in items:
+            t = type(v)
+            if t in _STRING_TYPES:
+                v = strings.setdefault(v, v)
+            elif t is list:
+                v = self._list(v)
+            if key is not None:
+                key = self._extend_key(key, None, t, v)
+            values.append(v)
+        if key is None:
+            return values
+        return self._share(("list", tuple(key)), values)
+
+    def _extend_key(self, key, k, t, v):
+        if t is dict or t is list:
+            # only shared values are immutable for the decode
+            if id(v) not in self._shared_ids:
+                return None
+            key.append((k, None, id(v)))
+        else:
+            # the type distinguishes e.g. 1, 1.0 and True
+            key.append((k, t, v))
+        return key
+
+    def _share(self, key, value):
+        shared = self._shared.setdefault(key, value)
+        self._shared_ids.add(id(shared))
+        return shared
@@ -0,0 +1,256 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""A local SQLite copy of the platform inventory.
+
+When enabled with
+:py:meth:`ContainerPlatformClient.enable_inventory_db
+<hpecp.client.ContainerPlatformClient.enable_inventory_db>`, the result of
+every unfiltered `list()` call replaces the table of its collection.  Each
+table has an indexed column for each field of the resource class'
+`all_fields`, and a 'json' column holding the resource json, so the
+inventory can be queried and joined with SQL without calling the API.
+
+Example
+-------
+>>> db = client.enable_inventory_db("~/.hpecp_inventory.db")
+>>> client.k8s_cluster.list()
+>>> client.k8s_worker.list()
+>>> db.query(
+...     "SELECT c.name, w.hostname, w.status "
+...     "FROM k8s_cluster c, json_each(c.k8shosts_config) h "
+...     "JOIN k8s_worker w ON w.id = json_extract(h.value, '$.node')"
+... )
+"""
+
+from __future__ import absolute_import
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .base_resource import ResourceList
+from .diff import field_values
+from .logger import Logger
+from .snapshot import RESOURCE_CLASSES
+
+_log = Logger.get_logger()
+
+_COLLECTIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS _collections (
+    name TEXT PRIMARY KEY,
+    resource_class TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+def _quote(identifier):
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def _column_value(value):
+    """Return a value that SQLite can store, structures as json text."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return value
+
+
+def collection_name(resource_class):
+    """Return the table name of a resource class.
+
+    The names are the collection names of :py:data:`.snapshot.
+    RESOURCE_CLASSES`, e.g. 'k8s_cluster' for
+    :py:class:`.k8s_cluster.K8sCluster`.
+    """
+    for (name, cls) in RESOURCE_CLASSES.items():
+        if cls is resource_class:
+            return name
+    return resource_class.__name__.lower()
+
+
+class InventoryDatabase(object):
+    """The inventory stored in a SQLite database.
+
+    Each collection is stored as a whole: the rows of a collection always
+    come from a single `list()` response.
+    """
+
+    def __init__(self, path):
+        """Open or create an inventory database.
+
+        Parameters
+        ----------
+        path : str
+            The SQLite database file, ':memory:' for a database that is
+            not persisted
+        """
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+        self.path = path
+        self._lock = threading.Lock()
+        # autocommit mode: transactions are started explicitly so that
+        # the table definitions are replaced in the same transaction as
+        # the rows
+        self._db = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute(_COLLECTIONS_SCHEMA)
+
+    def store(self, resource_list):
+        """Replace the table of a collection with a list of resources.
+
+        Parameters
+        ----------
+        resource_list : ResourceList
+            The resources returned by `list()`
+        """
+        resource_class = resource_list.resource_class
+        table = collection_name(resource_class)
+        fields = list(resource_class.all_fields)
+        columns = [_quote(f) for f in fields] + ['"json"']
+        rows = [
+            [_column_value(v) for v in field_values(resource, fields)]
+            + [json.dumps(resource.json, separators=(",", ":"))]
+            for resource in resource_list.resources
+        ]
+
+        with self._lock:
+            cursor = self._db.cursor()
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute("DROP TABLE IF EXISTS " + _quote(table))
+                cursor.execute(
+                    "CREATE TABLE {} ({})".format(
+                        _quote(table), ", ".join(columns)
+                    )
+                )
+                for field in fields:
+                    cursor.execute(
+                        "CREATE INDEX {} ON {} ({})".format(
+                            _quote("{}_{}".format(table, field)),
+                            _quote(table),
+                            _quote(field),
+                        )
+                    )
+                cursor.executemany(
+                    "INSERT INTO {} VALUES ({})".format(
+                        _quote(table), ", ".join(["?"] * len(columns))
+                    ),
+                    rows,
+                )
+                cursor.execute(
+                    "INSERT OR REPLACE INTO _collections "
+                    "VALUES (?, ?, ?, ?)",
+                    (table, resource_class.__name__, len(rows), time.time()),
+                )
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+        _log.debug(
+            "InventoryDatabase: stored {} {} rows".format(len(rows), table)
+        )
+
+    def collections(self):
+        """Return the stored collections.
+
+        Returns
+        -------
+        OrderedDict
+            (count, updated) by collection name, where updated is the time
+            the collection was stored
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, count, updated FROM _collections ORDER BY name"
+            ).fetchall()
+        return OrderedDict(
+            (name, (count, updated)) for (name, count, updated) in rows
+        )
+
+    def query(self, sql, params=()):
+        """Run a read only SQL query.
+
+        Parameters
+        ----------
+        sql : str
+            A SELECT statement, the tables are named after the
+            collections, see :py:func:`collection_name`
+        params : tuple or dict, optional
+            The query parameters
+
+        Returns
+        -------
+        tuple
+            (column names, list of rows)
+        """
+        with self._lock:
+            self._db.execute("PRAGMA query_only = ON")
+            try:
+                cursor = self._db.execute(sql, params)
+                rows = cursor.fetchall()
+                columns = [d[0] for d in cursor.description or []]
+            finally:
+                self._db.execute("PRAGMA query_only = OFF")
+        return (columns, rows)
+
+    def resources(self, collection):
+        """Return the stored resources of a collection.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name, e.g. 'k8s_cluster'
+
+        Returns
+        -------
+        ResourceList
+        """
+        assert (
+            collection in RESOURCE_CLASSES
+        ), "Unknown collection '{}', must be one of {}".format(
+            collection, list(RESOURCE_CLASSES)
+        )
+        if collection not in self.collections():
+            return ResourceList(RESOURCE_CLASSES[collection], [])
+        (_, rows) = self.query(
+            'SELECT "json" FROM {} ORDER BY rowid'.format(_quote(collection))
+        )
+        return ResourceList(
+            RESOURCE_CLASSES[collection], [json.loads(r[0]) for r in rows]
+        )
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def __enter__(self):
+        """Return the inventory database."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the inventory database."""
+        self.close()
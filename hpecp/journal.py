@@ -0,0 +1,407 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Resumable bulk operations backed by a SQLite job journal.
+
+Each item of a bulk operation, e.g. a host to add with
+`create_with_ssh_key` or a cluster to upgrade with `upgrade_cluster`, is
+recorded in the journal as it is submitted, waited for and completed.
+When the script is restarted with the same journal and job name, the
+completed items are skipped, the submitted items are only polled and the
+failed items are retried.
+
+Example
+-------
+>>> journal = JobJournal("onboarding.db", "onboard-rack-12")
+>>> hosts = OrderedDict((ip, ssh_key) for ip in ips)
+>>> result = BulkOperation(
+...     journal,
+...     submit=client.k8s_worker.create_with_ssh_key,
+...     controller=client.k8s_worker,
+...     status=[WorkerK8sStatus.storage_pending],
+...     find=lambda ip: next(
+...         (h.id for h in client.k8s_worker.list() if h.ipaddr == ip), None
+...     ),
+... ).run(hosts)
+
+A cluster is still ready when its upgrade is submitted, so the upgrades
+are only done when the clusters are ready at the requested version:
+
+>>> versions = OrderedDict((id, "1.18.6") for id in cluster_ids)
+>>> result = BulkOperation(
+...     JobJournal("upgrades.db", "upgrade-1.18.6"),
+...     submit=client.k8s_cluster.upgrade_cluster,
+...     controller=client.k8s_cluster,
+...     status=[K8sClusterStatus.ready],
+...     check=lambda cluster, version: cluster.k8s_version == version,
+...     fields=["k8s_version"],
+... ).run(versions)
+"""
+
+from __future__ import absolute_import
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import six
+
+from .logger import Logger
+from .operation import WaitOutcome
+
+_log = Logger.get_logger()
+
+SUBMITTED = "submitted"
+"""The call was issued, the resource ID is not yet known."""
+WAITING = "waiting"
+"""The call returned, the resource has not reached the requested status."""
+DONE = "done"
+"""The item is complete."""
+FAILED = "failed"
+"""The call or the wait failed, the item is retried by the next run."""
+
+STATES = [SUBMITTED, WAITING, DONE, FAILED]
+
+JournalEntry = namedtuple(
+    "JournalEntry",
+    ["key", "state", "resource_id", "error", "attempts", "updated"],
+)
+"""The journal record of an item.  `attempts` counts the submissions and
+`updated` is the time of the last change."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    job TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    resource_id TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job, key)
+)
+"""
+
+
+class JobJournal(object):
+    """The state of the items of a bulk job, persisted in SQLite.
+
+    A journal file can hold many jobs, identified by name.  Every change
+    is committed before the next call is issued, so the journal survives
+    a crash of the process.
+    """
+
+    def __init__(self, path, job):
+        """Open or create a journal.
+
+        Parameters
+        ----------
+        path : str
+            The SQLite database file, ':memory:' for a journal that is not
+            persisted
+        job : str
+            The job name
+        """
+        assert isinstance(
+            job, six.string_types
+        ), "'job' must be provided and must be a string"
+        self.path = path
+        self.job = job
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(_SCHEMA)
+
+    def get(self, key):
+        """Return the JournalEntry of an item, None if it is not recorded."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, state, resource_id, error, attempts, updated "
+                "FROM items WHERE job = ? AND key = ?",
+                (self.job, key),
+            ).fetchone()
+        return None if row is None else JournalEntry(*row)
+
+    def entries(self, state=None):
+        """Return the JournalEntry of each item, optionally in a state."""
+        query = (
+            "SELECT key, state, resource_id, error, attempts, updated "
+            "FROM items WHERE job = ?"
+        )
+        params = [self.job]
+        if state is not None:
+            query += " AND state = ?"
+            params.append(state)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY rowid", params)
+            return [JournalEntry(*row) for row in rows.fetchall()]
+
+    def record(self, key, state, resource_id=None, error=None, attempt=False):
+        """Record the state of an item.
+
+        Parameters
+        ----------
+        key : str
+            The item key
+        state : str
+            One of :py:data:`STATES`
+        resource_id : str, optional
+            The resource ID, kept from the previous record if None unless
+            the state is SUBMITTED: the resource of a new submission is
+            not known until its call returns
+        error : str, optional
+            The reason of a failure
+        attempt : bool, optional
+            Count a new submission of the item
+        """
+        assert state in STATES, "'state' must be one of {}".format(STATES)
+        previous_id = "NULL" if state == SUBMITTED else "resource_id"
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO items (job, key, state, updated) "
+                "VALUES (?, ?, ?, ?)",
+                (self.job, key, state, time.time()),
+            )
+            self._db.execute(
+                "UPDATE items SET state = ?, "
+                "resource_id = COALESCE(?, " + previous_id + "), error = ?, "
+                "attempts = attempts + ?, updated = ? "
+                "WHERE job = ? AND key = ?",
+                (
+                    state,
+                    resource_id,
+                    error,
+                    1 if attempt else 0,
+                    time.time(),
+                    self.job,
+                    key,
+                ),
+            )
+
+    def counts(self):
+        """Return the number of items in each state."""
+        counts = OrderedDict((state, 0) for state in STATES)
+        with self._lock:
+            for (state, count) in self._db.execute(
+                "SELECT state, COUNT(*) FROM items WHERE job = ? "
+                "GROUP BY state",
+                (self.job,),
+            ):
+                counts[state] = count
+        return counts
+
+    def forget(self):
+        """Delete the records of the job."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM items WHERE job = ?", (self.job,))
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def __enter__(self):
+        """Return the journal."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the journal."""
+        self.close()
+
+
+class BulkOperation(object):
+    """Submit a call for many items and wait for the resources, resumably.
+
+    A run skips the items the journal records as done and the failed items
+    unless `retry_failed`; it polls the waiting items without submitting
+    them again.  An item recorded as submitted without a resource ID was
+    interrupted during its call: `find` is asked for its resource,
+    otherwise it is submitted again.
+    """
+
+    def __init__(
+        self,
+        journal,
+        submit,
+        controller=None,
+        status=None,
+        timeout_secs=1200,
+        find=None,
+        max_workers=8,
+        retry_failed=True,
+        check=None,
+        fields=None,
+    ):
+        """Create a BulkOperation.
+
+        Parameters
+        ----------
+        journal : JobJournal
+            The journal of the job
+        submit : callable
+            Called with (key, value) for each item.  Returns the ID of the
+            resource to wait for; if the returned value is not a string,
+            the key is used as the resource ID, e.g. for
+            `client.k8s_cluster.upgrade_cluster` with cluster IDs as keys
+            and versions as values, see `check`.
+        controller : AbstractWaitableResourceController, optional
+            The controller of the resources.  If None, the items are done
+            when the call returns.
+        status : list, optional
+            The statuses that complete the items, empty to wait for the
+            resources to be deleted
+        timeout_secs : int, optional
+            How long a run waits for the resources, by default 1200.  The
+            items that time out stay waiting for the next run.
+        find : callable, optional
+            Called with the key of an interrupted item, returns the ID of
+            its resource or None if the call did not take effect
+        max_workers : int, optional
+            The maximum number of concurrent calls, by default 8
+        retry_failed : bool, optional
+            Submit the failed items again, by default True
+        check : callable, optional
+            Called with (resource, value) for each listed resource that
+            has one of `status`; the item is only done if it returns True.
+            Required when the resource already has the status before the
+            call takes effect, e.g. a cluster is 'ready' until its upgrade
+            starts.
+        fields : list, optional
+            The fields read by check
+        """
+        assert callable(submit), "'submit' must be callable"
+        assert controller is None or isinstance(
+            status, list
+        ), "'status' must be a list when 'controller' is provided"
+        assert (
+            isinstance(max_workers, int) and max_workers > 0
+        ), "'max_workers' must be an int > 0"
+        self.journal = journal
+        self.submit = submit
+        self.controller = controller
+        self.status = status
+        self.timeout_secs = timeout_secs
+        self.find = find
+        self.max_workers = max_workers
+        self.retry_failed = retry_failed
+        self.check = check
+        self.fields = fields
+
+    def run(self, items, progress=None):
+        """Run the unfinished items.
+
+        Parameters
+        ----------
+        items : dict or list
+            The value passed to `submit` for each key, or a list of keys
+            submitted with the value None
+        progress : callable, optional
+            Called with the JournalEntry of each item that changed state
+
+        Returns
+        -------
+        OrderedDict
+            The JournalEntry of each item, in the order of items
+        """
+        if not isinstance(items, dict):
+            items = OrderedDict((key, None) for key in items)
+        journal = self.journal
+
+        def report(key):
+            if progress is not None:
+                progress(journal.get(key))
+
+        to_submit = []
+        for key in items:
+            entry = journal.get(key)
+            if entry is None:
+                to_submit.append(key)
+            elif entry.state == SUBMITTED and entry.resource_id is None:
+                resource_id = None if self.find is None else self.find(key)
+                if resource_id is None:
+                    to_submit.append(key)
+                else:
+                    journal.record(key, self._submitted_state(), resource_id)
+                    report(key)
+            elif entry.state == FAILED and self.retry_failed:
+                to_submit.append(key)
+
+        def submit(key):
+            journal.record(key, SUBMITTED, attempt=True)
+            try:
+                returned = self.submit(key, items[key])
+            except Exception as e:
+                _log.debug("BulkOperation: {} failed: {}".format(key, e))
+                journal.record(key, FAILED, error=str(e) or repr(e))
+            else:
+                if isinstance(returned, six.string_types):
+                    resource_id = returned
+                else:
+                    resource_id = key
+                journal.record(key, self._submitted_state(), resource_id)
+            report(key)
+
+        if to_submit:
+            workers = min(self.max_workers, len(to_submit))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(submit, to_submit))
+
+        if self.controller is not None:
+            self._wait(
+                [k for k in items if journal.get(k).state == WAITING],
+                items,
+                report,
+            )
+
+        return OrderedDict((key, journal.get(key)) for key in items)
+
+    def _submitted_state(self):
+        return DONE if self.controller is None else WAITING
+
+    def _wait(self, keys, items, report):
+        if not keys:
+            return
+        keys_by_id = OrderedDict(
+            (self.journal.get(key).resource_id, key) for key in keys
+        )
+
+        def check_item(resource):
+            return self.check(resource, items[keys_by_id[resource.id]])
+
+        outcomes = self.controller.wait_for_status_many(
+            list(keys_by_id),
+            self.status,
+            self.timeout_secs,
+            check=check_item if self.check is not None else None,
+            fields=self.fields,
+        )
+        for (resource_id, outcome) in outcomes.items():
+            key = keys_by_id[resource_id]
+            if outcome is WaitOutcome.reached:
+                self.journal.record(key, DONE)
+            elif outcome in (WaitOutcome.error, WaitOutcome.disappeared):
+                self.journal.record(
+                    key, FAILED, error="wait: {}".format(outcome.name)
+                )
+            else:
+                # timeout and pending stay waiting for the next run
+                continue
+            report(key)
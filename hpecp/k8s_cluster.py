@@ -26,6 +26,8 @@ from enum import Enum
 from requests.structures import CaseInsensitiveDict
 
 from .base_resource import AbstractResource, AbstractWaitableResourceController
+from .k8s_manifest import K8sManifest
+from .poll_schedule import PollSchedule
 
 try:
     basestring
@@ -102,6 +104,13 @@ class K8sCluster(AbstractResource):
         "status",
     ]
 
+    field_json_keys = {
+        "name": ["label"],
+        "description": ["label"],
+    }
+
+    indexed_fields = ["id", "name", "status", "k8s_version"]
+
     @property
     def name(self):
         """@Field: from json['label']['name']"""
@@ -280,6 +289,15 @@ class K8sClusterController(AbstractWaitableResourceController):
 
     status_fieldname = "status"
 
+    poll_schedule = PollSchedule(initial=2, factor=2, max_step=30)
+
+    # cluster builds and upgrades take tens of minutes, start slow
+    poll_transition_schedules = {
+        ("creating", "ready"): PollSchedule(initial=30, max_step=60),
+        ("upgrading", "ready"): PollSchedule(initial=30, max_step=60),
+        ("deleting", None): PollSchedule(initial=10, max_step=30),
+    }
+
     def create(
         self,
         name=None,
@@ -294,10 +312,13 @@ class K8sClusterController(AbstractWaitableResourceController):
         addons=[],
         external_identity_server={},
         external_groups=[],
+        as_operation=False,
+        timeout_secs=1200,
     ):
         """Send an API request to create a K8s Cluster.  The cluster creation
         will be asynchronous - use the :py:meth:`wait_for_status` method to
-        wait for the cluster to be created.
+        wait for the cluster to be created, or set `as_operation` to track
+        the creation in the background.
 
         For the list of possible statuses see :py:class:`K8sClusterStatus`.
 
@@ -315,7 +336,9 @@ class K8sClusterController(AbstractWaitableResourceController):
             Network range to be used for kubernetes pods. Defaults to
             `10.192.0.0/12`
         addons: list
-            Addons - See :py:method:`get_available_addons`.
+            Addons - See :py:method:`get_available_addons`.  If the
+            k8smanifest is cached and `k8s_version` is provided, the
+            addons are validated without an API call.
         service_network_range: str
             Network range to be used for kubernetes services that are
             exposed with Cluster IP. Defaults to `10.96.0.0/12`
@@ -344,11 +367,18 @@ class K8sClusterController(AbstractWaitableResourceController):
                 "verify_peer":false,
                 "type":"Active Directory",
                 "port":636}
+        as_operation: bool
+            Return an :py:class:`.operation.Operation` that completes when
+            the cluster is ready, by default False
+        timeout_secs: int
+            How long to track the operation for if `as_operation` is True
 
         Returns
         -------
         str
             K8s Cluster ID with the format: '/api/v2/k8scluster/[0-9]+'
+        Operation
+            If `as_operation` is True, with the cluster ID in `Operation.id`
 
         Raises
         ------
@@ -391,6 +421,8 @@ class K8sClusterController(AbstractWaitableResourceController):
                 " type K8sClusterHostConfig"
             ).format(i)
         assert isinstance(addons, list), "'addons' must be a list"
+        if k8s_version is not None:
+            self._check_addons(k8s_version, addons)
 
         data = {
             "label": {"name": name},
@@ -419,24 +451,40 @@ class K8sClusterController(AbstractWaitableResourceController):
             data=data,
             description="k8s_cluster/create",
         )
-        return CaseInsensitiveDict(response.headers)["Location"]
+        id = CaseInsensitiveDict(response.headers)["Location"]
+        if as_operation:
+            return self.operation(id, [K8sClusterStatus.ready], timeout_secs)
+        return id
 
-    def get(self, id, params={}, setup_log=False):
+    def get(
+        self, id, params={}, setup_log=False, fields=None, bypass_cache=False
+    ):
         """Retrieve a K8s Cluster.
 
         Parameters
         ----------
         id: str
             The k8s cluster ID
+        fields: list
+            Only retain the json for these fields, see
+            :py:meth:`.base_resource.AbstractResourceController.list`
+        bypass_cache: bool
+            Always call the API, even if the client cache is enabled
         """
         if setup_log is True:
             params["setup_log"] = "true"
 
-        return super(K8sClusterController, self).get(id=id, params=params)
+        return super(K8sClusterController, self).get(
+            id=id, params=params, fields=fields, bypass_cache=bypass_cache
+        )
 
     def k8smanifest(self):
         """Retrieve the k8smanifest.
 
+        The manifest is read through the client's k8smanifest cache if it
+        is enabled, see
+        :py:meth:`.client.ContainerPlatformClient.enable_k8s_manifest_cache`.
+
         Returns
         -------
         json
@@ -446,6 +494,25 @@ class K8sClusterController(AbstractWaitableResourceController):
         ------
         APIException
         """
+        return self.manifest().json
+
+    def manifest(self):
+        """Retrieve the indexed k8smanifest, see :py:meth:`k8smanifest`.
+
+        Returns
+        -------
+        K8sManifest
+
+        Raises
+        ------
+        APIException
+        """
+        cache = getattr(self.client, "k8s_manifest_cache", None)
+        if cache is None:
+            return K8sManifest(self._fetch_k8smanifest())
+        return cache.get(self.client.api_host, self._fetch_k8smanifest)
+
+    def _fetch_k8smanifest(self):
         response = self.client._request(
             url="/api/v2/k8smanifest",
             http_method="get",
@@ -453,6 +520,27 @@ class K8sClusterController(AbstractWaitableResourceController):
         )
         return response.json()
 
+    def _check_addons(self, k8s_version, addons):
+        """Validate addons against the cached k8smanifest, if any.
+
+        The manifest is not retrieved for the validation.
+        """
+        cache = getattr(self.client, "k8s_manifest_cache", None)
+        manifest = None if cache is None else cache.peek(self.client.api_host)
+        if manifest is None or len(addons) == 0:
+            return
+        assert manifest.is_supported(
+            k8s_version
+        ), "k8s version '{}' is not supported, must be one of {}".format(
+            k8s_version, manifest.supported_versions
+        )
+        unavailable = manifest.unavailable_addons(k8s_version, addons)
+        assert (
+            len(unavailable) == 0
+        ), "addons {} are not available for k8s version '{}'".format(
+            unavailable, k8s_version
+        )
+
     def k8s_supported_versions(self):
         """Retrieve list of K8S Supported Versions.
 
@@ -465,7 +553,7 @@ class K8sClusterController(AbstractWaitableResourceController):
         ------
         APIException
         """
-        return self.k8smanifest()["supported_versions"]
+        return list(self.manifest().supported_versions)
 
     def get_available_addons(self, id=None, k8s_version=None):
         """Retrieve list of K8S Supported Versions.
@@ -492,11 +580,11 @@ class K8sClusterController(AbstractWaitableResourceController):
         ), "Either 'id' or 'k8s_version' parameter must be provided"
 
         if id:
-            k8s_version = self.get(id).k8s_version
+            k8s_version = self.get(id, fields=["k8s_version"]).k8s_version
 
-        return self.k8smanifest()["version_info"][k8s_version]["addons"]
+        return self.manifest().addons(k8s_version)
 
-    def add_addons(self, id, addons=[]):
+    def add_addons(self, id, addons=[], as_operation=False, timeout_secs=1200):
         """Retrieve list of K8S Supported Versions.
 
         Parameters
@@ -504,7 +592,18 @@ class K8sClusterController(AbstractWaitableResourceController):
         id: str
             The k8s cluster ID
         addons: list
-            The list of addons to add.
+            The list of addons to add.  If the k8smanifest is cached, the
+            addons are validated against the cluster's k8s version.
+        as_operation: bool
+            Return an :py:class:`.operation.Operation` that completes when
+            the cluster is ready with the addons, by default False
+        timeout_secs: int
+            How long to track the operation for if `as_operation` is True
+
+        Returns
+        -------
+        Operation
+            If `as_operation` is True, otherwise None
 
         Raises
         ------
@@ -515,8 +614,12 @@ class K8sClusterController(AbstractWaitableResourceController):
             isinstance(addons, list) and len(addons) > 0
         ), "'Addons' parameter must be a list and have at least one entry."
 
-        current_addons = self.get(id).addons
-        required_addons = current_addons + addons
+        # read-modify-write of the addons, never from the client cache
+        cluster = self.get(
+            id, fields=["k8s_version", "addons"], bypass_cache=True
+        )
+        self._check_addons(cluster.k8s_version, addons)
+        required_addons = (cluster.addons or []) + addons
 
         # de-duplicate
         required_addons = list(dict.fromkeys(required_addons))
@@ -533,17 +636,40 @@ class K8sClusterController(AbstractWaitableResourceController):
             description="k8s_cluster/add_addons",
             data=data,
         )
+        if as_operation:
+            # the cluster is still ready until the change task starts
+            return self.operation(
+                id,
+                [K8sClusterStatus.ready],
+                timeout_secs,
+                check=lambda c: all(a in (c.addons or []) for a in addons),
+                fields=["addons"],
+            )
 
     def upgrade_cluster(
-        self, id, k8s_upgrade_version, worker_upgrade_percent=20
+        self,
+        id,
+        k8s_upgrade_version,
+        worker_upgrade_percent=20,
+        as_operation=False,
+        timeout_secs=1200,
     ):
         """Upgrade a cluster.
 
         TODO
 
+        Parameters
+        ----------
+        as_operation: bool
+            Return an :py:class:`.operation.Operation` that completes when
+            the cluster is ready at k8s_upgrade_version, by default False
+        timeout_secs: int
+            How long to track the operation for if `as_operation` is True
+
         Returns
         -------
         TODO
+            The response json, or an Operation if `as_operation` is True
 
         Raises
         ------
@@ -566,8 +692,74 @@ class K8sClusterController(AbstractWaitableResourceController):
             description="K8sClusterController/upgrade_cluster",
             data=data,
         )
+        if as_operation:
+            # the cluster is still ready until the change task starts
+            return self.operation(
+                id,
+                [K8sClusterStatus.ready],
+                timeout_secs,
+                check=lambda c: c.k8s_version == k8s_upgrade_version,
+                fields=["k8s_version"],
+            )
         return response.json()
 
+    def upgrade_fleet(self, ids, k8s_upgrade_version, progress=None, **kwargs):
+        """Upgrade many clusters, canaries first, within a window.
+
+        Parameters
+        ----------
+        ids: list[str]
+            The cluster IDs, in upgrade order
+        k8s_upgrade_version: str
+            The Kubernetes version to upgrade to
+        progress: callable, optional
+            Called with the ClusterUpgrade of each cluster that changed
+            state
+        kwargs:
+            The options of :py:class:`.fleet_upgrade.FleetUpgrade`, e.g.
+            window, canaries, max_failures or worker_upgrade_percent
+
+        Returns
+        -------
+        FleetUpgradeResult
+            See :py:class:`.fleet_upgrade.FleetUpgradeResult`
+        """
+        from .fleet_upgrade import FleetUpgrade
+
+        return FleetUpgrade(self, k8s_upgrade_version, **kwargs).run(
+            ids, progress=progress
+        )
+
+    def export_kubeconfig(self, path, ids=None, where=None, **kwargs):
+        """Export the admin kubeconfig of many clusters to one file.
+
+        Parameters
+        ----------
+        path: str
+            The kubeconfig file to write
+        ids: list[str], optional
+            The cluster IDs, by default all the clusters
+        where: str, optional
+            Only export the clusters matching this filter expression, see
+            :py:mod:`hpecp.where`
+        kwargs:
+            The options of :py:func:`.kubeconfig.export_kubeconfig`, e.g.
+            max_workers or force
+
+        Returns
+        -------
+        KubeconfigExport
+            See :py:class:`.kubeconfig.KubeconfigExport`
+
+        Example
+        -------
+        >>> client.k8s_cluster.export_kubeconfig(
+        ...     "~/.kube/hpecp", where="status=ready")
+        """
+        from .kubeconfig import export_kubeconfig
+
+        return export_kubeconfig(self, path, ids=ids, where=where, **kwargs)
+
     def import_generic_cluster(
         self, name, description, pod_dns_domain, server_url, ca, bearer_token
     ):
@@ -0,0 +1,230 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""A cache of the k8smanifest, shared by the K8s cluster controller calls.
+
+The manifest lists the Kubernetes versions supported by the platform and
+the addons available for each version.  It only changes when the platform
+is upgraded, so it is cached per platform: in memory and optionally in a
+json file that is shared between processes.
+"""
+
+from __future__ import absolute_import
+
+import io
+import json
+import os
+import threading
+import time
+
+import six
+
+from .files import replace_file
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+
+class K8sManifest(object):
+    """The k8smanifest json with its indexes.
+
+    Attributes
+    ----------
+    json : dict
+        The manifest, as returned by the API
+    version : str
+        The manifest version, from json['_version']
+    supported_versions : list[str]
+        The supported Kubernetes versions, in manifest order
+    """
+
+    def __init__(self, json):
+        """Index a k8smanifest.
+
+        Parameters
+        ----------
+        json : dict
+            The manifest, as returned by the API
+        """
+        self.json = json
+        self.version = json.get("_version")
+        self.supported_versions = list(json.get("supported_versions", []))
+        self._supported = frozenset(self.supported_versions)
+        self._addons = dict(
+            (version, info["addons"])
+            for (version, info) in json.get("version_info", {}).items()
+            if "addons" in info
+        )
+        self._addon_sets = dict(
+            (version, frozenset(addons))
+            for (version, addons) in self._addons.items()
+        )
+
+    def is_supported(self, k8s_version):
+        """Return True if the platform supports a Kubernetes version."""
+        return k8s_version in self._supported
+
+    def addons(self, k8s_version):
+        """Return the addons available for a Kubernetes version.
+
+        Raises
+        ------
+        KeyError
+            If the manifest does not list the addons of the version
+        """
+        return self._addons[k8s_version]
+
+    def unavailable_addons(self, k8s_version, addons):
+        """Return the addons that are not available for a version.
+
+        Parameters
+        ----------
+        k8s_version : str
+            The Kubernetes version
+        addons : list[str]
+            The addon names
+
+        Returns
+        -------
+        list[str]
+            The addons that the manifest does not list for the version.
+            Empty if the manifest does not list the addons of the version.
+        """
+        available = self._addon_sets.get(k8s_version)
+        if available is None:
+            return []
+        return [a for a in addons if a not in available]
+
+
+class K8sManifestCache(object):
+    """The k8smanifest of each platform, in memory and optionally on disk.
+
+    The entries are keyed by API host and platform version.  When the
+    platform version is not known, an entry expires after `max_age`
+    seconds; otherwise it is kept until the version changes, as the
+    manifest only changes when the platform is upgraded.
+
+    An instance of this class is created with
+    :py:meth:`ContainerPlatformClient.enable_k8s_manifest_cache
+    <hpecp.client.ContainerPlatformClient.enable_k8s_manifest_cache>`.
+    """
+
+    def __init__(self, path=None, max_age=3600, platform_version=None):
+        """Create a K8sManifestCache.
+
+        Parameters
+        ----------
+        path : str, optional
+            A json file to persist the manifests in, by default None (in
+            memory only)
+        max_age : int or float, optional
+            Seconds a manifest is kept for if the platform version is not
+            known, by default 3600
+        platform_version : str, optional
+            The platform version, e.g. '5.1', by default None (unknown)
+        """
+        assert max_age >= 0, "'max_age' must be >= 0"
+        self.path = None if path is None else os.path.expanduser(path)
+        self.max_age = max_age
+        self.platform_version = platform_version
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._indexed = {}
+        if self.path is not None and os.path.exists(self.path):
+            with io.open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def _key(self, api_host):
+        return "{}|{}".format(api_host, self.platform_version or "")
+
+    def peek(self, api_host):
+        """Return the cached manifest of a platform, None if not cached.
+
+        Parameters
+        ----------
+        api_host : str
+            The platform API host
+        """
+        key = self._key(api_host)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if (
+                self.platform_version is None
+                and time.time() - entry["fetched"] >= self.max_age
+            ):
+                _log.debug("k8smanifest cache expired: {}".format(key))
+                return None
+            if key not in self._indexed:
+                self._indexed[key] = K8sManifest(entry["manifest"])
+            return self._indexed[key]
+
+    def get(self, api_host, fetch):
+        """Return the manifest of a platform, fetching it if not cached.
+
+        Parameters
+        ----------
+        api_host : str
+            The platform API host
+        fetch : callable
+            Returns the manifest json from the API
+
+        Returns
+        -------
+        K8sManifest
+        """
+        manifest = self.peek(api_host)
+        if manifest is not None:
+            return manifest
+
+        manifest = K8sManifest(fetch())
+        key = self._key(api_host)
+        with self._lock:
+            self._entries[key] = {
+                "fetched": time.time(),
+                "manifest": manifest.json,
+            }
+            self._indexed[key] = manifest
+            self._save()
+        return manifest
+
+    def invalidate(self, api_host=None):
+        """Remove the manifest of a platform, or of all platforms."""
+        with self._lock:
+            if api_host is None:
+                self._entries.clear()
+                self._indexed.clear()
+            else:
+                key = self._key(api_host)
+                self._entries.pop(key, None)
+                self._indexed.pop(key, None)
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        # replace the file in one step, a concurrent reader never sees a
+        # partial file
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with io.open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(six.text_type(json.dumps(self._entries)))
+        replace_file(tmp_path, self.path)
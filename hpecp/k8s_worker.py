@@ -69,6 +69,12 @@ class WorkerK8s(AbstractResource):
         "ipaddr",
     ]
 
+    field_json_keys = {
+        "href": ["_links"],
+    }
+
+    indexed_fields = ["id", "status", "hostname", "ipaddr"]
+
     @property
     def worker_id(self):
         return int(self.json["_links"]["self"]["href"].split("/")[-1])
@@ -150,7 +156,9 @@ class K8sWorkerController(AbstractWaitableResourceController):
         )
         return CaseInsensitiveDict(response.headers)["location"]
 
-    def get(self, id, params=None, setup_log=False):
+    def get(
+        self, id, params=None, setup_log=False, fields=None, bypass_cache=False
+    ):
 
         if params is None:
             params = {}
@@ -158,7 +166,9 @@ class K8sWorkerController(AbstractWaitableResourceController):
         if setup_log is True:
             params["setup_log"] = "true"
 
-        return super(K8sWorkerController, self).get(id, params)
+        return super(K8sWorkerController, self).get(
+            id, params, fields, bypass_cache
+        )
 
     def set_storage(self, worker_id, ephemeral_disks=[], persistent_disks=[]):
         """Set storage for a k8s worker.
@@ -0,0 +1,356 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+"""Export one kubeconfig for many clusters.
+
+The `admin_kube_config` of the clusters are fetched with concurrent
+`get()` calls (see
+:py:meth:`.base_resource.AbstractResourceController.get_many`), parsed
+and merged into a single kubeconfig.  Identical clusters, users and
+contexts are written once; entries of different clusters that share a
+name are renamed with the cluster number, e.g. 'admin-12', and the
+contexts follow the renames.
+
+The file is written entry by entry to a temporary file that replaces the
+previous export.  A state file next to it records a digest and the
+merged entries of each cluster config, so the configs that have not
+changed since the last export are not parsed again, and the file is not
+rewritten at all when no config changed.
+
+Example
+-------
+>>> export = export_kubeconfig(
+...     client.k8s_cluster, "~/.kube/hpecp", where="status=ready"
+... )
+>>> export.written, export.changed
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import yaml
+
+from .files import replace_file
+from .logger import Logger
+from .where import Where
+
+_log = Logger.get_logger()
+
+SECTIONS = ["clusters", "users", "contexts"]
+"""The merged sections of a kubeconfig."""
+
+_STATE_VERSION = 1
+
+
+class KubeconfigExport(object):
+    """The outcome of :py:func:`export_kubeconfig`.
+
+    Attributes
+    ----------
+    path : str
+        The kubeconfig file
+    written : bool
+        False if the file was left as it was, because no config changed
+    changed : list[str]
+        The IDs of the clusters whose config was parsed
+    unchanged : list[str]
+        The IDs of the clusters whose config was reused from the last
+        export
+    failed : OrderedDict
+        The reason each cluster is not in the export, by ID
+    contexts : list[str]
+        The context names of the export
+    """
+
+    def __init__(self, path, written, changed, unchanged, failed, contexts):
+        """Create a KubeconfigExport, see the class attributes."""
+        self.path = path
+        self.written = written
+        self.changed = changed
+        self.unchanged = unchanged
+        self.failed = failed
+        self.contexts = contexts
+
+    def __repr__(self):
+        """Return a representation of the KubeconfigExport."""
+        return (
+            "<KubeconfigExport {} written:{} changed:{} unchanged:{} "
+            "failed:{}>".format(
+                self.path,
+                self.written,
+                len(self.changed),
+                len(self.unchanged),
+                len(self.failed),
+            )
+        )
+
+
+def parse_kubeconfig(text):
+    """Parse an `admin_kube_config`.
+
+    Parameters
+    ----------
+    text : str
+        The kubeconfig yaml, the newlines may be escaped as returned by
+        the API
+
+    Returns
+    -------
+    OrderedDict
+        The entries of each of :py:data:`SECTIONS`, and 'current-context'
+
+    Raises
+    ------
+    ValueError
+        If the text is not a kubeconfig
+    """
+    try:
+        config = yaml.safe_load(text.replace("\\n", "\n"))
+    except yaml.YAMLError as e:
+        raise ValueError("Invalid kubeconfig: {}".format(e))
+    if not isinstance(config, dict) or not config.get("contexts"):
+        raise ValueError("Invalid kubeconfig: no contexts")
+    parsed = OrderedDict(
+        (section, list(config.get(section) or [])) for section in SECTIONS
+    )
+    parsed["current-context"] = config.get("current-context")
+    return parsed
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _suffix(id):
+    return id.rstrip("/").split("/")[-1]
+
+
+class _Merger(object):
+    """Merge the entries of many kubeconfigs, renaming conflicts."""
+
+    def __init__(self):
+        self.entries = OrderedDict(
+            (section, OrderedDict()) for section in SECTIONS
+        )
+
+    def _add(self, section, entry, suffix):
+        """Add an entry, return the name it was added with."""
+        entries = self.entries[section]
+        name = entry["name"]
+        if name in entries and entries[name] != entry:
+            name = "{}-{}".format(entry["name"], suffix)
+            entry = dict(entry, name=name)
+        entries[name] = entry
+        return name
+
+    def add(self, id, config):
+        """Add the entries of the config of a cluster."""
+        suffix = _suffix(id)
+        renames = {}
+        for section in ["clusters", "users"]:
+            renames[section] = dict(
+                (entry["name"], self._add(section, entry, suffix))
+                for entry in config[section]
+            )
+        for entry in config["contexts"]:
+            context = dict(entry.get("context") or {})
+            for (field, section) in [
+                ("cluster", "clusters"),
+                ("user", "users"),
+            ]:
+                if field in context:
+                    context[field] = renames[section].get(
+                        context[field], context[field]
+                    )
+            self._add("contexts", dict(entry, context=context), suffix)
+
+    def write(self, stream, current_context):
+        """Write the merged kubeconfig, one entry at a time."""
+        stream.write("apiVersion: v1\nkind: Config\npreferences: {}\n")
+        stream.write(
+            yaml.safe_dump(
+                {"current-context": current_context},
+                default_flow_style=False,
+            )
+        )
+        for section in SECTIONS:
+            entries = self.entries[section]
+            if not entries:
+                stream.write("{}: []\n".format(section))
+                continue
+            stream.write("{}:\n".format(section))
+            for entry in entries.values():
+                yaml.safe_dump([entry], stream, default_flow_style=False)
+
+
+def _load_state(state_path):
+    """Return the cluster IDs and the configs of the last export."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (IOError, OSError, ValueError):
+        return ([], {})
+    if state.get("version") != _STATE_VERSION:
+        return ([], {})
+    return (state["ids"], state["clusters"])
+
+
+def _replace(path, write):
+    """Write a file through a temporary file renamed over it.
+
+    The file holds credentials, so it is only ever readable by the user.
+    """
+    tmp = "{}.tmp.{}".format(path, os.getpid())
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            write(f)
+        replace_file(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def export_kubeconfig(
+    controller,
+    path,
+    ids=None,
+    where=None,
+    state_path=None,
+    max_workers=8,
+    force=False,
+):
+    """Export the admin kubeconfig of many clusters to one file.
+
+    Parameters
+    ----------
+    controller : K8sClusterController
+        e.g. `client.k8s_cluster`
+    path : str
+        The kubeconfig file to write
+    ids : list[str], optional
+        The cluster IDs, by default all the clusters
+    where : str, optional
+        Only export the clusters matching this filter expression, see
+        :py:mod:`hpecp.where`
+    state_path : str, optional
+        The state file of the export, by default `path` + '.state'
+    max_workers : int, optional
+        The maximum number of concurrent gets, by default 8
+    force : bool, optional
+        Parse every config and write the file even if no config changed,
+        by default False
+
+    Returns
+    -------
+    KubeconfigExport
+    """
+    path = os.path.expanduser(path)
+    if state_path is None:
+        state_path = path + ".state"
+    if where is not None and not isinstance(where, Where):
+        where = Where(where, controller.resource_class)
+
+    if ids is None or where is not None:
+        fields = ["id"] + ([] if where is None else where.fields)
+        clusters = controller.list(fields=fields, bypass_cache=True)
+        if where is not None:
+            clusters = clusters.filter(where)
+        selected = [c.id for c in clusters]
+        if ids is not None:
+            selected = [id for id in ids if id in set(selected)]
+        ids = selected
+
+    # the list response does not reliably include admin_kube_config
+    (clusters, not_found) = controller.get_many(
+        ids,
+        max_workers=max_workers,
+        fields=["id", "admin_kube_config"],
+        bypass_cache=True,
+        use_list=False,
+    )
+    (previous_ids, previous) = ([], {}) if force else _load_state(state_path)
+
+    failed = OrderedDict((id, "not found") for id in not_found)
+    state = OrderedDict()
+    changed = []
+    unchanged = []
+    for id in ids:
+        if id not in clusters:
+            continue
+        text = clusters[id].admin_kube_config
+        if not text:
+            failed[id] = "no admin_kube_config"
+            continue
+        digest = _digest(text)
+        if previous.get(id, {}).get("digest") == digest:
+            state[id] = previous[id]
+            unchanged.append(id)
+            continue
+        try:
+            config = parse_kubeconfig(text)
+        except ValueError as e:
+            failed[id] = str(e)
+            continue
+        state[id] = dict(config.items(), digest=digest)
+        changed.append(id)
+
+    merger = _Merger()
+    for (id, config) in state.items():
+        merger.add(id, config)
+    contexts = list(merger.entries["contexts"])
+
+    written = bool(
+        force
+        or changed
+        or list(state) != previous_ids
+        or not os.path.exists(path)
+    )
+    if written:
+        current_context = None
+        if state:
+            current_context = next(iter(state.values()))["current-context"]
+        if current_context not in contexts:
+            current_context = contexts[0] if contexts else None
+        _replace(path, lambda f: merger.write(f, current_context))
+        _replace(
+            state_path,
+            lambda f: json.dump(
+                {
+                    "version": _STATE_VERSION,
+                    "ids": list(state),
+                    "clusters": state,
+                },
+                f,
+            ),
+        )
+    _log.debug(
+        "export_kubeconfig: {} changed, {} unchanged, {} failed".format(
+            len(changed), len(unchanged), len(failed)
+        )
+    )
+    return KubeconfigExport(
+        path, written, changed, unchanged, failed, contexts
+    )
@@ -26,6 +26,7 @@ import polling
 from requests.structures import CaseInsensitiveDict
 
 from .logger import Logger
+from .poll_schedule import PollSchedule
 
 _log = Logger.get_logger()
 
@@ -36,6 +37,11 @@ except NameError:
 
 
 class LockController:
+
+    poll_schedule = PollSchedule(initial=1, factor=2, max_step=10)
+    """The :py:class:`.poll_schedule.PollSchedule` used while waiting for
+    the platform to quiesce and for internal locks to clear."""
+
     def __init__(self, client):
         self.client = client
 
@@ -87,12 +93,7 @@ class LockController:
                     )
                     return locked and quiesced
 
-                polling.poll(
-                    lambda: poll(),
-                    step=10,
-                    poll_forever=False,
-                    timeout=timeout_secs,
-                )
+                self.poll_schedule.poll(poll, timeout_secs)
                 return lock_id
             except polling.TimeoutException:
                 return False
@@ -137,11 +138,9 @@ class LockController:
         """
 
         try:
-            polling.poll(
+            self.poll_schedule.poll(
                 lambda: len(self.get()["_embedded"]["internal_locks"]) == 0,
-                step=10,
-                poll_forever=False,
-                timeout=timeout_secs,
+                timeout_secs,
             )
         except polling.TimeoutException:
             return False
@@ -0,0 +1,370 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Handles for long running operations and the poller that services them."""
+
+from __future__ import absolute_import
+
+import threading
+import time
+from enum import Enum
+
+from .exceptions import OperationCancelledException, OperationTimeoutException
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+
+class WaitOutcome(Enum):
+    """The outcome of a wait for a resource status.
+
+    The outcome for each resource of
+    :py:meth:`.base_resource.AbstractWaitableResourceController.wait_for_status_many`
+    and of an :py:class:`Operation`.
+
+    Bases: enum.Enum
+    """  # noqa: E501
+
+    reached = 1
+    """The resource reached one of the requested statuses."""
+    error = 2
+    """The resource reached an error status, or the check of an
+    :py:class:`Operation` raised an exception."""
+    timeout = 3
+    """The requested statuses were not reached before the timeout."""
+    disappeared = 4
+    """The resource no longer exists."""
+    pending = 5
+    """Not resolved, because the wait exited early on an error or was not
+    requested."""
+
+
+class Operation(object):
+    """Handle for a long running operation, e.g. a cluster create.
+
+    The operation is done when the resource reaches one of the requested
+    statuses, an error status, disappears or the timeout expires.  The
+    outcome is a :py:class:`WaitOutcome`.
+
+    Users will normally retrieve an Operation by passing
+    `as_operation=True` to a controller method, or with
+    :py:meth:`.base_resource.AbstractWaitableResourceController.operation`.
+
+    Example
+    -------
+    >>> op = client.k8s_cluster.create(..., as_operation=True)
+    >>> op.add_done_callback(lambda op: print(op.id, op.result().name))
+    >>> op.result(timeout=3600)
+    <WaitOutcome.reached: 1>
+    """
+
+    def __init__(
+        self,
+        controller,
+        id,
+        status=[],
+        timeout_secs=1200,
+        error_status=None,
+        check=None,
+        fields=None,
+    ):
+        """Create an Operation.  Use the controller to create instances.
+
+        Parameters
+        ----------
+        controller : AbstractWaitableResourceController
+            The controller of the resource
+        id : str
+            The resource ID
+        status : list
+            Status(es) that complete the operation, empty if the operation
+            completes when the resource is deleted
+        timeout_secs : int, optional
+            Seconds after which the outcome is `WaitOutcome.timeout`
+        error_status : list, optional
+            Statuses that fail the operation, by default the statuses with
+            'error' in their name
+        check : callable, optional
+            Called with the listed resource when it has a requested status,
+            the operation only completes if it returns True.  Use it when
+            the resource still has the requested status before the change
+            starts, e.g. a cluster is 'ready' until its upgrade begins.
+            If it raises, the outcome is `WaitOutcome.error`.
+        fields : list, optional
+            The fields read by check, listed in addition to the status
+        """
+        if error_status is None:
+            error_status = [
+                s for s in controller.status_class if "error" in s.name
+            ]
+
+        self.controller = controller
+        self.id = id
+        self.status = status
+        self.error_status = error_status
+        self.check = check
+        self.fields = fields or []
+        self.deadline = time.time() + timeout_secs
+
+        # scheduling state, only used by the OperationPoller
+        self.next_poll = time.time()
+        self._steps = None
+
+        self._outcome = None
+        self._cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def done(self):
+        """Return True if the operation has completed or was cancelled."""
+        return self._done.is_set()
+
+    def cancelled(self):
+        """Return True if the operation was cancelled."""
+        return self._cancelled
+
+    def cancel(self):
+        """Stop tracking the operation.
+
+        The operation continues on the platform, only the local tracking
+        stops.
+
+        Returns
+        -------
+        bool
+            False if the operation had already completed
+        """
+        return self._finish(None, cancelled=True)
+
+    def result(self, timeout=None):
+        """Wait for the operation to complete.
+
+        Parameters
+        ----------
+        timeout : int or float, optional
+            Seconds to wait, by default wait until the operation completes
+
+        Returns
+        -------
+        WaitOutcome
+            The outcome of the operation
+
+        Raises
+        ------
+        OperationTimeoutException
+            If the operation did not complete within timeout seconds
+        OperationCancelledException
+            If the operation was cancelled
+        """
+        if not self._done.wait(timeout):
+            raise OperationTimeoutException(
+                "Operation on {} did not complete in {}s".format(
+                    self.id, timeout
+                )
+            )
+        if self._cancelled:
+            raise OperationCancelledException(
+                "Operation on {} was cancelled".format(self.id)
+            )
+        return self._outcome
+
+    def add_done_callback(self, fn):
+        """Call fn with this operation when it completes or is cancelled.
+
+        If the operation is already done, fn is called immediately.
+        Otherwise it is called from the poller's background thread.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        self._call(fn)
+
+    def _finish(self, outcome, cancelled=False):
+        """Complete the operation, return False if it was already done."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._outcome = outcome
+            self._cancelled = cancelled
+            self._done.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        _log.debug(
+            "Operation on {} done: {}".format(
+                self.id, "cancelled" if cancelled else outcome
+            )
+        )
+        for fn in callbacks:
+            self._call(fn)
+        return True
+
+    def _call(self, fn):
+        try:
+            fn(self)
+        except Exception as e:
+            _log.error("Operation callback {} failed: {}".format(fn, e))
+
+    def _check(self, resources, now):
+        """Update the operation from the listed resources, keyed by id."""
+        resource = resources.get(self.id)
+        status = None
+        if resource is not None:
+            status = getattr(resource, self.controller.status_fieldname)
+        outcome = self.controller._wait_outcome(
+            status,
+            resource is not None,
+            [s.name for s in self.status],
+            [s.name for s in self.error_status],
+            complete=resource is None
+            or self.check is None
+            or self.check(resource),
+        )
+        if outcome is not None:
+            self._finish(outcome)
+            return
+
+        if now >= self.deadline:
+            self._finish(WaitOutcome.timeout)
+            return
+
+        if self._steps is None:
+            # the schedule is chosen for the transition from the first
+            # status that was seen
+            self._steps = self.controller.get_poll_schedule(
+                status, self.status
+            ).steps()
+        self.next_poll = min(now + next(self._steps), self.deadline)
+
+    def __repr__(self):
+        """Return a representation of the Operation and its state."""
+        if self._cancelled:
+            state = "cancelled"
+        elif self.done():
+            state = self._outcome.name
+        else:
+            state = "pending"
+        return "Operation(id={}, {})".format(self.id, state)
+
+
+class OperationPoller(object):
+    """Track many :py:class:`Operation` with one background thread.
+
+    On each tick the operations that are due are grouped by controller and
+    each controller's collection is listed once, so the number of API
+    calls and threads does not grow with the number of operations.
+
+    The thread is started when an operation is submitted and exits when
+    there are no outstanding operations.  An instance is available in the
+    client as `client.operation_poller`.
+    """
+
+    def __init__(self):
+        """Create an OperationPoller."""
+        self._operations = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, operation):
+        """Start tracking an operation.
+
+        Returns
+        -------
+        Operation
+            The operation
+        """
+        with self._condition:
+            self._operations.append(operation)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="OperationPoller"
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify_all()
+        return operation
+
+    def pending(self):
+        """Return the operations that are not done."""
+        with self._condition:
+            return [op for op in self._operations if not op.done()]
+
+    def _due(self):
+        """Wait for operations to become due, None when there are none."""
+        with self._condition:
+            while True:
+                self._operations = [
+                    op for op in self._operations if not op.done()
+                ]
+                if len(self._operations) == 0:
+                    self._thread = None
+                    return None
+                now = time.time()
+                due = [op for op in self._operations if op.next_poll <= now]
+                if due:
+                    return due
+                next_poll = min(op.next_poll for op in self._operations)
+                self._condition.wait(next_poll - now)
+
+    def _run(self):
+        while True:
+            due = self._due()
+            if due is None:
+                return
+
+            by_controller = {}
+            for op in due:
+                by_controller.setdefault(id(op.controller), []).append(op)
+
+            for operations in by_controller.values():
+                self._poll(operations[0].controller, operations)
+
+    def _poll(self, controller, operations):
+        fields = ["id", controller.status_fieldname]
+        for op in operations:
+            fields += [f for f in op.fields if f not in fields]
+        try:
+            resources = controller.list(fields=fields, bypass_cache=True)
+        except Exception as e:
+            # keep the operations and retry with their schedule
+            _log.warning("OperationPoller list failed: {}".format(e))
+            resources = None
+
+        now = time.time()
+        if resources is not None:
+            resources = dict((r.id, r) for r in resources)
+
+        for op in operations:
+            if op.done():
+                continue
+            try:
+                if resources is None:
+                    op.next_poll = min(
+                        now + controller.poll_schedule.max_step, op.deadline
+                    )
+                    if now >= op.deadline:
+                        op._finish(WaitOutcome.timeout)
+                else:
+                    op._check(resources, now)
+            except Exception as e:
+                # e.g. the check of the operation raised
+                _log.error("Operation on {} failed: {}".format(op.id, e))
+                op._finish(WaitOutcome.error)
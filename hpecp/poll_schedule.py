@@ -0,0 +1,147 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Poll schedules used by the library's wait methods."""
+
+from __future__ import absolute_import
+
+import random
+import time
+
+import polling
+
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+
+class PollSchedule(object):
+    """The delays between the polls of a wait.
+
+    The first poll is made immediately, the next after `initial` seconds
+    and each following delay is `factor` times the previous one, up to
+    `max_step` seconds.  Each delay is randomly varied by up to
+    +/- `jitter` (a fraction of the delay) so that many clients waiting
+    on the same platform do not poll in lock step.
+
+    The controllers define a default schedule in their `poll_schedule`
+    attribute that can be replaced per client, e.g.
+
+    >>> client.k8s_cluster.poll_schedule = PollSchedule(
+    ...     initial=10, factor=2, max_step=60)
+
+    Use `factor=1, jitter=0` for a fixed interval.
+    """
+
+    def __init__(self, initial=1, factor=2, max_step=10, jitter=0.1):
+        """Create a PollSchedule.
+
+        Parameters
+        ----------
+        initial : int or float, optional
+            Seconds before the second poll, by default 1
+        factor : int or float, optional
+            Multiplier applied to each following delay, by default 2
+        max_step : int or float, optional
+            The maximum delay in seconds, by default 10
+        jitter : float, optional
+            Random variation of each delay as a fraction of the delay,
+            between 0 and 1, by default 0.1
+        """
+        assert initial > 0, "'initial' must be > 0"
+        assert factor >= 1, "'factor' must be >= 1"
+        assert max_step >= initial, "'max_step' must be >= 'initial'"
+        assert 0 <= jitter <= 1, "'jitter' must be between 0 and 1"
+
+        self.initial = initial
+        self.factor = factor
+        self.max_step = max_step
+        self.jitter = jitter
+
+    def steps(self):
+        """Yield the delay before each poll after the first one."""
+        step = self.initial
+        while True:
+            if self.jitter:
+                yield step * (1 + random.uniform(-self.jitter, self.jitter))
+            else:
+                yield step
+            step = min(step * self.factor, self.max_step)
+
+    def poll(self, target, timeout_secs, started=None, delay_first=False):
+        """Call target until it returns a truthy value.
+
+        Parameters
+        ----------
+        target : callable
+            Called without arguments
+        timeout_secs : int or float
+            Seconds after which polling stops.  The target is always
+            called at least once, even if timeout_secs is 0.
+        started : float, optional
+            `time.time()` when the wait started, if checks were made
+            before calling this method, by default now
+        delay_first : bool, optional
+            Wait for the first step before the first call, by default
+            False.  Used when the caller has already made the first check.
+
+        Returns
+        -------
+        obj
+            The truthy value returned by target
+
+        Raises
+        ------
+        polling.TimeoutException
+            If target did not return a truthy value before timeout_secs
+        """
+        assert timeout_secs >= 0, "'timeout_secs' must be >= 0"
+
+        deadline = (time.time() if started is None else started) + timeout_secs
+        steps = self.steps()
+        value = None
+
+        if delay_first:
+            if not self._sleep(next(steps), deadline):
+                raise polling.TimeoutException(None, last=value)
+
+        while True:
+            value = target()
+            if value:
+                return value
+            if not self._sleep(next(steps), deadline):
+                raise polling.TimeoutException(None, last=value)
+
+    @staticmethod
+    def _sleep(step, deadline):
+        """Sleep for step, or until the deadline; False if it has passed."""
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        step = min(step, remaining)
+        _log.debug("Polling again in {:.1f}s".format(step))
+        time.sleep(step)
+        return True
+
+    def __repr__(self):
+        """Return a representation of the PollSchedule."""
+        return (
+            "PollSchedule(initial={}, factor={}, max_step={}, jitter={})"
+        ).format(self.initial, self.factor, self.max_step, self.jitter)
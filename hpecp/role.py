@@ -59,6 +59,11 @@ class Role(AbstractResource):
         "description",
     ]
 
+    field_json_keys = {
+        "name": ["label"],
+        "description": ["label"],
+    }
+
     @property
     def id(self):
         """@Field: from json['_links']['self']['href'] - id format:
@@ -0,0 +1,798 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Point-in-time snapshots of the platform inventory.
+
+A snapshot file holds a header followed by one section per collection
+(the name of the client property, e.g. 'k8s_cluster').  Each section
+starts with the number of records it contains, so a reader can skip the
+sections it does not need without decoding them.
+
+Three formats are supported:
+
+* ``jsonl``: optionally gzip compressed, one json document per line -
+  the header, then for each section a
+  ``{"collection": ..., "count": ...}`` line followed by one line per
+  record.
+* ``binary``: optionally gzip compressed, the magic bytes ``HPECPSNP``
+  followed by frames of a one byte kind, a four byte big-endian length
+  and a compact json payload.
+* ``indexed``: never compressed, so that it can be memory-mapped.  The
+  magic bytes ``HPECPIDX`` are followed by the compact json records of
+  each section, the table of their offsets (big-endian unsigned 64 bit
+  integers), the json list of their IDs and, for the collections of
+  :py:data:`RESOURCE_CLASSES`, one json list per field of the resource
+  class' `all_fields`.  The file ends with a json index of the header and
+  the position of each section's blocks, and a trailer holding the
+  position of the index and the magic bytes.  A single record or field
+  column is read without decoding the rest of the file.
+"""
+
+from __future__ import absolute_import
+
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .base_resource import ResourceList
+from .catalog import Catalog
+from .datatap import Datatap
+from .diff import (
+    compared_fields,
+    diff_resource_lists,
+    diff_values,
+    field_values,
+)
+from .epic_worker import WorkerEpic
+from .files import replace_file
+from .gateway import Gateway
+from .k8s_cluster import K8sCluster
+from .k8s_worker import WorkerK8s
+from .logger import Logger
+from .role import Role
+from .tenant import Tenant
+from .user import User
+
+_log = Logger.get_logger()
+
+SNAPSHOT_FORMAT_VERSION = 1
+"""The version written in the header of new snapshots."""
+
+RESOURCE_CLASSES = OrderedDict(
+    [
+        ("tenant", Tenant),
+        ("k8s_cluster", K8sCluster),
+        ("k8s_worker", WorkerK8s),
+        ("epic_worker", WorkerEpic),
+        ("gateway", Gateway),
+        ("user", User),
+        ("role", Role),
+        ("catalog", Catalog),
+        ("datatap", Datatap),
+    ]
+)
+"""The resource class of each snapshot collection that holds resources."""
+
+COLLECTIONS = list(RESOURCE_CLASSES.keys()) + ["lock"]
+"""The collections exported by default.  The 'lock' collection holds the
+single json document returned by :py:meth:`.lock.LockController.list`."""
+
+FORMATS = ["jsonl", "binary", "indexed"]
+
+_MAGIC = b"HPECPSNP"
+
+_INDEXED_MAGIC = b"HPECPIDX"
+
+_TRAILER = struct.Struct(">Q8s")
+
+_OFFSET = struct.Struct(">Q")
+
+_FRAME = struct.Struct(">BI")
+
+_HEADER = 0
+_SECTION = 1
+_RECORD = 2
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _encode(value):
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(data):
+    return json.loads(data.decode("utf-8"))
+
+
+class SnapshotWriter(object):
+    """Write a snapshot file one record at a time.
+
+    The "jsonl" and "binary" formats hold only the record being written
+    in memory.  The "indexed" format also buffers the field columns of
+    the current section, for the collections of
+    :py:data:`RESOURCE_CLASSES`, until the section ends.  The file is
+    written to a temporary path that is renamed to `path` by
+    :py:meth:`close`, so a failed export never leaves a partial snapshot
+    behind.
+
+    Example
+    -------
+    >>> with SnapshotWriter("inventory.jsonl.gz") as writer:
+    ...     writer.write_collection("k8s_cluster", clusters.json)
+    """
+
+    def __init__(self, path, format="jsonl", compress=None, metadata=None):
+        """Create a snapshot file.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot file path
+        format : str, optional
+            "jsonl", "binary" or "indexed", by default "jsonl"
+        compress : bool, optional
+            gzip the file, by default True except for the "indexed"
+            format, which can not be compressed
+        metadata : dict, optional
+            Additional values for the snapshot header
+        """
+        assert format in FORMATS, "'format' must be one of {}".format(FORMATS)
+        assert metadata is None or isinstance(
+            metadata, dict
+        ), "'metadata' must be a dict"
+        if compress is None:
+            compress = format != "indexed"
+        assert not (
+            compress and format == "indexed"
+        ), "'indexed' snapshots can not be compressed"
+
+        self.path = path
+        self.format = format
+        self._tmp_path = path + ".tmp"
+        if compress:
+            self._file = gzip.open(self._tmp_path, "wb")
+        else:
+            self._file = io.open(self._tmp_path, "wb")
+
+        self.header = OrderedDict(
+            [
+                ("format", "hpecp-snapshot"),
+                ("version", SNAPSHOT_FORMAT_VERSION),
+                ("created", time.time()),
+            ]
+        )
+        self.header.update(metadata or {})
+
+        if format == "indexed":
+            # the header is written in the index, by close()
+            self._file.write(_INDEXED_MAGIC)
+            self._sections = []
+        else:
+            if format == "binary":
+                self._file.write(_MAGIC)
+            self._write(_HEADER, self.header)
+
+        self.counts = OrderedDict()
+        self._remaining = 0
+
+    def _write(self, kind, value):
+        data = _encode(value)
+        if self.format == "binary":
+            self._file.write(_FRAME.pack(kind, len(data)))
+            self._file.write(data)
+        else:
+            self._file.write(data)
+            self._file.write(b"\n")
+
+    def begin_collection(self, name, count):
+        """Start a collection section of `count` records."""
+        assert (
+            self._remaining == 0
+        ), "The previous collection is missing {} records".format(
+            self._remaining
+        )
+        assert name not in self.counts, "Duplicate collection '{}'".format(
+            name
+        )
+        section = OrderedDict([("collection", name), ("count", count)])
+        self.counts[name] = count
+        self._remaining = count
+        if self.format != "indexed":
+            self._write(_SECTION, section)
+            return
+
+        self._section = section
+        self._offsets = []
+        self._ids = []
+        self._fields = []
+        if name in RESOURCE_CLASSES:
+            self._fields = list(RESOURCE_CLASSES[name].all_fields)
+        self._columns = [[] for _ in self._fields]
+        if count == 0:
+            self._end_section()
+
+    def write_record(self, record):
+        """Write a record of the current collection."""
+        assert self._remaining > 0, "No collection records are expected"
+        self._remaining -= 1
+        if self.format != "indexed":
+            self._write(_RECORD, record)
+            return
+
+        self._offsets.append(self._file.tell())
+        self._file.write(_encode(record))
+        self._ids.append(record.get("_links", {}).get("self", {}).get("href"))
+        if self._fields:
+            resource = RESOURCE_CLASSES[self._section["collection"]](record)
+            values = field_values(resource, self._fields)
+            for (column, value) in zip(self._columns, values):
+                column.append(value)
+        if self._remaining == 0:
+            self._end_section()
+
+    def _write_block(self, value):
+        """Write a json block, return its [position, length]."""
+        position = self._file.tell()
+        data = _encode(value)
+        self._file.write(data)
+        return [position, len(data)]
+
+    def _end_section(self):
+        """Write the offsets, IDs and field columns of an indexed section."""
+        section = self._section
+        self._offsets.append(self._file.tell())
+        section["offsets"] = self._file.tell()
+        for offset in self._offsets:
+            self._file.write(_OFFSET.pack(offset))
+        section["ids"] = self._write_block(self._ids)
+        section["columns"] = OrderedDict(
+            (field, self._write_block(column))
+            for (field, column) in zip(self._fields, self._columns)
+        )
+        self._sections.append(section)
+        self._section = self._offsets = self._ids = self._columns = None
+
+    def write_collection(self, name, records):
+        """Write a collection section.
+
+        Parameters
+        ----------
+        name : str
+            The collection name
+        records : list
+            The json of each record
+        """
+        self.begin_collection(name, len(records))
+        for record in records:
+            self.write_record(record)
+
+    def close(self):
+        """Complete the snapshot file."""
+        assert (
+            self._remaining == 0
+        ), "The last collection is missing {} records".format(self._remaining)
+        if self.format == "indexed":
+            position = self._file.tell()
+            self._file.write(
+                _encode(
+                    OrderedDict(
+                        [("header", self.header), ("sections", self._sections)]
+                    )
+                )
+            )
+            self._file.write(_TRAILER.pack(position, _INDEXED_MAGIC))
+        self._file.close()
+        replace_file(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard the snapshot file."""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer, or discard the file if an error was raised."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _fetch(client, collection):
+    if collection == "lock":
+        return [client.lock.list()]
+    controller = getattr(client, collection)
+    return controller.list(bypass_cache=True).json
+
+
+def export_snapshot(
+    client,
+    path,
+    collections=None,
+    format="jsonl",
+    compress=None,
+    max_workers=4,
+):
+    """Export the platform inventory to a snapshot file.
+
+    The collections are listed concurrently and each one is written as
+    soon as it has been retrieved, then released.
+
+    Parameters
+    ----------
+    client : ContainerPlatformClient
+        An authenticated client
+    path : str
+        The snapshot file path
+    collections : list[str], optional
+        The collections to export, by default :py:data:`COLLECTIONS`
+    format : str, optional
+        "jsonl", "binary" or "indexed", by default "jsonl"
+    compress : bool, optional
+        gzip the file, by default True except for the "indexed" format
+    max_workers : int, optional
+        Maximum number of concurrent list requests, by default 4
+
+    Returns
+    -------
+    OrderedDict
+        The number of records of each collection, in file order
+
+    Example
+    -------
+    >>> export_snapshot(client, "inventory-20201019.jsonl.gz")
+    """
+    if collections is None:
+        collections = COLLECTIONS
+    assert isinstance(collections, list), "'collections' must be a list"
+    for collection in collections:
+        assert (
+            collection in COLLECTIONS
+        ), "Unknown collection '{}', must be one of {}".format(
+            collection, COLLECTIONS
+        )
+    assert (
+        isinstance(max_workers, int) and max_workers > 0
+    ), "'max_workers' must be an int > 0"
+
+    metadata = {"api_host": client.api_host, "collections": collections}
+    with SnapshotWriter(path, format, compress, metadata) as writer:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = dict(
+                (executor.submit(_fetch, client, collection), collection)
+                for collection in collections
+            )
+            for future in as_completed(futures):
+                collection = futures.pop(future)
+                writer.write_collection(collection, future.result())
+                _log.debug(
+                    "Snapshot: wrote {} {} records".format(
+                        writer.counts[collection], collection
+                    )
+                )
+        return writer.counts
+
+
+class Snapshot(object):
+    """A snapshot file opened for reading.
+
+    Opening a snapshot only decodes the header and the section headers;
+    the records of a collection are decoded when they are requested.  An
+    "indexed" snapshot is memory-mapped and its records and field columns
+    are read directly at their offsets.
+
+    Example
+    -------
+    >>> snapshot = Snapshot("inventory.jsonl.gz")
+    >>> snapshot.counts
+    OrderedDict([('tenant', 3), ('k8s_cluster', 40), ...])
+    >>> ready = snapshot.resources("k8s_cluster").filter("status=ready")
+    >>> with Snapshot("inventory-20201019.idx") as snapshot:
+    ...     statuses = snapshot.column("k8s_worker", "status")
+    """
+
+    def __init__(self, path):
+        """Open a snapshot file.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot file path
+
+        Raises
+        ------
+        AssertionError
+            If the file is not a snapshot or its version is not supported
+        """
+        self.path = path
+
+        with io.open(path, "rb") as f:
+            magic = f.read(len(_INDEXED_MAGIC))
+        self.compressed = magic[: len(_GZIP_MAGIC)] == _GZIP_MAGIC
+
+        self.counts = OrderedDict()
+        self._offsets = {}
+        self._mmap = None
+
+        if magic == _INDEXED_MAGIC:
+            self.format = "indexed"
+            self._open_index()
+            return
+
+        with self._open() as f:
+            self.format = "binary" if f.read(8) == _MAGIC else "jsonl"
+            if self.format == "jsonl":
+                f.seek(0)
+
+            (kind, header) = self._read(f)
+            self._check_header(kind, header)
+            self.header = header
+
+            while True:
+                (kind, section) = self._read(f)
+                if kind is None:
+                    break
+                assert kind == _SECTION, "Corrupt snapshot '{}'".format(path)
+                self.counts[section["collection"]] = section["count"]
+                self._offsets[section["collection"]] = f.tell()
+                for _ in range(section["count"]):
+                    self._skip(f)
+
+    def _check_header(self, kind, header):
+        assert (
+            kind == _HEADER
+            and isinstance(header, dict)
+            and header.get("format") == "hpecp-snapshot"
+        ), "'{}' is not a snapshot file".format(self.path)
+        assert (
+            header["version"] <= SNAPSHOT_FORMAT_VERSION
+        ), "Unsupported snapshot version {}, the latest is {}".format(
+            header["version"], SNAPSHOT_FORMAT_VERSION
+        )
+
+    def _open_index(self):
+        """Map an indexed snapshot and decode its index."""
+        with io.open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = len(self._mmap) - _TRAILER.size
+        assert end >= len(_INDEXED_MAGIC), "Corrupt snapshot '{}'".format(
+            self.path
+        )
+        (position, magic) = _TRAILER.unpack_from(self._mmap, end)
+        assert magic == _INDEXED_MAGIC, "Corrupt snapshot '{}'".format(
+            self.path
+        )
+        index = _decode(self._mmap[position:end])
+        self._check_header(_HEADER, index["header"])
+        self.header = index["header"]
+        self._sections = {}
+        for section in index["sections"]:
+            self.counts[section["collection"]] = section["count"]
+            self._offsets[section["collection"]] = section["offsets"]
+            self._sections[section["collection"]] = section
+        self._positions = {}
+
+    def close(self):
+        """Release the memory map of an indexed snapshot."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        """Return the snapshot."""
+        return self
+
+    def __exit__(self, *args):
+        """Release the memory map of an indexed snapshot."""
+        self.close()
+
+    @property
+    def version(self):
+        """The snapshot format version."""
+        return self.header["version"]
+
+    @property
+    def created(self):
+        """The time the snapshot was created, in seconds since the epoch."""
+        return self.header["created"]
+
+    @property
+    def collections(self):
+        """The collection names, in file order."""
+        return list(self.counts.keys())
+
+    def age(self):
+        """Return the number of seconds since the snapshot was created."""
+        return time.time() - self.created
+
+    def _open(self):
+        if self.compressed:
+            return gzip.open(self.path, "rb")
+        return io.open(self.path, "rb")
+
+    def _read(self, f):
+        """Return the next (kind, value), (None, None) at the end."""
+        if self.format == "binary":
+            frame = f.read(_FRAME.size)
+            if len(frame) < _FRAME.size:
+                return (None, None)
+            (kind, length) = _FRAME.unpack(frame)
+            return (kind, _decode(f.read(length)))
+
+        line = f.readline()
+        if not line:
+            return (None, None)
+        value = _decode(line)
+        if isinstance(value, dict) and value.get("format") == "hpecp-snapshot":
+            return (_HEADER, value)
+        return (_SECTION, value)
+
+    def _skip(self, f):
+        """Skip the next record without decoding it."""
+        if self.format == "binary":
+            (_, length) = _FRAME.unpack(f.read(_FRAME.size))
+            f.seek(length, io.SEEK_CUR)
+        else:
+            f.readline()
+
+    def records(self, collection):
+        """Return a generator of the json records of a collection.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name
+        """
+        self._check_collection(collection)
+
+        if self.format == "indexed":
+            for position in range(self.counts[collection]):
+                yield self.record(collection, position)
+            return
+
+        with self._open() as f:
+            f.seek(self._offsets[collection])
+            for _ in range(self.counts[collection]):
+                if self.format == "binary":
+                    (_, length) = _FRAME.unpack(f.read(_FRAME.size))
+                    yield _decode(f.read(length))
+                else:
+                    yield _decode(f.readline())
+
+    def _check_collection(self, collection):
+        assert (
+            collection in self.counts
+        ), "Collection '{}' is not in the snapshot".format(collection)
+
+    def _block(self, location):
+        (position, length) = location
+        end = position + length
+        return _decode(self._mmap[position:end])
+
+    def record(self, collection, position):
+        """Return the json record at a position of a collection.
+
+        Only an "indexed" snapshot reads the record directly, the other
+        formats read the preceding records of the collection.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name
+        position : int
+            The position of the record in the collection
+        """
+        self._check_collection(collection)
+        assert (
+            0 <= position < self.counts[collection]
+        ), "'position' must be between 0 and {}".format(
+            self.counts[collection] - 1
+        )
+        if self.format != "indexed":
+            for (i, record) in enumerate(self.records(collection)):
+                if i == position:
+                    return record
+
+        offsets = self._offsets[collection] + position * _OFFSET.size
+        (start,) = _OFFSET.unpack_from(self._mmap, offsets)
+        (end,) = _OFFSET.unpack_from(self._mmap, offsets + _OFFSET.size)
+        return _decode(self._mmap[start:end])
+
+    def ids(self, collection):
+        """Return the IDs of the records of a collection, in file order.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name
+        """
+        self._check_collection(collection)
+        if self.format == "indexed":
+            return self._block(self._sections[collection]["ids"])
+        return [
+            record.get("_links", {}).get("self", {}).get("href")
+            for record in self.records(collection)
+        ]
+
+    def column(self, collection, field):
+        """Return the values of a field for the records of a collection.
+
+        An "indexed" snapshot decodes only the column of the field, the
+        other formats decode every record of the collection.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name, one of :py:data:`RESOURCE_CLASSES`
+        field : str
+            A field of the resource class' `all_fields`
+
+        Returns
+        -------
+        list
+            The field values, in file order, None for the records that do
+            not have the field
+        """
+        assert (
+            collection in RESOURCE_CLASSES
+        ), "Collection '{}' does not hold resources".format(collection)
+        self._check_collection(collection)
+        resource_class = RESOURCE_CLASSES[collection]
+        assert (
+            field in resource_class.all_fields
+        ), "item '{}' is not a field in {}.all_fields".format(
+            field, resource_class.__name__
+        )
+        if self.format == "indexed":
+            columns = self._sections[collection]["columns"]
+            return self._block(columns[field])
+        return [
+            field_values(resource_class(record), [field])[0]
+            for record in self.records(collection)
+        ]
+
+    def find(self, collection, id):
+        """Return the json record of a resource, None if not found.
+
+        Only the records that contain the encoded ID are decoded.  An
+        "indexed" snapshot looks the ID up in its index.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name, one of :py:data:`RESOURCE_CLASSES`
+        id : str
+            The resource ID - format: '/resource/path/[0-9]+'
+        """
+        self._check_collection(collection)
+
+        if self.format == "indexed":
+            if collection not in self._positions:
+                self._positions[collection] = dict(
+                    (id, position)
+                    for (position, id) in enumerate(self.ids(collection))
+                )
+            position = self._positions[collection].get(id)
+            if position is None:
+                return None
+            return self.record(collection, position)
+
+        needle = _encode(id)
+        with self._open() as f:
+            f.seek(self._offsets[collection])
+            for _ in range(self.counts[collection]):
+                if self.format == "binary":
+                    (_, length) = _FRAME.unpack(f.read(_FRAME.size))
+                    data = f.read(length)
+                else:
+                    data = f.readline()
+                if needle not in data:
+                    continue
+                record = _decode(data)
+                if record.get("_links", {}).get("self", {}).get("href") == id:
+                    return record
+        return None
+
+    def resources(self, collection):
+        """Return the resources of a collection.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name, one of :py:data:`RESOURCE_CLASSES`
+
+        Returns
+        -------
+        ResourceList
+            The resources, as returned by the controller's `list()`
+        """
+        assert (
+            collection in RESOURCE_CLASSES
+        ), "Collection '{}' does not hold resources".format(collection)
+        return ResourceList(
+            RESOURCE_CLASSES[collection], list(self.records(collection))
+        )
+
+    def diff(self, collection, new, fields=None):
+        """Compare a ResourceList with the resources of a collection.
+
+        See :py:func:`.diff.diff_resource_lists`.  For an "indexed"
+        snapshot the compared fields are read with :py:meth:`column`, so
+        only the records of the removed and changed resources are
+        decoded.  The other formats decode the collection once.
+
+        Parameters
+        ----------
+        collection : str
+            The collection name, one of :py:data:`RESOURCE_CLASSES`
+        new : ResourceList
+            The later resources, e.g. the result of the controller's
+            `list()`
+        fields : list, optional
+            The fields to compare, by default all fields except '_links'
+
+        Returns
+        -------
+        ResourceListDiff
+            The added, removed and changed resources
+        """
+        assert (
+            collection in RESOURCE_CLASSES
+        ), "Collection '{}' does not hold resources".format(collection)
+        resource_class = RESOURCE_CLASSES[collection]
+        assert (
+            new.resource_class is resource_class
+        ), "'new' must be a list of {}".format(resource_class.__name__)
+        if self.format != "indexed":
+            # column() and record() decode the records again on each call
+            return diff_resource_lists(self.resources(collection), new, fields)
+
+        fields = compared_fields(resource_class, fields)
+        columns = [self.column(collection, field) for field in fields]
+        previous = (
+            (
+                id,
+                [column[position] for column in columns],
+                lambda position=position: resource_class(
+                    self.record(collection, position)
+                ),
+            )
+            for (position, id) in enumerate(self.ids(collection))
+        )
+        return diff_values(previous, new, fields)
+
+
+def is_snapshot(path):
+    """Return True if a file starts like a snapshot file, of any format."""
+    with io.open(path, "rb") as f:
+        start = f.read(len(_INDEXED_MAGIC))
+    if start[: len(_GZIP_MAGIC)] == _GZIP_MAGIC:
+        with gzip.open(path, "rb") as f:
+            start = f.read(len(_INDEXED_MAGIC))
+    return start in (_MAGIC, _INDEXED_MAGIC) or start == b'{"format'
@@ -0,0 +1,267 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Incremental synchronisation of a local resource inventory."""
+
+from __future__ import absolute_import
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .base_resource import ResourceList
+from .diff import field_values, fingerprint
+from .exceptions import APIItemNotFoundException
+from .logger import Logger
+
+_log = Logger.get_logger()
+
+
+class SyncResult(object):
+    """The changes applied by one :py:meth:`InventorySync.sync`.
+
+    Attributes
+    ----------
+    added : list[str]
+        The IDs of the new resources
+    updated : list[str]
+        The IDs of the resources whose fingerprint changed
+    deleted : list[str]
+        The IDs of the resources that no longer exist
+    unchanged : int
+        The number of resources that were not fetched
+    errors : dict
+        The exception for each resource that could not be fetched.  These
+        resources keep their previous details and are fetched again by
+        the next sync.
+    """
+
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = 0
+        self.errors = OrderedDict()
+
+    @property
+    def fetched(self):
+        """The number of resources fetched with `get()`."""
+        return len(self.added) + len(self.updated) + len(self.errors)
+
+    def __bool__(self):
+        """Return True if any resource was added, updated or deleted."""
+        return bool(self.added or self.updated or self.deleted)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        """Return a representation of the SyncResult."""
+        return (
+            "<SyncResult added:{} updated:{} deleted:{} unchanged:{} "
+            "errors:{}>"
+        ).format(
+            len(self.added),
+            len(self.updated),
+            len(self.deleted),
+            self.unchanged,
+            len(self.errors),
+        )
+
+
+class InventorySync(object):
+    """Keep a local inventory of a collection with full resource details.
+
+    Each sync lists the collection with a field projection, computes a
+    fingerprint of the summary fields of each resource and only calls
+    `get()` for the resources that are new or whose fingerprint changed.
+    Resources that are no longer listed are removed.
+
+    Example
+    -------
+    >>> inventory = InventorySync(
+    ...     client.k8s_worker,
+    ...     summary_fields=["id", "status", "hostname", "ipaddr"],
+    ...     get_kwargs={"setup_log": True},
+    ... )
+    >>> inventory.sync()
+    <SyncResult added:200 updated:0 deleted:0 unchanged:0 errors:0>
+    >>> inventory.sync()
+    <SyncResult added:0 updated:3 deleted:1 unchanged:196 errors:0>
+    >>> inventory.get("/api/v2/worker/k8shost/4").setup_log
+    """
+
+    def __init__(
+        self, controller, summary_fields=None, get_kwargs=None, max_workers=8
+    ):
+        """Create an InventorySync.  The inventory is empty until synced.
+
+        Parameters
+        ----------
+        controller : AbstractResourceController
+            The controller of the collection
+        summary_fields : list, optional
+            The fields listed and fingerprinted to detect changes, by
+            default 'id' and the controller's status field.  All
+            `resource_class.all_fields` if the controller has no status.
+        get_kwargs : dict, optional
+            Keyword arguments for the controller's `get()`, e.g.
+            {"setup_log": True}
+        max_workers : int, optional
+            Maximum number of concurrent `get()` calls, by default 8
+        """
+        resource_class = controller.resource_class
+        if summary_fields is None:
+            status_fieldname = getattr(controller, "status_fieldname", None)
+            if status_fieldname is not None:
+                summary_fields = ["id", status_fieldname]
+            else:
+                summary_fields = list(resource_class.all_fields)
+        assert isinstance(
+            summary_fields, list
+        ), "'summary_fields' must be a list"
+        for field in summary_fields:
+            assert (
+                field in resource_class.all_fields
+            ), "item '{}' is not a field in {}.all_fields".format(
+                field, resource_class.__name__
+            )
+        assert get_kwargs is None or isinstance(
+            get_kwargs, dict
+        ), "'get_kwargs' must be a dict"
+        assert (
+            isinstance(max_workers, int) and max_workers > 0
+        ), "'max_workers' must be an int > 0"
+
+        self.controller = controller
+        self.summary_fields = summary_fields
+        self.get_kwargs = get_kwargs or {}
+        self.max_workers = max_workers
+
+        # id -> (fingerprint, resource)
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, id):
+        """Return the synced resource or None if it is not in the inventory."""
+        with self._lock:
+            entry = self._store.get(id)
+        return None if entry is None else entry[1]
+
+    def list(self):
+        """Return the synced resources.
+
+        Returns
+        -------
+        ResourceList
+            The resources in the order they were last listed
+        """
+        with self._lock:
+            json = [resource.json for (_, resource) in self._store.values()]
+        return ResourceList(self.controller.resource_class, json)
+
+    def fingerprints(self):
+        """Return the fingerprint of each synced resource, keyed by ID."""
+        with self._lock:
+            return OrderedDict(
+                (id, entry[0]) for (id, entry) in self._store.items()
+            )
+
+    def __len__(self):
+        """Return the number of resources in the local store."""
+        return len(self._store)
+
+    def sync(self):
+        """List the collection and fetch the new and changed resources.
+
+        Returns
+        -------
+        SyncResult
+            The changes applied to the inventory
+        """
+        summaries = self.controller.list(
+            fields=self.summary_fields, bypass_cache=True
+        )
+
+        listed = OrderedDict()
+        for resource in summaries:
+            listed[resource.id] = fingerprint(
+                field_values(resource, self.summary_fields)
+            )
+
+        with self._lock:
+            previous = dict(
+                (id, entry[0]) for (id, entry) in self._store.items()
+            )
+        changed = [id for (id, fp) in listed.items() if previous.get(id) != fp]
+
+        result = SyncResult()
+        result.unchanged = len(listed) - len(changed)
+        result.deleted = [id for id in previous if id not in listed]
+
+        def fetch(id):
+            try:
+                return (
+                    self.controller.get(
+                        id, bypass_cache=True, **self.get_kwargs
+                    ),
+                    None,
+                )
+            except Exception as e:
+                return (None, e)
+
+        fetched = {}
+        if len(changed) > 0:
+            workers = min(self.max_workers, len(changed))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for (id, (resource, error)) in zip(
+                    changed, executor.map(fetch, changed)
+                ):
+                    if isinstance(error, APIItemNotFoundException):
+                        # deleted after it was listed
+                        if id in previous:
+                            result.deleted.append(id)
+                        listed.pop(id)
+                    elif error is not None:
+                        _log.debug(
+                            "InventorySync: get {} failed: {}".format(
+                                id, error
+                            )
+                        )
+                        result.errors[id] = error
+                    else:
+                        fetched[id] = resource
+                        if id in previous:
+                            result.updated.append(id)
+                        else:
+                            result.added.append(id)
+
+        with self._lock:
+            store = OrderedDict()
+            for (id, fp) in listed.items():
+                if id in fetched:
+                    store[id] = (fp, fetched[id])
+                elif id in self._store:
+                    # unchanged, or failed and kept with its old
+                    # fingerprint so that it is fetched again
+                    store[id] = self._store[id]
+            self._store = store
+
+        _log.debug("InventorySync: {}".format(result))
+        return result
@@ -77,6 +77,13 @@ class Tenant(AbstractResource):
         "tenant_type",
     ]
 
+    field_json_keys = {
+        "name": ["label"],
+        "description": ["label"],
+    }
+
+    indexed_fields = ["id", "name", "status", "tenant_type"]
+
     @property
     def id(self):
         return self.json["_links"]["self"]["href"]
@@ -70,6 +70,17 @@ class User(AbstractResource):
         "is_siteadmin",
     ]
 
+    # user json returned by some endpoints is nested in '_embedded'
+    field_json_keys = {
+        "name": ["label", "_embedded"],
+        "description": ["label", "_embedded"],
+        "is_group_added_user": ["is_group_added_user", "_embedded"],
+        "is_external": ["is_external", "_embedded"],
+        "is_service_account": ["is_service_account", "_embedded"],
+        "default_tenant": ["default_tenant", "_embedded"],
+        "is_siteadmin": ["is_siteadmin", "_embedded"],
+    }
+
     @property
     def id(self):
         """@Field: from json['_links']['self']['href'] -
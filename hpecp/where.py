@@ -0,0 +1,400 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Filter expressions for resource lists, e.g. 'status=ready and x>=1'.
+
+Grammar::
+
+    expression := term ('or' term)*
+    term       := factor ('and' factor)*
+    factor     := 'not' factor | '(' expression ')' | comparison
+    comparison := field operator value
+
+The operators are ``=`` (or ``==``), ``!=``, ``<``, ``<=``, ``>``, ``>=``
+and ``~`` (contains).  Values may be quoted with single or double quotes
+and must be quoted if they contain spaces, brackets or operators.
+
+Values are compared as versions when the value in the expression or in
+the resource is a version: a string of dot separated integers such as
+``"1.18"`` or ``"1.18.6"`` in the resource, or ``1.18.6`` or ``v1.18`` in
+the expression.  Other numbers such as ``1.5`` are compared numerically
+and everything else as strings.  A field that is missing from the
+resource json only matches ``!=``.
+"""
+
+from __future__ import absolute_import
+
+import json
+import re
+
+import six
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<paren>[()])
+        |(?P<op>==|!=|<=|>=|=|<|>|~)
+        |"(?P<dquoted>[^"]*)"
+        |'(?P<squoted>[^']*)'
+        |(?P<word>[^\s()=!<>~'"]+)
+    )""",
+    re.VERBOSE,
+)
+
+_VERSION_RE = re.compile(r"^v?(\d+(?:\.\d+)*)$")
+
+_NUMBER_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+_KEYWORDS = ["and", "or", "not"]
+
+_MISSING = object()
+
+
+def index_key(value):
+    """Return the key used for equality matches and index lookups."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return six.text_type(value)
+
+
+def _version(value):
+    """Return the parts of an int or a version string, e.g. (1, 18, 6)."""
+    if isinstance(value, (bool, float)):
+        return None
+    match = _VERSION_RE.match(six.text_type(value))
+    if match is None:
+        return None
+    return tuple(int(part) for part in match.group(1).split("."))
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, six.integer_types + (float,)):
+        return value
+    if isinstance(value, six.string_types) and _NUMBER_RE.match(value):
+        return float(value)
+    return None
+
+
+def _ordered(literal):
+    """Return a function that converts a value for ordering.
+
+    The function returns the (value, literal) pair to compare, or None
+    if the value can not be compared with the literal.
+
+    A number literal compares as a version with a version string value,
+    whatever its number of dots, so that 'k8s_version<1.5' is false for
+    both "1.18" and "1.18.6".  It compares numerically with an int or
+    float value, 1.25 < 1.5.  A literal that is not a number, e.g. 1.18.6
+    or v1.18, compares as a version.
+    """
+    number = _number(literal)
+    if number is not None:
+        # None for a negative number
+        parts = _version(literal)
+
+        def convert(value):
+            if parts is not None and isinstance(value, six.string_types):
+                version = _version(value)
+                if version is not None:
+                    return (version, parts)
+            current = _number(value)
+            return None if current is None else (current, number)
+
+        return convert
+    version = _version(literal)
+    if version is not None:
+
+        def convert(value):
+            current = _version(value)
+            return None if current is None else (current, version)
+
+        return convert
+    return lambda value: (six.text_type(value), literal)
+
+
+class _Comparison(object):
+    def __init__(self, field, op, value):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def compile(self):
+        field = self.field
+        op = self.op
+        value = self.value
+
+        def get(resource):
+            try:
+                return getattr(resource, field)
+            except (AttributeError, KeyError):
+                return _MISSING
+
+        if op in ["=", "=="]:
+            key = value
+
+            def predicate(resource):
+                current = get(resource)
+                return current is not _MISSING and index_key(current) == key
+
+        elif op == "!=":
+            key = value
+
+            def predicate(resource):
+                current = get(resource)
+                return current is _MISSING or index_key(current) != key
+
+        elif op == "~":
+
+            def predicate(resource):
+                current = get(resource)
+                return current is not _MISSING and value in index_key(current)
+
+        else:
+            convert = _ordered(value)
+            compare = {
+                "<": lambda a, b: a < b,
+                "<=": lambda a, b: a <= b,
+                ">": lambda a, b: a > b,
+                ">=": lambda a, b: a >= b,
+            }[op]
+
+            def predicate(resource):
+                current = get(resource)
+                if current is _MISSING or current is None:
+                    return False
+                pair = convert(current)
+                return pair is not None and compare(*pair)
+
+        return predicate
+
+    def fields(self):
+        return [self.field]
+
+    def equalities(self):
+        if self.op in ["=", "=="]:
+            return [(self.field, self.value)]
+        return []
+
+
+class _And(object):
+    def __init__(self, children):
+        self.children = children
+
+    def compile(self):
+        predicates = [c.compile() for c in self.children]
+        return lambda resource: all(p(resource) for p in predicates)
+
+    def fields(self):
+        return [f for c in self.children for f in c.fields()]
+
+    def equalities(self):
+        return [e for c in self.children for e in c.equalities()]
+
+
+class _Or(object):
+    def __init__(self, children):
+        self.children = children
+
+    def compile(self):
+        predicates = [c.compile() for c in self.children]
+        return lambda resource: any(p(resource) for p in predicates)
+
+    def fields(self):
+        return [f for c in self.children for f in c.fields()]
+
+    def equalities(self):
+        # an index can only be used if every branch must match it
+        return []
+
+
+class _Not(object):
+    def __init__(self, child):
+        self.child = child
+
+    def compile(self):
+        predicate = self.child.compile()
+        return lambda resource: not predicate(resource)
+
+    def fields(self):
+        return self.child.fields()
+
+    def equalities(self):
+        return []
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        assert match is not None and match.end() > position, (
+            "Invalid 'where' expression at position {}: '{}'"
+        ).format(position, expression[position:])
+        position = match.end()
+        if match.group("paren"):
+            tokens.append(("paren", match.group("paren")))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op")))
+        elif match.group("dquoted") is not None:
+            tokens.append(("value", match.group("dquoted")))
+        elif match.group("squoted") is not None:
+            tokens.append(("value", match.group("squoted")))
+        elif match.group("word").lower() in _KEYWORDS:
+            tokens.append(("keyword", match.group("word").lower()))
+        else:
+            tokens.append(("value", match.group("word")))
+    return tokens
+
+
+class _Parser(object):
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def parse(self):
+        assert len(self.tokens) > 0, "'where' expression must not be empty"
+        node = self._expression()
+        if self.position < len(self.tokens):
+            self._error("unexpected '{}'".format(self._peek()[1]))
+        return node
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _error(self, message):
+        raise AssertionError(
+            "Invalid 'where' expression '{}': {}".format(
+                self.expression, message
+            )
+        )
+
+    def _expression(self):
+        children = [self._term()]
+        while self._peek() == ("keyword", "or"):
+            self._next()
+            children.append(self._term())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def _term(self):
+        children = [self._factor()]
+        while self._peek() == ("keyword", "and"):
+            self._next()
+            children.append(self._factor())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def _factor(self):
+        token = self._peek()
+        if token == ("keyword", "not"):
+            self._next()
+            return _Not(self._factor())
+        if token == ("paren", "("):
+            self._next()
+            node = self._expression()
+            if self._next() != ("paren", ")"):
+                self._error("missing ')'")
+            return node
+        return self._comparison()
+
+    def _comparison(self):
+        (kind, field) = self._next()
+        if kind != "value":
+            self._error("expected a field name")
+        (kind, op) = self._next()
+        if kind != "op":
+            self._error("expected an operator after '{}'".format(field))
+        (kind, value) = self._next()
+        if kind != "value":
+            self._error("expected a value after '{}{}'".format(field, op))
+        return _Comparison(field, op, value)
+
+
+class Where(object):
+    """A compiled filter expression.
+
+    The expression is parsed and compiled into a predicate once; calling
+    the instance with a resource evaluates the predicate, stopping at the
+    first failing 'and' or the first matching 'or'.
+
+    See :py:meth:`.base_resource.ResourceList.filter`.
+
+    Example
+    -------
+    >>> where = Where("status=ready and k8s_version>=1.18", K8sCluster)
+    >>> [c.id for c in client.k8s_cluster.list() if where(c)]
+    """
+
+    def __init__(self, expression, resource_class=None):
+        """Compile a filter expression.
+
+        Parameters
+        ----------
+        expression : str
+            The filter expression, see :py:mod:`hpecp.where`
+        resource_class : class, optional
+            If provided, the field names are checked against
+            `resource_class.all_fields`
+
+        Raises
+        ------
+        AssertionError
+            If the expression is invalid
+        """
+        assert isinstance(
+            expression, six.string_types
+        ), "'where' must be a string"
+
+        self.expression = expression
+        node = _Parser(expression).parse()
+
+        self.fields = []
+        for field in node.fields():
+            if field not in self.fields:
+                self.fields.append(field)
+
+        if resource_class is not None:
+            for field in self.fields:
+                assert (
+                    field in resource_class.all_fields
+                ), "Unknown field '{}' in 'where' expression".format(field)
+
+        self.equalities = node.equalities()
+        """(field, value) equalities that every match must satisfy."""
+
+        self._predicate = node.compile()
+
+    def __call__(self, resource):
+        """Return True if the resource matches the expression."""
+        return self._predicate(resource)
+
+    def __repr__(self):
+        """Return a representation of the Where expression."""
+        return "Where({!r})".format(self.expression)
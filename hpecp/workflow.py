@@ -0,0 +1,532 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+r"""Concurrent execution of multi-step provisioning workflows.
+
+A workflow is a directed acyclic graph of named nodes.  A node runs once
+the nodes it requires have completed, so independent branches run
+concurrently.  The library's create and wait calls become nodes with
+:py:func:`call` and :py:func:`wait_for`, and :py:class:`Ref` passes the
+value of a node, e.g. the ID of a new host, to the nodes that use it.
+
+Example
+-------
+>>> wf = Workflow()
+>>> for (i, ip) in enumerate(["10.1.0.1", "10.1.0.2"]):
+...     host = "host{}".format(i)
+...     wf.add(host, call(client.k8s_worker.create_with_ssh_key, ip, key))
+...     wf.add(host + "_pending", wait_for(
+...         client.k8s_worker, Ref(host), [WorkerK8sStatus.storage_pending]
+...     ))
+...     wf.add(host + "_storage", call(
+...         client.k8s_worker.set_storage, Ref(host), ["/dev/nvme1n1"]
+...     ), requires=[host + "_pending"])
+...     wf.add(host + "_ready", wait_for(
+...         client.k8s_worker, Ref(host), [WorkerK8sStatus.ready]
+...     ), requires=[host + "_storage"])
+>>> wf.add("cluster", call(client.k8s_cluster.create, ...),
+...        requires=["host0_ready", "host1_ready"])
+>>> result = wf.run(max_workers=4)
+>>> print("\n".join(result.report()))
+"""
+
+from __future__ import absolute_import
+
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .exceptions import ContainerPlatformClientException
+from .logger import Logger
+from .operation import WaitOutcome
+
+_log = Logger.get_logger()
+
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class Ref(object):
+    """A placeholder for the value returned by another node.
+
+    Used as an argument of :py:func:`call` and :py:func:`wait_for`; the
+    referenced node is added to the requirements of the node.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def resolve(self, values):
+        """Return the value of the referenced node."""
+        return values[self.name]
+
+    def __repr__(self):
+        """Return a representation of the Ref."""
+        return "Ref({!r})".format(self.name)
+
+
+def _resolve(value, values):
+    return value.resolve(values) if isinstance(value, Ref) else value
+
+
+class Call(object):
+    """A node that calls a function with its Ref arguments resolved.
+
+    Use :py:func:`call` to create instances.
+    """
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def refs(self):
+        """The names of the nodes referenced by the arguments."""
+        return [
+            a.name
+            for a in list(self.args) + list(self.kwargs.values())
+            if isinstance(a, Ref)
+        ]
+
+    def __call__(self, values):
+        """Call the function with the values of the referenced nodes."""
+        return self.fn(
+            *[_resolve(a, values) for a in self.args],
+            **dict((k, _resolve(v, values)) for (k, v) in self.kwargs.items())
+        )
+
+
+def call(fn, *args, **kwargs):
+    """Return a node that calls fn(*args, **kwargs).
+
+    Parameters
+    ----------
+    fn : callable
+        E.g. `client.k8s_worker.create_with_ssh_key`
+    args, kwargs
+        The arguments of fn, :py:class:`Ref` arguments are replaced by the
+        value of the referenced node
+
+    Returns
+    -------
+    Call
+    """
+    return Call(fn, args, kwargs)
+
+
+def wait_until(controller, id, status, timeout_secs=1200):
+    """Wait for a resource to reach a status.
+
+    The wait is serviced by the client's shared operation poller.
+
+    Parameters
+    ----------
+    controller : AbstractWaitableResourceController
+        The controller of the resource
+    id : str
+        The resource ID
+    status : list
+        The statuses to wait for, empty to wait for the deletion
+    timeout_secs : int, optional
+        How long to wait, by default 1200
+
+    Returns
+    -------
+    str
+        The resource ID
+
+    Raises
+    ------
+    ContainerPlatformClientException
+        If the resource reached an error status, disappeared or the wait
+        timed out
+    """
+    wait_operation(controller.operation(id, status, timeout_secs))
+    return id
+
+
+def wait_operation(operation):
+    """Wait for an operation, e.g. one returned with `as_operation=True`.
+
+    Parameters
+    ----------
+    operation : Operation
+        The operation
+
+    Returns
+    -------
+    str
+        The resource ID
+
+    Raises
+    ------
+    ContainerPlatformClientException
+        If the resource reached an error status, disappeared or the wait
+        timed out
+    """
+    outcome = operation.result()
+    status = operation.status
+    if outcome is WaitOutcome.reached or (
+        len(status) == 0 and outcome is WaitOutcome.disappeared
+    ):
+        return operation.id
+    raise ContainerPlatformClientException(
+        "{} did not reach {}: {}".format(
+            operation.id, [s.name for s in status] or "deleted", outcome.name
+        )
+    )
+
+
+def wait_for(controller, id, status, timeout_secs=1200):
+    """Return a node that waits for a resource to reach a status.
+
+    The node returns the resource ID, so that it can be referenced like
+    the node that created the resource.  See :py:func:`wait_until`.
+
+    Parameters
+    ----------
+    controller : AbstractWaitableResourceController
+        The controller of the resource
+    id : str or Ref
+        The resource ID, or a reference to the node that created it
+    status : list
+        The statuses to wait for, empty to wait for the deletion
+    timeout_secs : int, optional
+        How long to wait, by default 1200
+
+    Returns
+    -------
+    Call
+    """
+    return call(wait_until, controller, id, status, timeout_secs)
+
+
+class NodeResult(object):
+    """The outcome of a node.
+
+    Attributes
+    ----------
+    name : str
+        The node name
+    status : str
+        'done', 'failed' or 'skipped' if a required node did not complete
+    value : object
+        The value returned by the node
+    error : Exception
+        The exception raised by the node
+    started : float
+        Seconds from the start of the workflow to the start of the node
+    finished : float
+        Seconds from the start of the workflow to the end of the node
+    """
+
+    def __init__(self, name, status, value=None, error=None, started=0.0):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.started = started
+        self.finished = started
+
+    @property
+    def elapsed(self):
+        """The seconds the node ran for."""
+        return self.finished - self.started
+
+    def __repr__(self):
+        """Return a representation of the NodeResult."""
+        return "<NodeResult {} {} {:.1f}s>".format(
+            self.name, self.status, self.elapsed
+        )
+
+
+class WorkflowResult(object):
+    """The result of :py:meth:`Workflow.run`.
+
+    Attributes
+    ----------
+    nodes : dict
+        The :py:class:`NodeResult` of each node, in completion order
+    elapsed : float
+        The seconds taken by the workflow
+    """
+
+    def __init__(self, requires):
+        self.nodes = OrderedDict()
+        self.elapsed = 0.0
+        self._requires = requires
+
+    def _names(self, status):
+        return [r.name for r in self.nodes.values() if r.status == status]
+
+    @property
+    def done(self):
+        """The names of the completed nodes."""
+        return self._names(DONE)
+
+    @property
+    def failed(self):
+        """The exception of each failed node."""
+        return OrderedDict(
+            (r.name, r.error)
+            for r in self.nodes.values()
+            if r.status == FAILED
+        )
+
+    @property
+    def skipped(self):
+        """The names of the nodes not run as a required node failed."""
+        return self._names(SKIPPED)
+
+    @property
+    def values(self):
+        """The value of each completed node."""
+        return dict(
+            (r.name, r.value) for r in self.nodes.values() if r.status == DONE
+        )
+
+    def critical_path(self):
+        """Return the chain of nodes that determined the workflow duration.
+
+        The path ends with the node that finished last and follows, from
+        each node, the required node that finished last.
+
+        Returns
+        -------
+        list[str]
+            The node names, first to last
+        """
+        ran = [r for r in self.nodes.values() if r.status != SKIPPED]
+        if not ran:
+            return []
+        node = max(ran, key=lambda r: r.finished)
+        path = [node.name]
+        while True:
+            requires = [
+                self.nodes[n]
+                for n in self._requires[node.name]
+                if n in self.nodes
+            ]
+            if not requires:
+                break
+            node = max(requires, key=lambda r: r.finished)
+            path.append(node.name)
+        return list(reversed(path))
+
+    def report(self):
+        """Return the timings of the nodes and the critical path as lines."""
+        width = max([len(n) for n in self.nodes] + [4])
+        lines = [
+            "{:<{w}}  {:>8}  {:>8}  {}".format(
+                "node", "start", "elapsed", "status", w=width
+            )
+        ]
+        for r in sorted(self.nodes.values(), key=lambda r: r.started):
+            lines.append(
+                "{:<{w}}  {:>8.1f}  {:>8.1f}  {}".format(
+                    r.name, r.started, r.elapsed, r.status, w=width
+                )
+            )
+        path = self.critical_path()
+        lines.append(
+            "critical path: {} ({:.1f}s of {:.1f}s)".format(
+                " -> ".join(path) or "-",
+                sum(self.nodes[n].elapsed for n in path),
+                self.elapsed,
+            )
+        )
+        return lines
+
+    def __bool__(self):
+        """Return True if every node of the workflow is done."""
+        return all(r.status == DONE for r in self.nodes.values())
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        """Return a representation of the WorkflowResult."""
+        return "<WorkflowResult done:{} failed:{} skipped:{} {:.1f}s>".format(
+            len(self.done), len(self.failed), len(self.skipped), self.elapsed
+        )
+
+
+class Workflow(object):
+    """A graph of nodes run concurrently in dependency order.
+
+    A node is a callable called with a dict of the values returned by the
+    completed nodes.  Nodes made with :py:func:`call` and
+    :py:func:`wait_for` require the nodes referenced by their
+    :py:class:`Ref` arguments.
+    """
+
+    def __init__(self):
+        self._nodes = OrderedDict()
+
+    def add(self, name, fn, requires=None):
+        """Add a node.
+
+        Parameters
+        ----------
+        name : str
+            The unique node name
+        fn : callable
+            Called with the values of the completed nodes
+        requires : list[str], optional
+            The nodes that must complete before this one, in addition to
+            the nodes referenced by the arguments of a :py:func:`call`
+
+        Returns
+        -------
+        Ref
+            A reference to the value of the node
+        """
+        assert name not in self._nodes, "node '{}' already exists".format(name)
+        assert callable(fn), "'fn' must be callable"
+        assert requires is None or isinstance(
+            requires, list
+        ), "'requires' must be a list"
+        requires = list(requires or [])
+        for ref in getattr(fn, "refs", []):
+            if ref not in requires:
+                requires.append(ref)
+        self._nodes[name] = (fn, requires)
+        return Ref(name)
+
+    def __len__(self):
+        """Return the number of nodes in the workflow."""
+        return len(self._nodes)
+
+    def __contains__(self, name):
+        """Return True if the workflow has a node with this name."""
+        return name in self._nodes
+
+    def requires(self, name):
+        """Return the names of the nodes required by a node."""
+        return list(self._nodes[name][1])
+
+    def validate(self):
+        """Check that the required nodes exist and there is no cycle.
+
+        Raises
+        ------
+        AssertionError
+            If the graph is not valid
+        """
+        for (name, (_, requires)) in self._nodes.items():
+            for r in requires:
+                assert (
+                    r in self._nodes
+                ), "node '{}' requires unknown node '{}'".format(name, r)
+        # Kahn's algorithm
+        remaining = dict(
+            (name, set(requires))
+            for (name, (_, requires)) in self._nodes.items()
+        )
+        while remaining:
+            ready = [n for (n, r) in remaining.items() if not r]
+            assert ready, "the nodes {} form a cycle".format(sorted(remaining))
+            for n in ready:
+                del remaining[n]
+            for r in remaining.values():
+                r.difference_update(ready)
+
+    def run(self, max_workers=4, progress=None):
+        """Run the nodes, each as soon as its required nodes are done.
+
+        The nodes that require a failed node are skipped, the independent
+        nodes still run.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            The maximum number of nodes running at once, by default 4
+        progress : callable, optional
+            Called with each :py:class:`NodeResult` when a node completes,
+            fails or is skipped
+
+        Returns
+        -------
+        WorkflowResult
+        """
+        assert (
+            isinstance(max_workers, int) and max_workers > 0
+        ), "'max_workers' must be an int > 0"
+        self.validate()
+
+        result = WorkflowResult(
+            dict((n, r) for (n, (_, r)) in self._nodes.items())
+        )
+        started = time.time()
+        pending = OrderedDict(self._nodes)
+        running = {}
+
+        def run_node(name, fn, values):
+            node = NodeResult(name, DONE, started=time.time() - started)
+            try:
+                node.value = fn(values)
+            except Exception as e:
+                node.status = FAILED
+                node.error = e
+            node.finished = time.time() - started
+            return node
+
+        def finish(node):
+            result.nodes[node.name] = node
+            if node.status == FAILED:
+                _log.debug(
+                    "Workflow: {} failed: {}".format(node.name, node.error)
+                )
+            if progress is not None:
+                progress(node)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for (name, (fn, requires)) in list(pending.items()):
+                    if any(
+                        n in result.nodes and result.nodes[n].status != DONE
+                        for n in requires
+                    ):
+                        del pending[name]
+                        finish(
+                            NodeResult(
+                                name, SKIPPED, started=time.time() - started
+                            )
+                        )
+                    elif (
+                        all(n in result.nodes for n in requires)
+                        and len(running) < max_workers
+                    ):
+                        del pending[name]
+                        future = executor.submit(
+                            run_node, name, fn, result.values
+                        )
+                        running[future] = name
+                if not running:
+                    continue
+                (done, _) = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    finish(future.result())
+
+        result.elapsed = time.time() - started
+        _log.debug("Workflow: {}".format(result))
+        return result
@@ -0,0 +1,229 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+import time
+from collections import OrderedDict
+from unittest import TestCase
+
+from mock import MagicMock
+
+from hpecp.allocation import (
+    ClusterShape,
+    Host,
+    Requirements,
+    free_hosts,
+    plan_allocation,
+)
+from hpecp.k8s_cluster import K8sClusterHostConfig
+
+
+def host(id, cores=16, memory_mb=65536, disks=1, gpus=0):
+    return Host(
+        "/api/v2/worker/k8shost/{}".format(id), cores, memory_mb, disks, gpus
+    )
+
+
+def nodes(allocation, name):
+    return [(c.node, c.role) for c in allocation.clusters[name]]
+
+
+class TestPlanAllocation(TestCase):
+    def test_host_from_json(self):
+        json = {
+            "_links": {"self": {"href": "/api/v2/worker/k8shost/7"}},
+            "sysinfo": {
+                "cpu": {"cpu_logical_cores": 32},
+                "memory": {"mem_total": 64 * 1024 * 1024 * 1024},
+                "gpu": {"gpu_count": 2},
+                "storage": [
+                    {"info": {"IsDisk": True, "Mountpoint": ""}},
+                    {"info": {"IsDisk": True, "Mountpoint": "/"}},
+                    {"info": {"IsDisk": False, "Mountpoint": ""}},
+                ],
+            },
+        }
+        h = Host.from_json(json)
+        self.assertEqual(
+            (h.id, h.cores, h.memory_mb, h.disks, h.gpus),
+            ("/api/v2/worker/k8shost/7", 32, 65536, 1, 2),
+        )
+
+        h = Host.from_json({"_links": json["_links"]})
+        self.assertEqual((h.cores, h.memory_mb, h.disks, h.gpus), (0, 0, 0, 0))
+
+    def test_best_fit(self):
+        hosts = [
+            host(1, cores=64, gpus=4),
+            host(2, cores=64),
+            host(3),
+            host(4),
+            host(5),
+        ]
+        shapes = [
+            ClusterShape("small", masters=1, workers=1),
+            ClusterShape(
+                "gpu",
+                masters=1,
+                workers=1,
+                worker=Requirements(gpus=1),
+                k8s_version="1.18.6",
+            ),
+        ]
+        allocation = plan_allocation(hosts, shapes)
+
+        self.assertTrue(allocation)
+        self.assertEqual(list(allocation.clusters), ["small", "gpu"])
+        # the gpu worker takes the only gpu host, the masters take the
+        # smallest hosts
+        self.assertEqual(
+            nodes(allocation, "gpu"),
+            [
+                ("/api/v2/worker/k8shost/3", "master"),
+                ("/api/v2/worker/k8shost/1", "worker"),
+            ],
+        )
+        self.assertEqual(
+            nodes(allocation, "small"),
+            [
+                ("/api/v2/worker/k8shost/4", "master"),
+                ("/api/v2/worker/k8shost/5", "worker"),
+            ],
+        )
+        self.assertEqual(
+            [h.id for h in allocation.free], ["/api/v2/worker/k8shost/2"]
+        )
+
+    def test_cluster_is_all_or_nothing(self):
+        hosts = [host(1, cores=64), host(2), host(3)]
+        shapes = [
+            ClusterShape(
+                "big", masters=1, workers=2, worker=Requirements(cores=64)
+            ),
+            ClusterShape("small", masters=1, workers=1),
+        ]
+        allocation = plan_allocation(hosts, shapes)
+
+        self.assertFalse(allocation)
+        self.assertEqual(list(allocation.unplaced), ["big"])
+        self.assertIn("worker", allocation.unplaced["big"])
+        # the hosts taken by the incomplete cluster were given back
+        self.assertEqual(len(allocation.clusters["small"]), 2)
+        self.assertEqual(len(allocation.free), 1)
+
+        with self.assertRaises(AssertionError):
+            plan_allocation(hosts, [ClusterShape("a"), ClusterShape("a")])
+        with self.assertRaises(AssertionError):
+            ClusterShape("a", masters=0)
+        with self.assertRaises(AssertionError):
+            Requirements(cores=-1)
+
+    def test_many_hosts(self):
+        hosts = [
+            host(i, cores=[16, 32, 64][i % 3], gpus=1 if i % 10 == 0 else 0)
+            for i in range(5000)
+        ]
+        shapes = [
+            ClusterShape(
+                "c{}".format(i),
+                masters=3,
+                workers=20,
+                worker=Requirements(cores=32, gpus=i % 2),
+            )
+            for i in range(200)
+        ]
+        started = time.time()
+        allocation = plan_allocation(hosts, shapes)
+        self.assertLess(time.time() - started, 5)
+
+        used = [c.node for cs in allocation.clusters.values() for c in cs]
+        self.assertEqual(len(used), len(set(used)))
+        self.assertEqual(len(used) + len(allocation.free), len(hosts))
+        # the gpu workers only fit the gpu hosts with 32 cores or more,
+        # every other cluster fits
+        gpu_workers = len([h for h in hosts if h.gpus and h.cores >= 32])
+        self.assertEqual(len(allocation.unplaced), 100 - gpu_workers // 20)
+        self.assertTrue(all(int(n[1:]) % 2 for n in allocation.unplaced))
+
+
+class TestFreeHosts(TestCase):
+    def test_free_hosts(self):
+        def k8shost(id, status):
+            return {
+                "status": status,
+                "_links": {
+                    "self": {"href": "/api/v2/worker/k8shost/{}".format(id)}
+                },
+                "sysinfo": {"cpu": {"cpu_logical_cores": 8}},
+            }
+
+        client = MagicMock()
+        client.k8s_worker.list.return_value.json = [
+            k8shost(1, "ready"),
+            k8shost(2, "ready"),
+            k8shost(3, "configured"),
+        ]
+        cluster = MagicMock()
+        cluster.k8shosts_config = [
+            {"node": "/api/v2/worker/k8shost/1", "role": "master"}
+        ]
+        client.k8s_cluster.list.return_value = [cluster]
+
+        hosts = free_hosts(client)
+        self.assertEqual(
+            [(h.id, h.cores) for h in hosts],
+            [("/api/v2/worker/k8shost/2", 8)],
+        )
+        # a cached cluster list could show assigned hosts as free
+        client.k8s_cluster.list.assert_called_once_with(
+            fields=["k8shosts_config"], bypass_cache=True
+        )
+
+
+class TestAllocationCreate(TestCase):
+    def test_create(self):
+        hosts = [host(1), host(2), host(3)]
+        shapes = [
+            ClusterShape("a", k8s_version="1.18.6"),
+            ClusterShape("b", addons=["istio"]),
+            ClusterShape("c"),
+        ]
+        allocation = plan_allocation(hosts, shapes)
+
+        def create(name, k8shosts_config, **kwargs):
+            if name == "b":
+                raise Exception("refused")
+            self.assertIsInstance(k8shosts_config[0], K8sClusterHostConfig)
+            return "/api/v2/k8scluster/{}".format(name)
+
+        controller = MagicMock()
+        controller.create.side_effect = create
+        created = allocation.create(controller, max_workers=3)
+
+        self.assertIsInstance(created, OrderedDict)
+        self.assertEqual(list(created), ["a", "b", "c"])
+        self.assertEqual(created["a"], "/api/v2/k8scluster/a")
+        self.assertEqual(str(created["b"]), "refused")
+        self.assertEqual(controller.create.call_count, 3)
+        controller.create.assert_any_call(
+            name="a",
+            k8shosts_config=allocation.clusters["a"],
+            k8s_version="1.18.6",
+        )
@@ -0,0 +1,441 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.apply import (
+    CREATE,
+    DELETE,
+    NOOP,
+    Action,
+    Plan,
+    make_plan,
+    validate_state,
+)
+from hpecp.k8s_cluster import K8sClusterController
+from hpecp.tenant import TenantController
+
+from .base import BaseTestCase, MockResponse, get_client
+from .k8s_cluster_mock_api_responses import (
+    mockApiSetup as k8sClusterMockApiSetup,
+)
+from .k8s_worker_mock_api_responses import (
+    mockApiSetup as k8sWorkerMockApiSetup,
+)
+from .tenant_mock_api_responses import mockApiSetup as tenantMockApiSetup
+from .user_mock_api_responses import mockApiSetup as userMockApiSetup
+
+# setup the mock data
+k8sClusterMockApiSetup()
+k8sWorkerMockApiSetup()
+tenantMockApiSetup()
+userMockApiSetup()
+
+BaseTestCase.registerHttpGetHandler(
+    url="https://127.0.0.1:8080/api/v1/tenant/2?user",
+    response=MockResponse(
+        json_data={
+            "_embedded": {
+                "users": [
+                    {
+                        "_links": {"self": {"href": "/api/v1/user/16"}},
+                        "label": {"name": "csnow", "description": "chris"},
+                        "role": "/api/v1/role/2",
+                    },
+                    {
+                        "_links": {"self": {"href": "/api/v1/user/5"}},
+                        "label": {"name": "admin", "description": ""},
+                        "role": "/api/v1/role/3",
+                    },
+                ]
+            }
+        },
+        status_code=200,
+        headers={},
+    ),
+)
+
+ROLES_URL = "https://127.0.0.1:8080/api/v1/role/"
+
+ROLES = MockResponse(
+    json_data={
+        "_embedded": {
+            "roles": [
+                {
+                    "_links": {"self": {"href": "/api/v1/role/2"}},
+                    "label": {"name": "Admin", "description": ""},
+                },
+                {
+                    "_links": {"self": {"href": "/api/v1/role/3"}},
+                    "label": {"name": "Member", "description": ""},
+                },
+            ]
+        }
+    },
+    status_code=200,
+    headers={},
+)
+
+UNCHANGED = {
+    "k8s_hosts": [{"ipaddr": "10.1.0.238"}, {"ipaddr": "10.1.0.186"}],
+    "k8s_clusters": [{"name": "def", "k8s_version": "1.17.0"}],
+    "tenants": [{"name": "Demo Tenant", "tenant_type": "docker"}],
+    "role_assignments": [
+        {"tenant": "Demo Tenant", "role": "Admin", "user": "csnow"}
+    ],
+}
+
+
+class TestPlan(BaseTestCase):
+    def setUp(self):
+        super(TestPlan, self).setUp()
+        # other tests rely on the role list not being mocked
+        BaseTestCase.registerHttpGetHandler(
+            url=ROLES_URL,
+            response=ROLES,
+        )
+
+    def tearDown(self):
+        BaseTestCase._http_get_handlers.pop(ROLES_URL)
+        super(TestPlan, self).tearDown()
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_unchanged_state_makes_no_writes(self, mock_post, mock_get):
+        client = get_client()
+        plan = make_plan(client, UNCHANGED)
+
+        self.assertFalse(plan)
+        self.assertEqual(plan.warnings, [])
+        self.assertEqual(
+            [a.name for a in plan.actions],
+            [
+                "k8s_host/10.1.0.238",
+                "k8s_host/10.1.0.186",
+                "k8s_cluster/def",
+                "tenant/Demo Tenant",
+                "role_assignment/Demo Tenant/Admin/csnow",
+            ],
+        )
+        self.assertEqual(plan.summary()[NOOP], 5)
+
+        mock_post.reset_mock()
+        with patch("requests.put") as mock_put, patch(
+            "requests.delete"
+        ) as mock_delete:
+            result = plan.execute()
+        self.assertTrue(result)
+        self.assertEqual(result.done, [])
+        mock_post.assert_not_called()
+        mock_put.assert_not_called()
+        mock_delete.assert_not_called()
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_plan_and_execute_changes(self, mock_post, mock_get):
+        client = get_client()
+        state = {
+            "k8s_clusters": [
+                {
+                    "name": "def",
+                    "k8s_version": "1.18.0",
+                    "addons": ["istio"],
+                },
+                {
+                    "name": "new",
+                    "k8shosts_config": [
+                        {"node": "10.1.0.238", "role": "master"}
+                    ],
+                },
+            ],
+            "tenants": [
+                {"name": "team-a", "tenant_type": "k8s", "k8s_cluster": "new"},
+                {"name": "Demo Tenant", "description": "changed"},
+            ],
+            "role_assignments": [
+                {"tenant": "team-a", "role": "Member", "user": "csnow"},
+                {"tenant": "Demo Tenant", "role": "Admin", "user": "csnow"},
+            ],
+        }
+        plan = make_plan(client, state, prune=True)
+
+        self.assertEqual(
+            plan.lines(),
+            [
+                "~ k8s_cluster/def (k8s_version: 1.17.0 -> 1.18.0, "
+                "addons: +istio)",
+                "+ k8s_cluster/new",
+                "+ tenant/team-a",
+                "+ role_assignment/team-a/Member/csnow",
+                "- role_assignment/Demo Tenant/Member/admin",
+                "warning: tenant/Demo Tenant: the description can not be "
+                "updated",
+                "3 to create, 1 to update, 1 to delete, 2 unchanged",
+            ],
+        )
+        actions = dict((a.name, a) for a in plan.actions)
+        self.assertEqual(
+            actions["tenant/team-a"].requires, ["k8s_cluster/new"]
+        )
+        self.assertEqual(
+            actions["role_assignment/team-a/Member/csnow"].requires,
+            ["tenant/team-a"],
+        )
+
+        calls = []
+
+        def record(name, value=None):
+            def call(*args, **kwargs):
+                calls.append((name, args, kwargs))
+                return value
+
+            return call
+
+        with patch.object(
+            K8sClusterController,
+            "create",
+            side_effect=record("create", "/api/v2/k8scluster/30"),
+        ), patch.object(
+            K8sClusterController,
+            "upgrade_cluster",
+            side_effect=record("upgrade_cluster"),
+        ), patch.object(
+            K8sClusterController,
+            "add_addons",
+            side_effect=record("add_addons"),
+        ), patch.object(
+            TenantController,
+            "create",
+            side_effect=record("tenant_create", "/api/v1/tenant/30"),
+        ), patch.object(
+            TenantController,
+            "assign_user_to_role",
+            side_effect=record("assign"),
+        ), patch.object(
+            TenantController,
+            "revoke_user_from_role",
+            side_effect=record("revoke"),
+        ), patch(
+            "hpecp.apply.wait_until"
+        ), patch(
+            "hpecp.apply.wait_operation",
+            side_effect=lambda op: calls.append(("wait_operation", (), {})),
+        ):
+            result = plan.execute(max_workers=2)
+
+        # each change task is waited for before the next one is submitted
+        updates = [
+            name
+            for (name, args, kwargs) in calls
+            if name in ["upgrade_cluster", "add_addons", "wait_operation"]
+        ]
+        self.assertEqual(
+            updates,
+            [
+                "upgrade_cluster",
+                "wait_operation",
+                "add_addons",
+                "wait_operation",
+            ],
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(len(result.done), 5)
+        self.assertEqual(result.ids["tenant/team-a"], "/api/v1/tenant/30")
+        calls = dict((name, (args, kwargs)) for (name, args, kwargs) in calls)
+        self.assertEqual(
+            calls["create"][1]["k8shosts_config"][0].to_dict(),
+            {"node": "/api/v2/worker/k8shost/4", "role": "master"},
+        )
+        self.assertEqual(
+            calls["tenant_create"][1]["k8s_cluster_id"],
+            "/api/v2/k8scluster/30",
+        )
+        self.assertEqual(
+            calls["upgrade_cluster"][0], ("/api/v2/k8scluster/20", "1.18.0")
+        )
+        self.assertTrue(calls["upgrade_cluster"][1]["as_operation"])
+        self.assertEqual(
+            calls["add_addons"][0], ("/api/v2/k8scluster/20", ["istio"])
+        )
+        self.assertEqual(
+            calls["assign"][0],
+            ("/api/v1/tenant/30", "/api/v1/role/3", "/api/v1/user/16"),
+        )
+        self.assertEqual(
+            calls["revoke"][0],
+            ("/api/v1/tenant/2", "/api/v1/role/3", "/api/v1/user/5"),
+        )
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_prune(self, mock_post, mock_get):
+        plan = make_plan(
+            get_client(),
+            {"tenants": [], "k8s_clusters": []},
+            prune=True,
+        )
+        # the Site Admin tenant is never pruned
+        self.assertEqual(
+            [(a.verb, a.name) for a in plan.actions],
+            [(DELETE, "k8s_cluster/def"), (DELETE, "tenant/Demo Tenant")],
+        )
+        self.assertEqual(plan.actions[0].requires, ["tenant/Demo Tenant"])
+
+        plan = make_plan(get_client(), {"tenants": [], "k8s_clusters": []})
+        self.assertEqual(plan.actions, [])
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_unknown_references(self, mock_post, mock_get):
+        with self.assertRaisesRegexp(AssertionError, "'garbage' does not"):
+            make_plan(
+                get_client(),
+                {"tenants": [{"name": "t", "k8s_cluster": "garbage"}]},
+            )
+        with self.assertRaisesRegexp(AssertionError, "user 'nobody'"):
+            make_plan(
+                get_client(),
+                {
+                    "role_assignments": [
+                        {
+                            "tenant": "Demo Tenant",
+                            "role": "Admin",
+                            "user": "nobody",
+                        }
+                    ]
+                },
+            )
+
+
+class TestValidateState(TestCase):
+    def test_invalid_states(self):
+        for state in [
+            [],
+            {"garbage": []},
+            {"tenants": {"name": "t"}},
+            {"tenants": [{"description": "no name"}]},
+            {"tenants": [{"name": "t", "garbage": 1}]},
+            {"tenants": [{"name": "t"}, {"name": "t"}]},
+            {"role_assignments": [{"tenant": "t", "role": "r"}]},
+        ]:
+            with self.assertRaises(AssertionError):
+                validate_state(state)
+
+
+class TestExecute(TestCase):
+    def test_concurrency_and_dependencies(self):
+        lock = threading.Lock()
+        running = []
+        peak = [0]
+        finished = []
+
+        def work(name):
+            def run(ids):
+                with lock:
+                    running.append(name)
+                    peak[0] = max(peak[0], len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.remove(name)
+                    finished.append(name)
+                return "/id/" + name
+
+            return run
+
+        actions = [
+            Action("host", str(i), CREATE, run=work(str(i))) for i in range(4)
+        ]
+        actions.append(
+            Action("cluster", "c", CREATE, requires=["host/0", "host/1"])
+        )
+        actions[-1]._run = lambda ids: ids["host/0"] + "+" + ids["host/1"]
+        actions.append(Action("tenant", "t", NOOP, id="/id/t"))
+
+        result = Plan(actions).execute(max_workers=2)
+
+        self.assertTrue(result)
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(sorted(finished), ["0", "1", "2", "3"])
+        self.assertGreater(
+            result.done.index("cluster/c"),
+            max(result.done.index("host/0"), result.done.index("host/1")),
+        )
+        self.assertEqual(result.ids["cluster/c"], "/id/0+/id/1")
+        self.assertEqual(result.ids["tenant/t"], "/id/t")
+        self.assertEqual(len(result.workflow.nodes), 5)
+
+    def test_failure_skips_dependents(self):
+        def fail(ids):
+            raise Exception("boom")
+
+        actions = [
+            Action("cluster", "c", CREATE, run=fail),
+            Action("tenant", "t", CREATE, requires=["cluster/c"]),
+            Action("role_assignment", "r", CREATE, requires=["tenant/t"]),
+            Action("datatap", "d", CREATE, run=lambda ids: None),
+        ]
+        progress = []
+        result = Plan(actions).execute(
+            progress=lambda action, error: progress.append(action.name)
+        )
+
+        self.assertFalse(result)
+        self.assertEqual(list(result.failed.keys()), ["cluster/c"])
+        self.assertEqual(result.skipped, ["tenant/t", "role_assignment/r"])
+        self.assertEqual(result.done, ["datatap/d"])
+        self.assertEqual(sorted(progress), ["cluster/c", "datatap/d"])
+
+
+class TestCLIApply(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_dry_run(self, mock_post, mock_get):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "state.yaml")
+        try:
+            with open(path, "w") as f:
+                f.write(
+                    "tenants:\n"
+                    "  - name: team-a\n"
+                    "    tenant_type: k8s\n"
+                    "    k8s_cluster: def\n"
+                    "  - name: Demo Tenant\n"
+                )
+            hpecp = self.cli.CLI()
+            with patch.object(TenantController, "create") as mock_create:
+                hpecp.apply(path, dry_run=True, verbose=True)
+            mock_create.assert_not_called()
+        finally:
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(
+            self.out.getvalue(),
+            "+ tenant/team-a\n"
+            "  tenant/Demo Tenant\n"
+            "1 to create, 0 to update, 0 to delete, 1 unchanged\n",
+        )
@@ -19,6 +19,7 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import abc
+import json
 import os
 import sys
 import tempfile
@@ -64,7 +65,10 @@ class MockResponse:
         else:
             return
 
-    def json(self):
+    def json(self, **kwargs):
+        if kwargs:
+            # emulate requests decoding the response text with json.loads
+            return json.loads(json.dumps(self.json_data), **kwargs)
         return self.json_data
 
 
@@ -20,12 +20,23 @@
 
 import unittest
 
+import six
+from tabulate import tabulate
+
 from hpecp.base_resource import (
+    AbstractResource,
     AbstractResourceController,
     AbstractWaitableResourceController,
+    ResourceList,
 )
+from hpecp.cli_utils import TableOutput
 from hpecp.client import ContainerPlatformClient
 
+if six.PY2:
+    from io import BytesIO as StringIO
+else:
+    from io import StringIO
+
 
 class TestBaseResource(unittest.TestCase):
     def test_getters_and_setters(self):
@@ -72,3 +83,100 @@ class TestBaseResource(unittest.TestCase):
 
         self.assertEqual(c._get_status_class(), "test_status_class")
         self.assertEqual(c._get_status_fieldname(), "test_status_fieldname")
+
+
+class Host(AbstractResource):
+    all_fields = ["id", "status", "cores", "tags"]
+
+    @property
+    def status(self):
+        return self.json["status"]
+
+    @property
+    def cores(self):
+        return self.json["cores"]
+
+    @property
+    def tags(self):
+        return self.json["tags"]
+
+
+class TestResourceListWriteTable(unittest.TestCase):
+    def setUp(self):
+        self.resource_list = ResourceList(
+            Host,
+            [
+                {
+                    "_links": {"self": {"href": "/api/v2/worker/k8shost/1"}},
+                    "status": "ready",
+                    "cores": 16,
+                    "tags": [],
+                },
+                {
+                    "_links": {"self": {"href": "/api/v2/worker/k8shost/12"}},
+                    "status": "storage_pending\nretrying",
+                    "cores": 8,
+                    "tags": ["a"],
+                },
+            ],
+        )
+
+    def write_table(self, **kwargs):
+        out = StringIO()
+        self.resource_list.write_table(stream=out, **kwargs)
+        return out.getvalue()
+
+    def test_write_table_matches_tabulate(self):
+        for style in ["pretty", "plain"]:
+            for display_headers in [True, False]:
+                expected = self.resource_list.tabulate(
+                    style=style, display_headers=display_headers
+                )
+                self.assertEqual(
+                    self.write_table(
+                        style=style, display_headers=display_headers
+                    ),
+                    expected + "\n",
+                )
+
+    def test_floats_match_tabulate(self):
+        tables = [
+            [[1.5, "a"], [10.25, "b"]],
+            [[1.0], [2.123456789], [1e10]],
+            [[1, "0.001"], [None, 12345678], [2.5, None]],
+        ]
+        for rows in tables:
+            headers = ["c{}".format(i) for i in range(len(rows[0]))]
+            for style in ["pretty", "plain"]:
+                out = StringIO()
+                TableOutput(headers, style=style).write(rows, out)
+                expected = tabulate(rows, headers=headers, tablefmt=style)
+                self.assertEqual(out.getvalue(), expected + "\n")
+
+    def test_write_table_with_sample_size(self):
+        output = self.write_table(
+            columns=["id", "cores"], style="plain", sample_size=1
+        )
+        self.assertEqual(
+            output,
+            (
+                "id                          cores\n"
+                "/api/v2/worker/k8shost/1       16\n"
+                "/api/v2/worker/k8shost/12        8\n"
+            ),
+        )
+
+    def test_write_table_evaluates_each_field_once(self):
+        calls = []
+
+        class CountingHost(Host):
+            @property
+            def status(self):
+                calls.append(self.id)
+                return self.json["status"]
+
+        self.resource_list = ResourceList(
+            CountingHost, self.resource_list.json
+        )
+        self.write_table(columns=["status"])
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,280 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.cache import HIT, MISS, NOT_FOUND, STALE, ResourceCache
+from hpecp.exceptions import APIItemNotFoundException
+
+from .base import BaseTestCase, MockResponse, get_client
+from .k8s_cluster_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+class TestResourceCache(TestCase):
+    def test_ttl_expiry(self):
+        cache = ResourceCache(ttl=10, ttls={"/api/v1/user/": 100})
+        now = time.time()
+
+        with patch("time.time", return_value=now):
+            cache.put("/api/v2/k8scluster", "/api/v2/k8scluster/1", "c1")
+            cache.put("/api/v1/user/", "/api/v1/user/1", "u1")
+
+        with patch("time.time", return_value=now + 9):
+            self.assertEqual(
+                cache.get("/api/v2/k8scluster", "/api/v2/k8scluster/1"), "c1"
+            )
+
+        with patch("time.time", return_value=now + 11):
+            self.assertIsNone(
+                cache.get("/api/v2/k8scluster", "/api/v2/k8scluster/1")
+            )
+            self.assertEqual(
+                cache.get("/api/v1/user/", "/api/v1/user/1"), "u1"
+            )
+
+    def test_lru_eviction(self):
+        cache = ResourceCache(max_entries=2)
+        cache.put("/api/v1/role", "/api/v1/role/1", "r1")
+        cache.put("/api/v1/role", "/api/v1/role/2", "r2")
+
+        # mark /api/v1/role/1 as recently used
+        cache.get("/api/v1/role", "/api/v1/role/1")
+        cache.put("/api/v1/role", "/api/v1/role/3", "r3")
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("/api/v1/role", "/api/v1/role/2"))
+        self.assertEqual(cache.get("/api/v1/role", "/api/v1/role/1"), "r1")
+
+    def test_fields_are_part_of_the_key(self):
+        cache = ResourceCache()
+        cache.put("/api/v1/role", "/api/v1/role", "all", fields=None)
+        self.assertIsNone(
+            cache.get("/api/v1/role", "/api/v1/role", fields=["id"])
+        )
+
+    def test_invalidate(self):
+        cache = ResourceCache()
+        base = "/api/v2/k8scluster"
+        cache.put(base, base, "list")
+        cache.put(base, base + "/1", "c1")
+        cache.put(base, base + "/1?setup_log=true", "c1 log")
+        cache.put(base, base + "/2", "c2")
+        cache.put("/api/v1/tenant/", "/api/v1/tenant/1", "t1")
+
+        cache.invalidate(base + "/1/change_task")
+
+        self.assertIsNone(cache.get(base, base))
+        self.assertIsNone(cache.get(base, base + "/1"))
+        self.assertIsNone(cache.get(base, base + "/1?setup_log=true"))
+        self.assertEqual(cache.get(base, base + "/2"), "c2")
+        self.assertEqual(
+            cache.get("/api/v1/tenant/", "/api/v1/tenant/1"), "t1"
+        )
+
+        # create only invalidates the list
+        cache.put(base, base, "list")
+        cache.invalidate(base)
+        self.assertIsNone(cache.get(base, base))
+        self.assertEqual(cache.get(base, base + "/2"), "c2")
+
+    def test_stale_and_not_found_entries(self):
+        cache = ResourceCache(ttl=10, stale_ttl=60, not_found_ttl=5)
+        base = "/api/v2/k8scluster"
+        now = time.time()
+
+        with patch("time.time", return_value=now):
+            cache.put(base, base, "list")
+            cache.put_not_found(base, base + "/9", "404")
+            self.assertEqual(cache.lookup(base, base), (HIT, "list"))
+            self.assertEqual(
+                cache.lookup(base, base + "/9"), (NOT_FOUND, "404")
+            )
+            self.assertEqual(cache.lookup(base, base + "/1"), (MISS, None))
+
+        with patch("time.time", return_value=now + 30):
+            self.assertEqual(cache.lookup(base, base), (STALE, "list"))
+            # get() never returns stale entries
+            self.assertIsNone(cache.get(base, base))
+            self.assertEqual(cache.lookup(base, base + "/9"), (MISS, None))
+
+        with patch("time.time", return_value=now + 71):
+            self.assertEqual(cache.lookup(base, base), (MISS, None))
+
+    def test_refresh_claims_and_generations(self):
+        cache = ResourceCache()
+        base = "/api/v2/k8scluster"
+        self.assertTrue(cache.begin_refresh(base))
+        self.assertFalse(cache.begin_refresh(base))
+        self.assertTrue(cache.begin_refresh(base, fields=["id"]))
+        cache.end_refresh(base)
+        self.assertTrue(cache.begin_refresh(base))
+
+        # a response requested before a write is discarded
+        generation = cache.generation
+        cache.invalidate(base + "/1")
+        cache.put(base, base, "old list", generation=generation)
+        self.assertIsNone(cache.get(base, base))
+        cache.put(base, base, "list", generation=cache.generation)
+        self.assertEqual(cache.get(base, base), "list")
+
+        # as is a 404 requested before the resource was created
+        cache = ResourceCache(not_found_ttl=30)
+        generation = cache.generation
+        cache.invalidate(base)
+        cache.put_not_found(base, base + "/1", "404", generation=generation)
+        self.assertEqual(cache.lookup(base, base + "/1"), (MISS, None))
+
+
+class TestClientCache(BaseTestCase):
+    def setUp(self):
+        BaseTestCase.registerHttpPostHandler(
+            url="https://127.0.0.1:8080/api/v2/k8scluster/123/change_task",
+            response=MockResponse(json_data={}, status_code=200, headers={}),
+        )
+        super(TestClientCache, self).setUp()
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_get_is_cached_until_write(self, mock_post, mock_get):
+
+        client = get_client()
+        client.enable_cache(ttl=60)
+
+        cluster_id = "/api/v2/k8scluster/123"
+
+        client.k8s_cluster.get(cluster_id)
+        client.k8s_cluster.get(cluster_id)
+        self.assertEqual(mock_get.call_count, 1)
+
+        client.k8s_cluster.get(cluster_id, bypass_cache=True)
+        self.assertEqual(mock_get.call_count, 2)
+
+        client.k8s_cluster.upgrade_cluster(cluster_id, "1.18.0")
+        client.k8s_cluster.get(cluster_id)
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_cache_is_disabled_by_default(self, mock_post, mock_get):
+
+        client = get_client()
+        self.assertIsNone(client.cache)
+
+        client.k8s_cluster.list()
+        client.k8s_cluster.list()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_stale_while_revalidate(self, mock_post, mock_get):
+
+        client = get_client()
+        client.enable_cache(ttl=10, stale_ttl=60)
+        now = time.time()
+
+        with patch("time.time", return_value=now):
+            first = client.k8s_cluster.list()
+        self.assertEqual(mock_get.call_count, 1)
+
+        refreshed = threading.Event()
+        real_fetch = client.k8s_cluster._fetch_json
+
+        def fetch_json(*args, **kwargs):
+            # the caller has the stale list before the refresh completes
+            self.assertTrue(served.wait(5))
+            try:
+                return real_fetch(*args, **kwargs)
+            finally:
+                refreshed.set()
+
+        served = threading.Event()
+        with patch("time.time", return_value=now + 30), patch.object(
+            client.k8s_cluster, "_fetch_json", side_effect=fetch_json
+        ):
+            stale = client.k8s_cluster.list()
+            served.set()
+            # a second stale read does not start a second refresh
+            client.k8s_cluster.list()
+            self.assertTrue(refreshed.wait(5))
+
+        self.assertEqual(stale.json, first.json)
+        self.assertEqual(mock_get.call_count, 2)
+        # wait for the refresh thread to release its claim
+        path = client.k8s_cluster.base_resource_path
+        while not client.cache.begin_refresh(path):
+            time.sleep(0.01)
+        client.cache.end_refresh(path)
+
+        # the refreshed entry is valid again
+        with patch("time.time", return_value=now + 35):
+            client.k8s_cluster.list()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_not_found_is_cached(self, mock_post, mock_get):
+
+        client = get_client()
+        client.enable_cache(ttl=60, not_found_ttl=30)
+
+        for _ in range(3):
+            with self.assertRaises(APIItemNotFoundException) as cm:
+                client.k8s_cluster.get("/api/v2/k8scluster/999")
+            self.assertEqual(cm.exception.request_method, "get")
+        self.assertEqual(mock_get.call_count, 1)
+
+        with self.assertRaises(APIItemNotFoundException):
+            client.k8s_cluster.get("/api/v2/k8scluster/999", bypass_cache=True)
+        self.assertEqual(mock_get.call_count, 2)
+
+        # 404s are not cached by default
+        client.enable_cache(ttl=60)
+        for _ in range(2):
+            with self.assertRaises(APIItemNotFoundException):
+                client.k8s_cluster.get("/api/v2/k8scluster/999")
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("requests.get")
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_invalidated_during_request(self, mock_post, mock_get):
+
+        client = get_client()
+        client.enable_cache(ttl=60, not_found_ttl=30)
+
+        def get(*args, **kwargs):
+            # e.g. a create() in another thread while the get is in flight
+            client.cache.invalidate(client.k8s_cluster.base_resource_path)
+            return BaseTestCase.httpGetHandlers(*args, **kwargs)
+
+        mock_get.side_effect = get
+
+        for _ in range(2):
+            with self.assertRaises(APIItemNotFoundException):
+                client.k8s_cluster.get("/api/v2/k8scluster/999")
+            client.k8s_cluster.list()
+        # neither the 404 nor the list was cached
+        self.assertEqual(mock_get.call_count, 4)
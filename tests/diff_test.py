@@ -0,0 +1,178 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.base_resource import ResourceList
+from hpecp.diff import diff_resource_lists
+from hpecp.k8s_cluster import K8sCluster
+from hpecp.k8s_worker import WorkerK8s
+from hpecp.snapshot import SnapshotWriter
+
+from .base import BaseTestCase
+from .k8s_cluster_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+def host(id, status, ipaddr="10.0.0.1"):
+    return {
+        "_links": {"self": {"href": "/api/v2/worker/k8shost/{}".format(id)}},
+        "status": status,
+        "hostname": "host{}".format(id),
+        "ipaddr": ipaddr,
+    }
+
+
+class TestDiffResourceLists(TestCase):
+    def test_added_removed_changed(self):
+        old = ResourceList(
+            WorkerK8s,
+            [host(1, "ready"), host(2, "ready"), host(3, "installing")],
+        )
+        new = ResourceList(
+            WorkerK8s,
+            [
+                host(1, "ready"),
+                host(3, "ready", "10.0.0.3"),
+                host(4, "bundle"),
+            ],
+        )
+
+        diff = new.diff(old)
+
+        self.assertTrue(diff)
+        self.assertEqual(
+            [r.id for r in diff.added], ["/api/v2/worker/k8shost/4"]
+        )
+        self.assertEqual(
+            [r.id for r in diff.removed], ["/api/v2/worker/k8shost/2"]
+        )
+        self.assertEqual(len(diff.changed), 1)
+        self.assertEqual(diff.changed[0].id, "/api/v2/worker/k8shost/3")
+        self.assertEqual(
+            diff.changed[0].fields,
+            {
+                "status": ("installing", "ready"),
+                "ipaddr": ("10.0.0.1", "10.0.0.3"),
+            },
+        )
+
+    def test_no_changes(self):
+        hosts = [host(i, "ready") for i in range(10)]
+        diff = ResourceList(WorkerK8s, hosts).diff(
+            ResourceList(WorkerK8s, [dict(h) for h in hosts])
+        )
+        self.assertFalse(diff)
+        self.assertEqual(
+            diff.to_dict(), {"added": [], "removed": [], "changed": []}
+        )
+
+    def test_fields_limit_comparison(self):
+        old = ResourceList(WorkerK8s, [host(1, "ready", "10.0.0.1")])
+        new = ResourceList(WorkerK8s, [host(1, "ready", "10.0.0.2")])
+
+        self.assertFalse(diff_resource_lists(old, new, fields=["status"]))
+        self.assertTrue(diff_resource_lists(old, new, fields=["ipaddr"]))
+
+        with self.assertRaises(AssertionError):
+            diff_resource_lists(old, new, fields=["garbage"])
+
+    def test_missing_fields(self):
+        old = ResourceList(WorkerK8s, [{"_links": host(1, "ready")["_links"]}])
+        new = ResourceList(WorkerK8s, [host(1, "ready")])
+
+        diff = new.diff(old)
+        self.assertEqual(diff.changed[0].fields["status"], (None, "ready"))
+
+    def test_to_dict(self):
+        old = ResourceList(WorkerK8s, [host(1, "installing")])
+        new = ResourceList(WorkerK8s, [host(1, "ready")])
+
+        self.assertEqual(
+            new.diff(old).to_dict(),
+            {
+                "added": [],
+                "removed": [],
+                "changed": [
+                    {
+                        "id": "/api/v2/worker/k8shost/1",
+                        "fields": {
+                            "status": {"old": "installing", "new": "ready"}
+                        },
+                    }
+                ],
+            },
+        )
+
+    def test_different_resource_class(self):
+        with self.assertRaises(AssertionError):
+            diff_resource_lists(
+                ResourceList(WorkerK8s, []), ResourceList(K8sCluster, [])
+            )
+
+
+class TestCLIDiff(BaseTestCase):
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    def test_k8scluster_diff(self, mock_post, mock_get):
+
+        snapshot = [
+            {
+                "_links": {"self": {"href": "/api/v2/k8scluster/20"}},
+                "label": {"name": "def", "description": "my cluster"},
+                "status": "creating",
+            },
+            {
+                "_links": {"self": {"href": "/api/v2/k8scluster/21"}},
+                "label": {"name": "old", "description": "deleted"},
+                "status": "ready",
+            },
+        ]
+        (fd, path) = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f)
+        (fd, indexed_path) = tempfile.mkstemp(suffix=".idx")
+        os.close(fd)
+        with SnapshotWriter(indexed_path, format="indexed") as writer:
+            writer.write_collection("k8s_cluster", snapshot)
+
+        try:
+            hpecp = self.cli.CLI()
+            hpecp.k8scluster.diff(since=path, fields="name,description,status")
+            hpecp.k8scluster.diff(
+                since=indexed_path, fields="name,description,status"
+            )
+        finally:
+            os.remove(path)
+            os.remove(indexed_path)
+
+        expected = (
+            "- /api/v2/k8scluster/21\n"
+            "~ /api/v2/k8scluster/20\n"
+            "    status: creating -> ready\n"
+        )
+        self.assertEqual(self.out.getvalue(), expected * 2)
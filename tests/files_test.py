@@ -0,0 +1,67 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.files import replace_file
+
+
+class TestReplaceFile(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmpdir, "source")
+        self.target = os.path.join(self.tmpdir, "target")
+        for (path, data) in [(self.source, "new"), (self.target, "old")]:
+            with open(path, "w") as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self):
+        with open(self.target) as f:
+            return f.read()
+
+    def test_replace_existing(self):
+        replace_file(self.source, self.target)
+        self.assertEqual(self.read(), "new")
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_rename_fallback(self):
+        rename = os.rename
+
+        def windows_rename(source, target):
+            if os.path.exists(target):
+                raise OSError("file exists")
+            rename(source, target)
+
+        with patch("hpecp.files.os") as mock_os:
+            mock_os.path = os.path
+            mock_os.remove = os.remove
+            mock_os.rename = windows_rename
+            del mock_os.replace
+            replace_file(self.source, self.target)
+        self.assertEqual(self.read(), "new")
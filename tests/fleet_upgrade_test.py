@@ -0,0 +1,235 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import namedtuple
+from unittest import TestCase
+
+from hpecp.fleet_upgrade import (
+    CURRENT,
+    DONE,
+    FAILED,
+    SKIPPED,
+    FleetUpgrade,
+)
+from hpecp.poll_schedule import PollSchedule
+
+Cluster = namedtuple("Cluster", ["id", "status", "k8s_version"])
+
+FAST = PollSchedule(initial=0.001, factor=1, max_step=0.001, jitter=0)
+
+
+class FakeClusters(object):
+    """Stand in for K8sClusterController: an upgrade takes `polls` lists."""
+
+    def __init__(self, count, polls=2, fail=(), refuse=()):
+        self.ids = ["/api/v2/k8scluster/{}".format(i) for i in range(count)]
+        self.clusters = dict((id, ["ready", "1.17.0", 0]) for id in self.ids)
+        self.polls = polls
+        self.fail = fail
+        self.refuse = refuse
+        self.submitted = []
+        self.percents = {}
+        self.lists = 0
+        self.peak = 0
+
+    def get_poll_schedule(self, from_status, to_status):
+        return FAST
+
+    def upgrade_cluster(self, id, k8s_upgrade_version, percent):
+        if id in self.refuse:
+            raise Exception("refused")
+        self.submitted.append(id)
+        self.percents[id] = percent
+        self.clusters[id] = ["upgrading", "1.17.0", self.polls]
+
+    def list(self, fields, bypass_cache):
+        assert bypass_cache
+        self.lists += 1
+        upgrading = 0
+        for (id, cluster) in self.clusters.items():
+            if cluster[0] != "upgrading":
+                continue
+            upgrading += 1
+            cluster[2] -= 1
+            if cluster[2] == 0:
+                if id in self.fail:
+                    cluster[0] = "error"
+                else:
+                    cluster[:2] = ["ready", "1.18.6"]
+        self.peak = max(self.peak, upgrading)
+        return [Cluster(id, c[0], c[1]) for (id, c) in self.clusters.items()]
+
+
+class TestFleetUpgrade(TestCase):
+    def test_window_and_canary(self):
+        clusters = FakeClusters(6)
+        clusters.clusters[clusters.ids[3]] = ["ready", "1.18.6", 0]
+        progress = []
+        result = FleetUpgrade(
+            clusters,
+            "1.18.6",
+            window=2,
+            canaries=1,
+            canary_worker_upgrade_percent=10,
+        ).run(clusters.ids, progress=lambda u: progress.append(u.state))
+
+        self.assertTrue(result)
+        self.assertEqual(result.ids(CURRENT), [clusters.ids[3]])
+        self.assertEqual(len(result.ids(DONE)), 5)
+        self.assertEqual(clusters.submitted[0], clusters.ids[0])
+        self.assertEqual(clusters.percents[clusters.ids[0]], 10)
+        self.assertEqual(clusters.percents[clusters.ids[1]], 20)
+        self.assertEqual(result.peak, 2)
+        self.assertLessEqual(clusters.peak, 2)
+        # one list per poll, whatever the number of clusters
+        self.assertEqual(result.polls, clusters.lists)
+        self.assertEqual(progress.count(DONE), 5)
+
+        canary = result.upgrades[clusters.ids[0]]
+        self.assertTrue(
+            all(
+                u.submitted >= canary.finished
+                for u in result.upgrades.values()
+                if u.submitted is not None and not u.canary
+            )
+        )
+
+        report = result.report()
+        self.assertEqual(
+            report[0].split(), ["cluster", "start", "elapsed", "state"]
+        )
+        self.assertEqual(len(report), 8)
+        self.assertIn("(canary)", report[1])
+        self.assertTrue(report[-1].startswith("5 done, 1 current"))
+
+    def test_failed_canary_halts(self):
+        clusters = FakeClusters(4, fail=["/api/v2/k8scluster/0"])
+        result = FleetUpgrade(
+            clusters, "1.18.6", window=4, poll_schedule=FAST
+        ).run(clusters.ids)
+
+        self.assertFalse(result)
+        self.assertEqual(result.ids(FAILED), [clusters.ids[0]])
+        self.assertEqual(result.ids(SKIPPED), clusters.ids[1:])
+        self.assertEqual(result.halted, "canary /api/v2/k8scluster/0 failed")
+        self.assertEqual(
+            result.upgrades[clusters.ids[0]].error, "status error"
+        )
+        self.assertIn("halted: canary", result.report()[-1])
+
+    def test_max_failures(self):
+        clusters = FakeClusters(
+            8,
+            fail=["/api/v2/k8scluster/1"],
+            refuse=["/api/v2/k8scluster/2"],
+        )
+        result = FleetUpgrade(
+            clusters, "1.18.6", window=1, canaries=0, max_failures=1
+        ).run(clusters.ids)
+
+        # the second failure halts the run, nothing else is submitted
+        self.assertEqual(result.ids(DONE), [clusters.ids[0]])
+        self.assertEqual(result.ids(FAILED), clusters.ids[1:3])
+        self.assertEqual(result.upgrades[clusters.ids[2]].error, "refused")
+        self.assertEqual(result.ids(SKIPPED), clusters.ids[3:])
+        self.assertEqual(result.halted, "2 failures")
+
+        clusters = FakeClusters(3, fail=["/api/v2/k8scluster/1"])
+        result = FleetUpgrade(
+            clusters, "1.18.6", window=3, canaries=0, max_failures=1
+        ).run(clusters.ids)
+        self.assertIsNone(result.halted)
+        self.assertEqual(len(result.ids(DONE)), 2)
+
+    def test_timeout_and_disappeared(self):
+        clusters = FakeClusters(2, polls=10**6)
+        upgrade_cluster = clusters.upgrade_cluster
+
+        def upgrade_and_delete(id, version, percent):
+            upgrade_cluster(id, version, percent)
+            if id == clusters.ids[1]:
+                del clusters.clusters[id]
+
+        clusters.upgrade_cluster = upgrade_and_delete
+        result = FleetUpgrade(
+            clusters, "1.18.6", canaries=0, max_failures=2, timeout_secs=0
+        ).run(clusters.ids)
+
+        self.assertEqual(result.upgrades[clusters.ids[0]].error, "timeout")
+        self.assertEqual(result.upgrades[clusters.ids[1]].error, "disappeared")
+
+    def test_list_errors(self):
+        clusters = FakeClusters(3)
+        list_clusters = clusters.list
+        # every other list fails, the first one included
+        calls = []
+
+        def flaky_list(fields, bypass_cache):
+            calls.append(None)
+            if len(calls) % 2 == 1:
+                raise Exception("connection reset")
+            return list_clusters(fields, bypass_cache)
+
+        clusters.list = flaky_list
+        result = FleetUpgrade(clusters, "1.18.6", window=3, canaries=0).run(
+            clusters.ids
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(len(result.ids(DONE)), 3)
+        self.assertEqual(result.polls, len(calls))
+        self.assertEqual(result.list_errors, (len(calls) + 1) // 2)
+        self.assertIn(" failed), peak", result.report()[-1])
+        self.assertIn("list_errors:", repr(result))
+
+        # the upgrading clusters time out while the list keeps failing
+        clusters = FakeClusters(2, polls=10**6)
+        list_clusters = clusters.list
+        clusters.list = lambda fields, bypass_cache: (
+            list_clusters(fields, bypass_cache)
+            if not clusters.submitted
+            else 1 / 0
+        )
+        result = FleetUpgrade(
+            clusters, "1.18.6", canaries=0, max_failures=2, timeout_secs=0
+        ).run(clusters.ids)
+        self.assertEqual(result.ids(FAILED), clusters.ids)
+        self.assertEqual(result.upgrades[clusters.ids[0]].error, "timeout")
+
+        # nothing can be submitted if the list never succeeds
+        clusters = FakeClusters(2)
+        clusters.list = lambda fields, bypass_cache: 1 / 0
+        result = FleetUpgrade(clusters, "1.18.6", timeout_secs=0).run(
+            clusters.ids
+        )
+        self.assertEqual(result.ids(SKIPPED), clusters.ids)
+        self.assertEqual(clusters.submitted, [])
+        self.assertTrue(
+            result.halted.startswith("listing the clusters failed")
+        )
+
+    def test_invalid_parameters(self):
+        clusters = FakeClusters(1)
+        with self.assertRaises(AssertionError):
+            FleetUpgrade(clusters, "1.18.6", window=0)
+        with self.assertRaises(AssertionError):
+            FleetUpgrade(clusters, "1.18.6", worker_upgrade_percent=0)
+        with self.assertRaises(AssertionError):
+            FleetUpgrade(clusters, "1.18.6").run(clusters.ids * 2)
@@ -59,6 +59,16 @@ class TestGatewayList(BaseTestCase):
             # Unexpected exception
             self.fail(e)
 
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_list_with_fields(self, mock_get, mock_post):
+
+        gateways = get_client().gateway.list(fields=["id", "state"])
+
+        for gateway in gateways:
+            self.assertNotIn("sysinfo", gateway.json)
+            self.assertEqual(gateway.purpose, "proxy")
+
 
 class TestGatewayGet(BaseTestCase):
     def setUp(self):
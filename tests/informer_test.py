@@ -0,0 +1,144 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from unittest import TestCase
+
+from mock import patch
+from six.moves import queue
+
+from hpecp.base_resource import ResourceList
+from hpecp.informer import Informer, InformerEvent
+from hpecp.k8s_worker import WorkerK8s, WorkerK8sStatus
+
+from .base import BaseTestCase, get_client
+from .k8s_worker_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+def host(id, status):
+    return {
+        "_links": {"self": {"href": "/api/v2/worker/k8shost/{}".format(id)}},
+        "status": status,
+        "hostname": "host{}".format(id),
+        "ipaddr": "10.0.0.{}".format(id),
+    }
+
+
+class FakeController(object):
+
+    status_fieldname = "status"
+
+    def __init__(self):
+        self.hosts = []
+        self.list_calls = 0
+
+    def list(self, fields=None, bypass_cache=False):
+        self.list_calls += 1
+        return ResourceList(WorkerK8s, list(self.hosts))
+
+
+class TestInformer(TestCase):
+    def test_sync_events(self):
+        controller = FakeController()
+        informer = Informer(controller)
+
+        events = queue.Queue()
+        informer.subscribe(events)
+
+        controller.hosts = [host(1, "bundle"), host(2, "bundle")]
+        informer.sync()
+        self.assertEqual(
+            sorted((e.name, r.id) for (e, r) in [events.get(), events.get()]),
+            [
+                ("added", "/api/v2/worker/k8shost/1"),
+                ("added", "/api/v2/worker/k8shost/2"),
+            ],
+        )
+
+        controller.hosts = [host(1, "ready")]
+        informer.sync()
+        self.assertEqual(
+            sorted((e.name, r.id) for (e, r) in [events.get(), events.get()]),
+            [
+                ("deleted", "/api/v2/worker/k8shost/2"),
+                ("updated", "/api/v2/worker/k8shost/1"),
+            ],
+        )
+        self.assertTrue(events.empty())
+
+        # unchanged snapshot produces no events
+        self.assertEqual(informer.sync(), [])
+
+        self.assertEqual(
+            informer.get("/api/v2/worker/k8shost/1").status, "ready"
+        )
+        self.assertIsNone(informer.get("/api/v2/worker/k8shost/2"))
+
+    def test_wait_for_status_from_mirror(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "ready")]
+        informer = Informer(controller)
+        informer.sync()
+
+        self.assertTrue(
+            informer.wait_for_status(
+                "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready], 0
+            )
+        )
+        self.assertFalse(
+            informer.wait_for_status(
+                "/api/v2/worker/k8shost/1", [WorkerK8sStatus.error], 0
+            )
+        )
+        # empty status waits for the resource to cease to exist
+        self.assertTrue(
+            informer.wait_for_status("/api/v2/worker/k8shost/2", [], 0)
+        )
+        self.assertEqual(controller.list_calls, 1)
+
+
+class TestControllerInformer(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_informer(self, mock_post, mock_get):
+
+        client = get_client()
+        informer = client.k8s_worker.informer(interval=0.1)
+        try:
+            self.assertTrue(informer.wait_for_sync(timeout_secs=5))
+            self.assertIs(client.k8s_worker.informer(), informer)
+            self.assertEqual(
+                sorted(h.id for h in informer.list()),
+                ["/api/v2/worker/k8shost/4", "/api/v2/worker/k8shost/5"],
+            )
+            self.assertTrue(
+                informer.wait_for_status(
+                    "/api/v2/worker/k8shost/4",
+                    [WorkerK8sStatus.unlicensed],
+                    timeout_secs=5,
+                )
+            )
+        finally:
+            informer.stop()
+
+        self.assertFalse(informer.is_running())
+        self.assertEqual(InformerEvent.added.name, "added")
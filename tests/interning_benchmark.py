@@ -0,0 +1,113 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Measure the memory held by a decoded k8s host list, with and without
+interning.
+
+This is not part of the test suite and requires Python 3, run it with:
+
+    python -m tests.interning_benchmark [number of hosts]
+"""
+
+from __future__ import print_function
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from hpecp.interning import JsonInterner
+
+STATUSES = ["ready", "configured", "installing", "error", "unlicensed"]
+
+
+def host(i):
+    return {
+        # mostly ready, as on a healthy platform
+        "status": "ready" if i % 10 else STATUSES[i % len(STATUSES)],
+        "propinfo": {
+            "bds_storage_apollo": "false",
+            "bds_network_publicinterface": "ens5",
+        },
+        "approved_worker_pubkey": [],
+        "tags": [{"tag_id": "/api/v2/tag/1", "tag_value": "prod"}],
+        "hostname": "host-{}.example.com".format(i),
+        "ipaddr": "10.{}.{}.{}".format(i // 65536, i // 256 % 256, i % 256),
+        "_links": {"self": {"href": "/api/v2/worker/k8shost/{}".format(i)}},
+        "sysinfo": {
+            "network": [],
+            "keys": {"reported_worker_public_key": "ssh-rsa ...== server\n"},
+            "storage": [{"name": "/dev/nvme1n1", "size": 549755813888}],
+            "swap": {"swap_total": 0},
+            "memory": {"mem_total": [65842503680, 131685007360][i % 2]},
+            "gpu": {"gpu_count": 0},
+            "cpu": {
+                "cpu_logical_cores": 16,
+                "cpu_count": 8,
+                "cpu_physical_cores": 8,
+                "cpu_sockets": 1,
+            },
+            "mountpoint": [],
+        },
+    }
+
+
+def measure(decode, text):
+    gc.collect()
+    tracemalloc.start()
+    started = time.time()
+    value = decode(text)
+    elapsed = time.time() - started
+    gc.collect()
+    (held, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return (held, peak, elapsed)
+
+
+def main(count=20000):
+    text = json.dumps(
+        {"_embedded": {"k8shosts": [host(i) for i in range(count)]}}
+    )
+
+    print("{} hosts, {:.1f} MB of json".format(count, len(text) / 1e6))
+    print(
+        "{:<12} {:>12} {:>12} {:>10}".format(
+            "decode", "held (MB)", "peak (MB)", "time (s)"
+        )
+    )
+    for (name, decode) in [
+        ("json.loads", json.loads),
+        (
+            "interned",
+            lambda t: json.loads(t, object_pairs_hook=JsonInterner()),
+        ),
+    ]:
+        (held, peak, elapsed) = measure(decode, text)
+        print(
+            "{:<12} {:>12.1f} {:>12.1f} {:>10.2f}".format(
+                name, held / 1e6, peak / 1e6, elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
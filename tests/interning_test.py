@@ -0,0 +1,125 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.interning import JsonInterner
+
+from .base import BaseTestCase, get_client
+from .k8s_worker_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+def hosts(count):
+    return [
+        {
+            "_links": {
+                "self": {"href": "/api/v2/worker/k8shost/{}".format(i)}
+            },
+            "status": "ready",
+            "tags": [],
+            "propinfo": {"bds_storage_apollo": "false"},
+            "roles": ["worker", "storage"],
+            "flags": {"one": 1, "true": True, "float": 1.0},
+        }
+        for i in range(count)
+    ]
+
+
+class TestJsonInterner(TestCase):
+    def test_decodes_equal_json(self):
+        text = json.dumps(hosts(3))
+        self.assertEqual(
+            json.loads(text, object_pairs_hook=JsonInterner()),
+            json.loads(text),
+        )
+
+    def test_shares_repeated_values(self):
+        decoded = json.loads(
+            json.dumps(hosts(3)), object_pairs_hook=JsonInterner()
+        )
+        (first, second) = decoded[:2]
+
+        self.assertIs(first["status"], second["status"])
+        self.assertIs(first["tags"], second["tags"])
+        self.assertIs(first["propinfo"], second["propinfo"])
+        self.assertIs(first["roles"], second["roles"])
+        self.assertIs(first["flags"], second["flags"])
+        self.assertIs(list(first.keys())[0], list(second.keys())[0])
+        # the links differ
+        self.assertIsNot(first["_links"], second["_links"])
+        self.assertIsNot(first, second)
+
+    def test_values_of_different_types_are_not_shared(self):
+        decoded = json.loads(
+            '[{"a": 1}, {"a": true}, {"a": 1.0}, {"a": 1}]',
+            object_pairs_hook=JsonInterner(),
+        )
+        self.assertIs(decoded[0], decoded[3])
+        self.assertIsNot(decoded[0], decoded[1])
+        self.assertIsNot(decoded[0], decoded[2])
+        self.assertIs(decoded[1]["a"], True)
+        self.assertIsInstance(decoded[2]["a"], float)
+
+    def test_large_structures_are_not_shared(self):
+        big = dict(("key{}".format(i), i) for i in range(20))
+        decoded = json.loads(
+            json.dumps([big, big]), object_pairs_hook=JsonInterner()
+        )
+        self.assertEqual(decoded[0], decoded[1])
+        self.assertIsNot(decoded[0], decoded[1])
+
+    def test_hook(self):
+        def drop_tags(pairs):
+            return dict((k, v) for (k, v) in pairs if k != "tags")
+
+        decoded = json.loads(
+            json.dumps(hosts(2)),
+            object_pairs_hook=JsonInterner(hook=drop_tags),
+        )
+        self.assertNotIn("tags", decoded[0])
+        self.assertIs(decoded[0]["propinfo"], decoded[1]["propinfo"])
+
+
+class TestListIntern(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_list_intern(self, mock_get, mock_post):
+        client = get_client()
+
+        expected = client.k8s_worker.list().json
+        self.assertEqual(client.k8s_worker.list(intern=True).json, expected)
+
+        hosts = client.k8s_worker.list(fields=["id", "status"], intern=True)
+        self.assertEqual(sorted(hosts[0].json.keys()), ["_links", "status"])
+        self.assertEqual(hosts[0].status, expected[0]["status"])
+        self.assertIs(
+            [k for k in hosts[0].json if k == "status"][0],
+            [k for k in hosts[1].json if k == "status"][0],
+        )
+
+        client.k8s_worker.intern_list_json = True
+        hosts = client.k8s_worker.list()
+        self.assertIs(hosts[0].json["tags"], hosts[1].json["tags"])
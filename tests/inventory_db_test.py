@@ -0,0 +1,202 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from mock import patch
+
+from hpecp.base_resource import ResourceList
+from hpecp.inventory_db import InventoryDatabase
+from hpecp.k8s_worker import WorkerK8s
+from hpecp.tenant import Tenant
+
+from .base import BaseTestCase, get_client
+from .gateway_mock_api_responses import mockApiGetSetup as gatewayMockApiSetup
+from .k8s_cluster_mock_api_responses import (
+    mockApiSetup as k8sClusterMockApiSetup,
+)
+from .k8s_worker_mock_api_responses import (
+    mockApiSetup as k8sWorkerMockApiSetup,
+)
+from .tenant_mock_api_responses import mockApiSetup as tenantMockApiSetup
+
+# setup the mock data
+gatewayMockApiSetup()
+k8sClusterMockApiSetup()
+k8sWorkerMockApiSetup()
+tenantMockApiSetup()
+
+CLUSTER_HOSTS = (
+    "SELECT c.name, w.ipaddr, json_extract(h.value, '$.role') "
+    "FROM k8s_cluster c, json_each(c.k8shosts_config) h "
+    "JOIN k8s_worker w ON w.id = json_extract(h.value, '$.node') "
+    "ORDER BY w.ipaddr"
+)
+
+
+class TestInventoryDatabase(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_list_stores_collections(self, mock_get, mock_post):
+        client = get_client()
+        db = client.enable_inventory_db(":memory:")
+        client.k8s_cluster.list()
+        client.k8s_worker.list()
+        client.gateway.list()
+        # filtered lists are not stored
+        client.tenant.list(fields=["id", "name"])
+
+        self.assertEqual(
+            list(db.collections()), ["gateway", "k8s_cluster", "k8s_worker"]
+        )
+        self.assertEqual(db.collections()["k8s_worker"][0], 2)
+        self.assertEqual(
+            db.query(CLUSTER_HOSTS),
+            (
+                ["name", "ipaddr", "json_extract(h.value, '$.role')"],
+                [
+                    ("def", "10.1.0.186", "master"),
+                    ("def", "10.1.0.238", "worker"),
+                ],
+            ),
+        )
+        # only the workers with purpose 'proxy' are gateways
+        (_, purposes) = db.query(
+            "SELECT DISTINCT json_extract(json, '$.purpose') FROM gateway"
+        )
+        self.assertEqual(purposes, [("proxy",)])
+        (_, indexes) = db.query(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'k8s_worker' ORDER BY name"
+        )
+        self.assertEqual(
+            [i[0] for i in indexes],
+            sorted("k8s_worker_" + f for f in WorkerK8s.all_fields),
+        )
+
+        resources = db.resources("k8s_cluster")
+        self.assertEqual(resources[0].id, "/api/v2/k8scluster/20")
+        self.assertEqual(resources.json, client.k8s_cluster.list().json)
+        self.assertEqual(len(db.resources("tenant").resources), 0)
+
+        with self.assertRaises(sqlite3.OperationalError):
+            db.query("DELETE FROM k8s_worker")
+
+        client.disable_inventory_db()
+        self.assertIsNone(client.inventory_db)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_list_store_is_skipped_or_logged(self, mock_get, mock_post):
+        client = get_client()
+        client.enable_cache(ttl=60)
+        db = client.enable_inventory_db(":memory:")
+
+        with patch.object(db, "store", wraps=db.store) as store:
+            client.k8s_cluster.list()
+            # served by the cache, the database already has the list
+            client.k8s_cluster.list()
+            self.assertEqual(store.call_count, 1)
+
+        with patch.object(
+            db,
+            "store",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ) as store:
+            clusters = client.k8s_cluster.list(bypass_cache=True)
+            self.assertEqual(store.call_count, 1)
+        self.assertEqual(clusters.resources[0].id, "/api/v2/k8scluster/20")
+
+    def test_store_replaces_the_collection(self):
+        def tenants(*names):
+            return ResourceList(
+                Tenant,
+                [
+                    {
+                        "_links": {"self": {"href": "/api/v1/tenant/" + n}},
+                        "label": {"name": n},
+                        "status": "ready",
+                    }
+                    for n in names
+                ],
+            )
+
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "inventory.db")
+        try:
+            with InventoryDatabase(path) as db:
+                db.store(tenants("1", "2", "3"))
+                db.store(tenants("4"))
+            with InventoryDatabase(path) as db:
+                (columns, rows) = db.query(
+                    "SELECT id, name, description, json FROM tenant"
+                )
+        finally:
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(columns, ["id", "name", "description", "json"])
+        self.assertEqual(rows[0][:3], ("/api/v1/tenant/4", "4", None))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0][3])["status"], "ready")
+
+
+class TestCLICache(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_refresh_and_query(self, mock_get, mock_post):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "inventory.db")
+        try:
+            hpecp = self.cli.CLI()
+            with self.assertRaises(SystemExit):
+                hpecp.cache.query("SELECT 1", database=path)
+            self.assertIn("hpecp cache refresh", self.err.getvalue())
+
+            hpecp.cache.refresh(
+                collections="k8s_cluster,k8s_worker", database=path
+            )
+            with patch("requests.get", side_effect=Exception("offline")):
+                with patch.dict(os.environ, {"HPECP_INVENTORY_DB": path}):
+                    hpecp.cache.query(CLUSTER_HOSTS, output="text")
+                    hpecp.cache.query(
+                        "SELECT id FROM k8s_worker WHERE status = 'bundle'",
+                        output="json",
+                    )
+                    hpecp.cache.info()
+                    with self.assertRaises(SystemExit):
+                        hpecp.cache.query("SELECT * FROM garbage")
+        finally:
+            shutil.rmtree(tmpdir)
+
+        output = self.out.getvalue().splitlines()
+        self.assertEqual(output[:2], ["k8s_cluster  1", "k8s_worker   2"])
+        self.assertEqual(output[2].split(), ["def", "10.1.0.186", "master"])
+        self.assertEqual(output[3].split(), ["def", "10.1.0.238", "worker"])
+        self.assertEqual(
+            json.loads(output[4]), [{"id": "/api/v2/worker/k8shost/5"}]
+        )
+        self.assertEqual(output[5], "database:    " + path)
+        self.assertTrue(output[6].startswith("k8s_cluster  1      0m"))
+        self.assertIn("no such table: garbage", self.err.getvalue())
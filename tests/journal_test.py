@@ -0,0 +1,300 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from unittest import TestCase
+
+from mock import MagicMock
+
+from hpecp.base_resource import ResourceList
+from hpecp.journal import (
+    DONE,
+    FAILED,
+    SUBMITTED,
+    WAITING,
+    BulkOperation,
+    JobJournal,
+)
+from hpecp.k8s_cluster import (
+    K8sCluster,
+    K8sClusterController,
+    K8sClusterStatus,
+)
+from hpecp.k8s_worker import WorkerK8sStatus
+from hpecp.operation import WaitOutcome
+from hpecp.poll_schedule import PollSchedule
+
+HOSTS = OrderedDict(
+    ("10.0.0.{}".format(i), "ssh key {}".format(i)) for i in range(1, 5)
+)
+
+
+class FakeWorkers(object):
+    """Stand in for K8sWorkerController.create_with_ssh_key."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ip, ssh_key_data):
+        with self._lock:
+            self.calls.append(ip)
+        if ip in self.fail:
+            raise Exception("cannot reach {}".format(ip))
+        return "/api/v2/worker/k8shost/{}".format(ip.split(".")[-1])
+
+
+def controller(outcomes):
+    """A controller whose wait_for_status_many returns outcomes by ID."""
+    controller = MagicMock()
+    controller.wait_for_status_many.side_effect = lambda ids, s, t, **kw: (
+        OrderedDict((id, outcomes.get(id, WaitOutcome.reached)) for id in ids)
+    )
+    return controller
+
+
+class FakeClusters(K8sClusterController):
+    """Clusters that are upgraded after two polls."""
+
+    poll_schedule = PollSchedule(initial=0.01, factor=1, max_step=0.01)
+    poll_transition_schedules = {}
+
+    def __init__(self, ids):
+        super(FakeClusters, self).__init__(None)
+        self.clusters = dict((id, ["1.17.0", None]) for id in ids)
+        self.polls = 0
+
+    def upgrade_cluster(self, id, k8s_upgrade_version):
+        # the upgrade starts after the next poll
+        self.clusters[id][1] = (self.polls + 2, k8s_upgrade_version)
+
+    def list(self, fields=None, bypass_cache=False):
+        self.polls += 1
+        json = []
+        for (id, cluster) in sorted(self.clusters.items()):
+            if cluster[1] is not None and self.polls >= cluster[1][0]:
+                cluster[:] = [cluster[1][1], None]
+            json.append(
+                {
+                    "_links": {"self": {"href": id}},
+                    "status": "ready",
+                    "k8s_version": cluster[0],
+                }
+            )
+        return ResourceList(K8sCluster, json)
+
+
+class TestJobJournal(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "journal.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_record_and_reopen(self):
+        with JobJournal(self.path, "job") as journal:
+            journal.record("a", SUBMITTED, attempt=True)
+            journal.record("a", WAITING, "/api/v2/worker/k8shost/1")
+            journal.record("b", FAILED, error="boom", attempt=True)
+            journal.record("b", SUBMITTED, attempt=True)
+            JobJournal(self.path, "other job").record("c", DONE)
+
+        with JobJournal(self.path, "job") as journal:
+            entry = journal.get("a")
+            self.assertEqual(entry.state, WAITING)
+            self.assertEqual(entry.resource_id, "/api/v2/worker/k8shost/1")
+            self.assertEqual(entry.attempts, 1)
+            self.assertEqual(journal.get("b").attempts, 2)
+            self.assertIsNone(journal.get("b").error)
+            self.assertIsNone(journal.get("c"))
+            self.assertEqual(
+                [e.key for e in journal.entries(state=SUBMITTED)], ["b"]
+            )
+            self.assertEqual(
+                list(journal.counts().items()),
+                [(SUBMITTED, 1), (WAITING, 1), (DONE, 0), (FAILED, 0)],
+            )
+
+            journal.forget()
+            self.assertEqual(journal.entries(), [])
+
+    def test_resume_after_failures(self):
+        workers = FakeWorkers()
+        workers.fail = ["10.0.0.2"]
+        wait_outcomes = {
+            "/api/v2/worker/k8shost/3": WaitOutcome.timeout,
+            "/api/v2/worker/k8shost/4": WaitOutcome.error,
+        }
+        with JobJournal(self.path, "onboard") as journal:
+            operation = BulkOperation(
+                journal,
+                submit=workers,
+                controller=controller(wait_outcomes),
+                status=[WorkerK8sStatus.storage_pending],
+            )
+            progress = []
+            result = operation.run(HOSTS, progress=progress.append)
+
+        self.assertEqual(
+            [(e.key, e.state) for e in result.values()],
+            [
+                ("10.0.0.1", DONE),
+                ("10.0.0.2", FAILED),
+                ("10.0.0.3", WAITING),
+                ("10.0.0.4", FAILED),
+            ],
+        )
+        self.assertEqual(result["10.0.0.2"].error, "cannot reach 10.0.0.2")
+        self.assertEqual(result["10.0.0.4"].error, "wait: error")
+        self.assertEqual(sorted(workers.calls), list(HOSTS))
+        self.assertEqual(len(progress), 6)
+
+        # the restarted script: only failed items are submitted again and
+        # the waiting item is polled
+        workers.calls = []
+        workers.fail = []
+        wait_outcomes.clear()
+        waits = controller(wait_outcomes)
+        with JobJournal(self.path, "onboard") as journal:
+            result = BulkOperation(
+                journal,
+                submit=workers,
+                controller=waits,
+                status=[WorkerK8sStatus.storage_pending],
+            ).run(HOSTS)
+
+        self.assertEqual(sorted(workers.calls), ["10.0.0.2", "10.0.0.4"])
+        self.assertEqual(
+            sorted(waits.wait_for_status_many.call_args[0][0]),
+            [
+                "/api/v2/worker/k8shost/2",
+                "/api/v2/worker/k8shost/3",
+                "/api/v2/worker/k8shost/4",
+            ],
+        )
+        self.assertTrue(all(e.state == DONE for e in result.values()))
+        self.assertEqual(result["10.0.0.4"].attempts, 2)
+        self.assertEqual(result["10.0.0.3"].attempts, 1)
+
+    def test_interrupted_retry(self):
+        workers = FakeWorkers()
+        hosts = OrderedDict([("10.0.0.1", HOSTS["10.0.0.1"])])
+        with JobJournal(self.path, "onboard") as journal:
+            BulkOperation(
+                journal,
+                submit=workers,
+                controller=controller(
+                    {"/api/v2/worker/k8shost/1": WaitOutcome.error}
+                ),
+                status=[WorkerK8sStatus.storage_pending],
+            ).run(hosts)
+            self.assertEqual(journal.get("10.0.0.1").state, FAILED)
+
+        def crash(ip, ssh_key_data):
+            raise KeyboardInterrupt()
+
+        with JobJournal(self.path, "onboard") as journal:
+            with self.assertRaises(KeyboardInterrupt):
+                BulkOperation(journal, submit=crash).run(hosts)
+            entry = journal.get("10.0.0.1")
+            self.assertEqual(entry.state, SUBMITTED)
+            # the resource of the failed attempt is not the retried one
+            self.assertIsNone(entry.resource_id)
+
+        workers.calls = []
+        with JobJournal(self.path, "onboard") as journal:
+            result = BulkOperation(
+                journal,
+                submit=workers,
+                controller=controller({}),
+                status=[WorkerK8sStatus.storage_pending],
+            ).run(hosts)
+
+        self.assertEqual(workers.calls, ["10.0.0.1"])
+        self.assertEqual(result["10.0.0.1"].state, DONE)
+        self.assertEqual(result["10.0.0.1"].attempts, 3)
+
+    def test_interrupted_call(self):
+        workers = FakeWorkers()
+        with JobJournal(self.path, "onboard") as journal:
+            # crashed during the calls for these hosts
+            journal.record("10.0.0.1", SUBMITTED, attempt=True)
+            journal.record("10.0.0.2", SUBMITTED, attempt=True)
+            journal.record("10.0.0.3", DONE, "/api/v2/worker/k8shost/3")
+
+            existing = {"10.0.0.1": "/api/v2/worker/k8shost/1"}
+            result = BulkOperation(
+                journal, submit=workers, find=existing.get
+            ).run(HOSTS)
+
+        # no controller: the items are done when the call returns
+        self.assertEqual(sorted(workers.calls), ["10.0.0.2", "10.0.0.4"])
+        self.assertTrue(all(e.state == DONE for e in result.values()))
+        self.assertEqual(
+            result["10.0.0.1"].resource_id, "/api/v2/worker/k8shost/1"
+        )
+
+    def test_keys_as_resource_ids(self):
+        upgrades = []
+
+        def upgrade_cluster(id, k8s_upgrade_version):
+            upgrades.append((id, k8s_upgrade_version))
+            return {"response": "json"}
+
+        waits = controller({})
+        result = BulkOperation(
+            JobJournal(":memory:", "upgrade"),
+            submit=upgrade_cluster,
+            controller=waits,
+            status=[],
+            retry_failed=False,
+        ).run(OrderedDict([("/api/v2/k8scluster/1", "1.18.6")]))
+
+        self.assertEqual(upgrades, [("/api/v2/k8scluster/1", "1.18.6")])
+        self.assertEqual(
+            result["/api/v2/k8scluster/1"].resource_id,
+            "/api/v2/k8scluster/1",
+        )
+
+    def test_check_the_change(self):
+        ids = ["/api/v2/k8scluster/1", "/api/v2/k8scluster/2"]
+        clusters = FakeClusters(ids)
+        result = BulkOperation(
+            JobJournal(":memory:", "upgrade"),
+            submit=clusters.upgrade_cluster,
+            controller=clusters,
+            status=[K8sClusterStatus.ready],
+            timeout_secs=10,
+            check=lambda cluster, version: cluster.k8s_version == version,
+            fields=["k8s_version"],
+        ).run(OrderedDict((id, "1.18.6") for id in ids))
+
+        # the clusters were ready at the old version on the first poll
+        self.assertTrue(all(e.state == DONE for e in result.values()))
+        self.assertGreater(clusters.polls, 1)
+        self.assertEqual(
+            [c[0] for c in clusters.clusters.values()], ["1.18.6"] * 2
+        )
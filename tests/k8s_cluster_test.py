@@ -21,9 +21,11 @@
 import json
 from unittest import TestCase
 
+import six
 from mock import patch
 
 from hpecp import APIException, APIItemNotFoundException
+from hpecp.base_resource import WaitOutcome
 from hpecp.k8s_cluster import (
     K8sCluster,
     K8sClusterHostConfig,
@@ -195,6 +197,27 @@ class TestClusterList(BaseTestCase):
             "+-------------+-----------------------+",
         )
 
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_list_with_fields(self, mock_get, mock_post):
+
+        clusters = get_client().k8s_cluster.list(
+            fields=["id", "name", "status"]
+        )
+
+        self.assertEqual(clusters[0].id, "/api/v2/k8scluster/20")
+        self.assertEqual(clusters[0].name, "def")
+        self.assertEqual(clusters[0].status, "ready")
+        self.assertEqual(
+            sorted(clusters[0].json.keys()), ["_links", "label", "status"]
+        )
+
+        with self.assertRaisesRegexp(
+            AssertionError,
+            "item 'garbage' is not a field in K8sCluster.all_fields",
+        ):
+            get_client().k8s_cluster.list(fields=["garbage"])
+
 
 class TestCreateCluster(TestCase):
     @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
@@ -634,6 +657,81 @@ class TestDeleteCluster(BaseTestCase):
 
             self.assertEqual(cm.exception.code, 1)
 
+    @patch("requests.delete", side_effect=BaseTestCase.httpDeleteHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_delete_many(self, mock_delete, mock_get, mock_post):
+
+        progress = []
+        (outcomes, errors) = get_client().k8s_cluster.delete_many(
+            [
+                TestDeleteCluster.existing_cluster_url,
+                TestDeleteCluster.non_existent_cluster_url,
+            ],
+            concurrency=2,
+            timeout_secs=0,
+            progress=lambda *args: progress.append(args),
+        )
+
+        # 123 is not in the cluster list, so it has been deleted
+        self.assertEqual(
+            outcomes,
+            {TestDeleteCluster.existing_cluster_url: WaitOutcome.reached},
+        )
+        self.assertEqual(
+            list(errors.keys()), [TestDeleteCluster.non_existent_cluster_url]
+        )
+        self.assertIsInstance(
+            errors[TestDeleteCluster.non_existent_cluster_url],
+            APIItemNotFoundException,
+        )
+        self.assertEqual(
+            progress, [("delete", 1, 2), ("delete", 2, 2), ("wait", 1, 1)]
+        )
+
+    @patch("requests.delete", side_effect=BaseTestCase.httpDeleteHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_delete_many_without_wait(self, mock_delete, mock_get, mock_post):
+
+        # on py2 the unicode id is passed to delete()
+        (outcomes, errors) = get_client().k8s_cluster.delete_many(
+            [six.text_type(TestDeleteCluster.existing_cluster_url)],
+            wait=False,
+        )
+
+        self.assertEqual(
+            outcomes,
+            {TestDeleteCluster.existing_cluster_url: WaitOutcome.pending},
+        )
+        self.assertEqual(errors, {})
+
+        with self.assertRaises(AssertionError):
+            get_client().k8s_cluster.delete_many(["garbage"])
+
+    @patch("requests.delete", side_effect=BaseTestCase.httpDeleteHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_delete_many_cli(self, mock_delete, mock_get, mock_post):
+
+        hpecp = self.cli.CLI()
+        hpecp.k8scluster.delete_many(
+            ids=TestDeleteCluster.existing_cluster_url, wait_for_delete_sec=0
+        )
+        self.assertIn("deleted: 1/1", self.err.getvalue())
+
+        with self.assertRaises(SystemExit) as cm:
+            hpecp.k8scluster.delete_many(
+                ids=(
+                    TestDeleteCluster.existing_cluster_url,
+                    TestDeleteCluster.non_existent_cluster_url,
+                ),
+            )
+        self.assertEqual(cm.exception.code, 1)
+        self.assertIn(
+            "Failed to delete /api/v2/k8scluster/999", self.err.getvalue()
+        )
+
 
 class TestK8sSupportVersions(BaseTestCase):
 
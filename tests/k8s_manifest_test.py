@@ -0,0 +1,182 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from hpecp.k8s_cluster import K8sClusterHostConfig
+from hpecp.k8s_manifest import K8sManifest, K8sManifestCache
+
+from .base import BaseTestCase, get_client
+from .k8s_cluster_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+MANIFEST = {
+    "_version": "1.0",
+    "supported_versions": ["1.17.0", "1.18.0"],
+    "version_info": {
+        "1.17.0": {"addons": ["istio"]},
+        "1.18.0": {"addons": ["istio", "picasso-compute"]},
+    },
+}
+
+
+class TestK8sManifest(TestCase):
+    def test_indexes(self):
+        manifest = K8sManifest(MANIFEST)
+        self.assertEqual(manifest.version, "1.0")
+        self.assertTrue(manifest.is_supported("1.18.0"))
+        self.assertFalse(manifest.is_supported("1.16.0"))
+        self.assertEqual(
+            manifest.addons("1.18.0"), ["istio", "picasso-compute"]
+        )
+        self.assertEqual(
+            manifest.unavailable_addons("1.17.0", ["istio", "kubeflow"]),
+            ["kubeflow"],
+        )
+        # versions without an addon list accept any addon
+        self.assertEqual(manifest.unavailable_addons("1.16.0", ["a"]), [])
+
+    def test_cache_expiry(self):
+        cache = K8sManifestCache(max_age=60)
+        fetches = []
+
+        def fetch():
+            fetches.append(1)
+            return MANIFEST
+
+        now = time.time()
+        with patch("time.time", return_value=now):
+            self.assertIsNone(cache.peek("10.0.0.1"))
+            cache.get("10.0.0.1", fetch)
+            manifest = cache.get("10.0.0.1", fetch)
+        self.assertIs(cache.peek("10.0.0.1"), manifest)
+        self.assertEqual(len(fetches), 1)
+
+        with patch("time.time", return_value=now + 61):
+            self.assertIsNone(cache.peek("10.0.0.1"))
+            cache.get("10.0.0.1", fetch)
+        self.assertEqual(len(fetches), 2)
+
+        cache.invalidate("10.0.0.1")
+        self.assertIsNone(cache.peek("10.0.0.1"))
+
+    def test_disk_cache_by_platform_version(self):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "k8smanifest.json")
+        try:
+            K8sManifestCache(path, platform_version="5.1").get(
+                "10.0.0.1", lambda: MANIFEST
+            )
+
+            # a new process with the same platform version
+            cache = K8sManifestCache(path, max_age=0, platform_version="5.1")
+            self.assertEqual(cache.peek("10.0.0.1").json, MANIFEST)
+            self.assertIsNone(cache.peek("10.0.0.2"))
+
+            # the platform was upgraded
+            cache = K8sManifestCache(path, platform_version="5.2")
+            self.assertIsNone(cache.peek("10.0.0.1"))
+            self.assertEqual(os.listdir(tmpdir), ["k8smanifest.json"])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestK8sClusterManifest(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_manifest_is_retrieved_once(self, mock_post, mock_get):
+        client = get_client()
+        # not cached by default
+        self.assertIsNone(client.k8s_manifest_cache)
+        client.k8s_cluster.k8smanifest()
+        client.k8s_cluster.k8smanifest()
+        self.assertEqual(mock_get.call_count, 2)
+        mock_get.reset_mock()
+
+        client.enable_k8s_manifest_cache()
+        versions = client.k8s_cluster.k8s_supported_versions()
+        self.assertEqual(versions[-1], "1.18.0")
+        client.k8s_cluster.k8s_supported_versions()
+        self.assertEqual(client.k8s_cluster.k8smanifest()["_version"], "1.0")
+        self.assertEqual(mock_get.call_count, 1)
+
+        # a new client has its own cache
+        get_client().enable_k8s_manifest_cache().get(
+            client.api_host, lambda: MANIFEST
+        )
+        client.disable_k8s_manifest_cache()
+        client.k8s_cluster.k8smanifest()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_addon_validation(self, mock_post, mock_get):
+        client = get_client()
+        client.enable_k8s_manifest_cache().get(
+            client.api_host, lambda: MANIFEST
+        )
+
+        self.assertEqual(
+            client.k8s_cluster.get_available_addons(k8s_version="1.17.0"),
+            ["istio"],
+        )
+        self.assertEqual(mock_get.call_count, 0)
+
+        hosts = [K8sClusterHostConfig("/api/v2/worker/k8shost/1", "master")]
+        with self.assertRaisesRegexp(
+            AssertionError,
+            r"addons \['kubeflow'\] are not available for k8s version "
+            "'1.18.0'",
+        ):
+            client.k8s_cluster.create(
+                name="a",
+                k8shosts_config=hosts,
+                k8s_version="1.18.0",
+                addons=["istio", "kubeflow"],
+            )
+        with self.assertRaisesRegexp(
+            AssertionError, "k8s version '1.16.0' is not supported"
+        ):
+            client.k8s_cluster.create(
+                name="a",
+                k8shosts_config=hosts,
+                k8s_version="1.16.0",
+                addons=["istio"],
+            )
+
+        # the cluster runs 1.17.0
+        with self.assertRaisesRegexp(
+            AssertionError,
+            r"addons \['picasso-compute'\] are not available",
+        ):
+            client.k8s_cluster.add_addons(
+                "/api/v2/k8scluster/123", addons=["picasso-compute"]
+            )
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_post.call_count, 1)  # the login
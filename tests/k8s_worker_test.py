@@ -1,8 +1,10 @@
 import tempfile
 
+import six
 from mock import patch
 
 from hpecp import ContainerPlatformClient
+from hpecp.base_resource import WaitOutcome
 from hpecp.cli import base
 from hpecp.exceptions import APIItemConflictException, APIItemNotFoundException
 from hpecp.k8s_worker import K8sWorkerController, WorkerK8s, WorkerK8sStatus
@@ -146,6 +148,116 @@ class TestWorkers(BaseTestCase):
             ephemeral_disks=_sample_ep_disks,
         )
 
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_get_many_with_gets(self, mock_get, mock_post):
+        client = get_client()
+
+        (found, not_found) = client.k8s_worker.get_many(
+            ids=[
+                "/api/v2/worker/k8shost/8",
+                # on py2 the first of the duplicates, a unicode id, is the
+                # one passed to get()
+                six.text_type("/api/v2/worker/k8shost/5"),
+                "/api/v2/worker/k8shost/5",
+            ],
+            use_list=False,
+        )
+
+        self.assertEqual(list(found.keys()), ["/api/v2/worker/k8shost/5"])
+        self.assertEqual(
+            found["/api/v2/worker/k8shost/5"].ipaddr, "10.1.0.186"
+        )
+        self.assertEqual(not_found, ["/api/v2/worker/k8shost/8"])
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_get_many_with_list(self, mock_get, mock_post):
+        client = get_client()
+
+        # the collection size is unknown and the gets need two rounds
+        (found, not_found) = client.k8s_worker.get_many(
+            ids=[
+                "/api/v2/worker/k8shost/5",
+                "/api/v2/worker/k8shost/4",
+                "/api/v2/worker/k8shost/8",
+            ],
+            max_workers=2,
+        )
+
+        self.assertEqual(
+            list(found.keys()),
+            ["/api/v2/worker/k8shost/5", "/api/v2/worker/k8shost/4"],
+        )
+        self.assertEqual(not_found, ["/api/v2/worker/k8shost/8"])
+        self.assertEqual(client.k8s_worker._collection_size, 2)
+
+    def test_get_many_prefer_list(self):
+        controller = K8sWorkerController(client=None)
+
+        self.assertFalse(controller._prefer_list(0, 8))
+        self.assertFalse(controller._prefer_list(8, 8))
+        self.assertTrue(controller._prefer_list(9, 8))
+
+        controller._collection_size = 1000
+        self.assertFalse(controller._prefer_list(10, 8))
+        self.assertTrue(controller._prefer_list(200, 8))
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_wait_for_status_many(self, mock_get, mock_post):
+        client = get_client()
+
+        outcomes = client.k8s_worker.wait_for_status_many(
+            ids=[
+                "/api/v2/worker/k8shost/4",
+                "/api/v2/worker/k8shost/5",
+                "/api/v2/worker/k8shost/99",
+            ],
+            status=[WorkerK8sStatus.unlicensed],
+            timeout_secs=0,
+        )
+
+        self.assertEqual(
+            outcomes,
+            {
+                "/api/v2/worker/k8shost/4": WaitOutcome.reached,
+                "/api/v2/worker/k8shost/5": WaitOutcome.timeout,
+                "/api/v2/worker/k8shost/99": WaitOutcome.disappeared,
+            },
+        )
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_wait_for_status_many_fail_fast(self, mock_get, mock_post):
+        client = get_client()
+
+        outcomes = client.k8s_worker.wait_for_status_many(
+            ids=["/api/v2/worker/k8shost/4", "/api/v2/worker/k8shost/5"],
+            status=[WorkerK8sStatus.ready],
+            timeout_secs=60,
+            error_status=[WorkerK8sStatus.bundle],
+            fail_fast=True,
+        )
+
+        self.assertEqual(
+            outcomes,
+            {
+                "/api/v2/worker/k8shost/4": WaitOutcome.pending,
+                "/api/v2/worker/k8shost/5": WaitOutcome.error,
+            },
+        )
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_wait_for_status_many_invalid_status(self, mock_get, mock_post):
+        client = get_client()
+
+        with self.assertRaises(AssertionError):
+            client.k8s_worker.wait_for_status_many(
+                ids=["/api/v2/worker/k8shost/4"], status=["ready"]
+            )
+
     @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
     @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
     def test_cli(self, mock_get, mock_post):
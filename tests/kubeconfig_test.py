@@ -0,0 +1,223 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import yaml
+
+from hpecp.base_resource import ResourceList
+from hpecp.exceptions import APIItemNotFoundException
+from hpecp.k8s_cluster import K8sCluster, K8sClusterController
+from hpecp.kubeconfig import _replace, export_kubeconfig, parse_kubeconfig
+
+
+def kubeconfig(name, server, user="admin", token="t"):
+    # escaped newlines, as returned by the API
+    return "\\n".join(
+        [
+            "apiVersion: v1",
+            "kind: Config",
+            "clusters:",
+            "- name: {}".format(name),
+            "  cluster:",
+            "    server: {}".format(server),
+            "users:",
+            "- name: {}".format(user),
+            "  user:",
+            "    token: {}".format(token),
+            "contexts:",
+            "- name: {}".format(name),
+            "  context:",
+            "    cluster: {}".format(name),
+            "    user: {}".format(user),
+            "current-context: {}".format(name),
+        ]
+    )
+
+
+class FakeClusters(K8sClusterController):
+    """Clusters whose list response omits the admin_kube_config."""
+
+    def __init__(self, configs):
+        super(FakeClusters, self).__init__(None)
+        self.configs = configs
+        self.gets = []
+
+    def _json(self, id):
+        return {
+            "_links": {"self": {"href": id}},
+            "status": "error" if id.endswith("9") else "ready",
+        }
+
+    def list(self, fields=None, bypass_cache=False):
+        json = [self._json(id) for id in self.configs]
+        return ResourceList(K8sCluster, json)
+
+    def get(self, id, fields=None, bypass_cache=False):
+        self.gets.append(id)
+        if id not in self.configs:
+            raise APIItemNotFoundException(
+                message="not found", request_method="get", request_url=id
+            )
+        return K8sCluster(
+            dict(self._json(id), admin_kube_config=self.configs[id])
+        )
+
+
+class TestExportKubeconfig(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "config")
+        self.clusters = FakeClusters(
+            {
+                "/api/v2/k8scluster/1": kubeconfig("one", "https://a:1"),
+                "/api/v2/k8scluster/2": kubeconfig(
+                    "two", "https://b:1", token="other"
+                ),
+                "/api/v2/k8scluster/3": kubeconfig("one", "https://a:1"),
+                "/api/v2/k8scluster/9": "not: a kubeconfig",
+            }
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self):
+        with open(self.path) as f:
+            return yaml.safe_load(f)
+
+    def test_parse(self):
+        config = parse_kubeconfig(kubeconfig("one", "https://a:1"))
+        self.assertEqual(config["current-context"], "one")
+        self.assertEqual(config["users"][0]["user"]["token"], "t")
+        with self.assertRaises(ValueError):
+            parse_kubeconfig("[")
+        with self.assertRaises(ValueError):
+            parse_kubeconfig("kind: Config")
+
+    def test_merge(self):
+        export = export_kubeconfig(self.clusters, self.path)
+
+        self.assertTrue(export.written)
+        self.assertEqual(
+            list(export.failed.items()),
+            [("/api/v2/k8scluster/9", "Invalid kubeconfig: no contexts")],
+        )
+        config = self.read()
+        self.assertEqual(config["kind"], "Config")
+        self.assertEqual(config["current-context"], "one")
+        # cluster 3 has the same config as cluster 1, the user 'admin' of
+        # cluster 2 has another token and is renamed
+        self.assertEqual(
+            [c["name"] for c in config["clusters"]], ["one", "two"]
+        )
+        self.assertEqual(
+            [u["name"] for u in config["users"]], ["admin", "admin-2"]
+        )
+        self.assertEqual(
+            config["contexts"][1],
+            {"name": "two", "context": {"cluster": "two", "user": "admin-2"}},
+        )
+        self.assertEqual(export.contexts, ["one", "two"])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_private_while_written(self):
+        modes = []
+
+        def write(f):
+            modes.append(os.fstat(f.fileno()).st_mode & 0o777)
+            f.write("token")
+
+        umask = os.umask(0o022)
+        try:
+            _replace(self.path, write)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(modes, [0o600])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual(
+            os.listdir(self.tmpdir), [os.path.basename(self.path)]
+        )
+
+    def test_skip_unchanged(self):
+        export_kubeconfig(self.clusters, self.path)
+        modified = os.path.getmtime(self.path)
+
+        export = export_kubeconfig(self.clusters, self.path)
+        self.assertFalse(export.written)
+        self.assertEqual(export.changed, [])
+        self.assertEqual(len(export.unchanged), 3)
+        self.assertEqual(os.path.getmtime(self.path), modified)
+
+        self.clusters.configs["/api/v2/k8scluster/2"] = kubeconfig(
+            "two", "https://c:1"
+        )
+        export = export_kubeconfig(self.clusters, self.path)
+        self.assertTrue(export.written)
+        self.assertEqual(export.changed, ["/api/v2/k8scluster/2"])
+        self.assertEqual(
+            self.read()["clusters"][1]["cluster"]["server"], "https://c:1"
+        )
+        # the same token as cluster 1 now, the users are merged
+        self.assertEqual([u["name"] for u in self.read()["users"]], ["admin"])
+
+        self.assertTrue(
+            export_kubeconfig(self.clusters, self.path, force=True).written
+        )
+
+    def test_filters(self):
+        export = export_kubeconfig(
+            self.clusters,
+            self.path,
+            ids=["/api/v2/k8scluster/2", "/api/v2/k8scluster/7"],
+        )
+        self.assertEqual(export.contexts, ["two"])
+        self.assertEqual(export.failed["/api/v2/k8scluster/7"], "not found")
+        self.assertEqual(self.read()["current-context"], "two")
+
+        export = export_kubeconfig(
+            self.clusters, self.path, where="status=ready"
+        )
+        self.assertEqual(export.failed, {})
+        self.assertEqual(
+            sorted(self.clusters.gets[2:]),
+            [
+                "/api/v2/k8scluster/1",
+                "/api/v2/k8scluster/2",
+                "/api/v2/k8scluster/3",
+            ],
+        )
+
+    def test_many_clusters_use_gets(self):
+        # enough clusters for get_many to prefer a list, which does not
+        # include the admin_kube_config
+        for i in range(10, 30):
+            self.clusters.configs[
+                "/api/v2/k8scluster/{}".format(i)
+            ] = kubeconfig("c{}".format(i), "https://c{}:1".format(i))
+        export = export_kubeconfig(self.clusters, self.path, max_workers=2)
+
+        self.assertEqual(list(export.failed), ["/api/v2/k8scluster/9"])
+        self.assertEqual(len(export.contexts), 22)
@@ -0,0 +1,290 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from hpecp.base_resource import ResourceList
+from hpecp.exceptions import (
+    OperationCancelledException,
+    OperationTimeoutException,
+)
+from hpecp.k8s_cluster import K8sCluster, K8sClusterController
+from hpecp.k8s_worker import K8sWorkerController, WorkerK8s, WorkerK8sStatus
+from hpecp.operation import OperationPoller, WaitOutcome
+from hpecp.poll_schedule import PollSchedule
+
+from .base import BaseTestCase, get_client
+from .k8s_cluster_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+def host(id, status):
+    return {
+        "_links": {"self": {"href": "/api/v2/worker/k8shost/{}".format(id)}},
+        "status": status,
+    }
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.operation_poller = OperationPoller()
+
+
+class FakeController(K8sWorkerController):
+
+    poll_schedule = PollSchedule(initial=0.01, max_step=0.05)
+
+    def __init__(self):
+        super(FakeController, self).__init__(FakeClient())
+        self.hosts = []
+        self.list_calls = 0
+        self.lock = threading.Lock()
+
+    def list(self, fields=None, bypass_cache=False):
+        with self.lock:
+            self.list_calls += 1
+            return ResourceList(WorkerK8s, list(self.hosts))
+
+
+class TestOperation(TestCase):
+    def test_shared_poller(self):
+        controller = FakeController()
+        controller.hosts = [host(i, "installing") for i in range(100)]
+
+        done = []
+        operations = []
+        for i in range(100):
+            op = controller.operation(
+                "/api/v2/worker/k8shost/{}".format(i),
+                [WorkerK8sStatus.ready],
+                timeout_secs=30,
+            )
+            op.add_done_callback(done.append)
+            operations.append(op)
+
+        with controller.lock:
+            controller.hosts = [host(i, "ready") for i in range(99)] + [
+                host(99, "error")
+            ]
+
+        outcomes = [op.result(timeout=10) for op in operations]
+        self.assertEqual(outcomes.count(WaitOutcome.reached), 99)
+        self.assertEqual(outcomes[99], WaitOutcome.error)
+        self.assertEqual(len(done), 100)
+
+        # far fewer list calls than operations, all on one thread
+        self.assertLess(controller.list_calls, 50)
+
+    def test_delete_outcome(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "deleting")]
+
+        op = controller.operation("/api/v2/worker/k8shost/1", [])
+        self.assertFalse(op.done())
+
+        with controller.lock:
+            controller.hosts = []
+        self.assertEqual(op.result(timeout=10), WaitOutcome.reached)
+
+    def test_timeout_outcome(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "installing")]
+
+        op = controller.operation(
+            "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready], 0
+        )
+        self.assertEqual(op.result(timeout=10), WaitOutcome.timeout)
+
+    def test_result_timeout_and_cancel(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "installing")]
+
+        op = controller.operation(
+            "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready]
+        )
+        with self.assertRaises(OperationTimeoutException):
+            op.result(timeout=0.1)
+
+        cancelled = []
+        op.add_done_callback(cancelled.append)
+        self.assertTrue(op.cancel())
+        self.assertTrue(op.done())
+        self.assertTrue(op.cancelled())
+        self.assertEqual(cancelled, [op])
+        with self.assertRaises(OperationCancelledException):
+            op.result()
+
+        # already done
+        self.assertFalse(op.cancel())
+
+    def test_cancel_while_completing(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "installing")]
+        op = controller.operation(
+            "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready]
+        )
+
+        class RacingLock(object):
+            """Complete the operation as soon as the lock is released."""
+
+            def __init__(self):
+                self.lock = threading.Lock()
+
+            def __enter__(self):
+                self.lock.acquire()
+
+            def __exit__(self, *args):
+                self.lock.release()
+                op._lock = self.lock
+                # the poller finds the host ready
+                completed.append(op._finish(WaitOutcome.reached))
+
+        completed = []
+        states = []
+        op.add_done_callback(
+            lambda op: states.append((op.cancelled(), op._outcome))
+        )
+        op._lock = RacingLock()
+        self.assertTrue(op.cancel())
+        self.assertEqual(completed, [False])
+        self.assertEqual(states, [(True, None)])
+        with self.assertRaises(OperationCancelledException):
+            op.result()
+
+    def test_check_error_outcome(self):
+        controller = FakeController()
+        controller.hosts = [host(1, "ready")]
+
+        def check(resource):
+            raise KeyError("k8s_version")
+
+        op = controller.operation(
+            "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready], check=check
+        )
+        self.assertEqual(op.result(timeout=10), WaitOutcome.error)
+
+    def test_callback_after_done(self):
+        controller = FakeController()
+        op = controller.operation("/api/v2/worker/k8shost/1", [])
+        self.assertEqual(op.result(timeout=10), WaitOutcome.reached)
+
+        called = []
+        op.add_done_callback(called.append)
+        self.assertEqual(called, [op])
+
+    def test_invalid_status(self):
+        controller = FakeController()
+        with self.assertRaises(AssertionError):
+            controller.operation("/api/v2/worker/k8shost/1", ["ready"])
+
+
+class TestK8sClusterOperation(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.delete", side_effect=BaseTestCase.httpDeleteHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_delete_as_operation(self, mock_post, mock_delete, mock_get):
+        client = get_client()
+
+        op = client.k8s_cluster.delete(
+            id="/api/v2/k8scluster/123", as_operation=True
+        )
+        self.assertEqual(op.id, "/api/v2/k8scluster/123")
+        self.assertEqual(op.result(timeout=10), WaitOutcome.reached)
+
+
+def cluster(status, k8s_version, addons):
+    return {
+        "_links": {"self": {"href": "/api/v2/k8scluster/1"}},
+        "status": status,
+        "k8s_version": k8s_version,
+        "addons": addons,
+    }
+
+
+class FakeClusterController(K8sClusterController):
+
+    poll_schedule = PollSchedule(initial=0.01, max_step=0.05)
+    poll_transition_schedules = {}
+
+    def __init__(self):
+        client = FakeClient()
+        client._request = MagicMock()
+        client.k8s_manifest_cache = None
+        super(FakeClusterController, self).__init__(client)
+        self.clusters = [cluster("ready", "1.17.0", ["istio"])]
+        self.list_fields = []
+        self.lock = threading.Lock()
+
+    def list(self, fields=None, bypass_cache=False):
+        with self.lock:
+            self.list_fields.append(fields)
+            return ResourceList(K8sCluster, list(self.clusters))
+
+    def get(self, id, fields=None, bypass_cache=False):
+        with self.lock:
+            self.get_bypass_cache = bypass_cache
+            return K8sCluster(self.clusters[0])
+
+
+class TestChangeTaskOperation(TestCase):
+    def test_upgrade_waits_for_the_version(self):
+        controller = FakeClusterController()
+        op = controller.upgrade_cluster(
+            "/api/v2/k8scluster/1", "1.18.6", as_operation=True
+        )
+
+        # the first polls return the cluster ready before the upgrade
+        with self.assertRaises(OperationTimeoutException):
+            op.result(timeout=0.2)
+        self.assertIn("k8s_version", controller.list_fields[0])
+
+        with controller.lock:
+            controller.clusters = [cluster("upgrading", "1.17.0", ["istio"])]
+        with self.assertRaises(OperationTimeoutException):
+            op.result(timeout=0.1)
+        with controller.lock:
+            controller.clusters = [cluster("ready", "1.18.6", ["istio"])]
+        self.assertEqual(op.result(timeout=10), WaitOutcome.reached)
+
+    def test_add_addons_waits_for_the_addons(self):
+        controller = FakeClusterController()
+        op = controller.add_addons(
+            "/api/v2/k8scluster/1", ["kubeflow"], as_operation=True
+        )
+        # the installed addons are not read from the client cache
+        self.assertTrue(controller.get_bypass_cache)
+        self.assertEqual(
+            controller.client._request.call_args[1]["data"]["change_spec"],
+            {"addons": ["istio", "kubeflow"]},
+        )
+
+        with self.assertRaises(OperationTimeoutException):
+            op.result(timeout=0.2)
+
+        with controller.lock:
+            controller.clusters = [
+                cluster("ready", "1.17.0", ["istio", "kubeflow"])
+            ]
+        self.assertEqual(op.result(timeout=10), WaitOutcome.reached)
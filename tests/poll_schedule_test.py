@@ -0,0 +1,129 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from itertools import islice
+from unittest import TestCase
+
+import polling
+from mock import patch
+
+from hpecp.k8s_cluster import K8sClusterController, K8sClusterStatus
+from hpecp.poll_schedule import PollSchedule
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class TestPollSchedule(TestCase):
+    def test_steps_backoff_to_cap(self):
+        schedule = PollSchedule(initial=1, factor=2, max_step=10, jitter=0)
+        self.assertEqual(
+            list(islice(schedule.steps(), 6)), [1, 2, 4, 8, 10, 10]
+        )
+
+    def test_steps_jitter(self):
+        schedule = PollSchedule(initial=10, factor=1, max_step=10, jitter=0.2)
+        for step in islice(schedule.steps(), 50):
+            self.assertTrue(8 <= step <= 12)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(AssertionError):
+            PollSchedule(initial=0)
+        with self.assertRaises(AssertionError):
+            PollSchedule(factor=0.5)
+        with self.assertRaises(AssertionError):
+            PollSchedule(initial=10, max_step=5)
+        with self.assertRaises(AssertionError):
+            PollSchedule(jitter=2)
+
+    def test_poll_returns_value(self):
+        clock = FakeClock()
+        values = iter([False, False, "done"])
+        schedule = PollSchedule(initial=1, factor=2, max_step=10, jitter=0)
+
+        with patch("time.time", clock.time), patch("time.sleep", clock.sleep):
+            self.assertEqual(schedule.poll(lambda: next(values), 60), "done")
+        self.assertEqual(clock.sleeps, [1, 2])
+
+    def test_poll_timeout(self):
+        clock = FakeClock()
+        calls = []
+        schedule = PollSchedule(initial=1, factor=2, max_step=10, jitter=0)
+
+        with patch("time.time", clock.time), patch("time.sleep", clock.sleep):
+            with self.assertRaises(polling.TimeoutException):
+                schedule.poll(lambda: calls.append(1), 20)
+        # the last step is cut short to poll once more at the deadline
+        self.assertEqual(clock.sleeps, [1, 2, 4, 8, 5])
+        self.assertEqual(len(calls), 6)
+
+    def test_poll_zero_timeout_calls_once(self):
+        calls = []
+        with self.assertRaises(polling.TimeoutException):
+            PollSchedule().poll(lambda: calls.append(1), 0)
+        self.assertEqual(len(calls), 1)
+
+    def test_poll_delay_first(self):
+        clock = FakeClock()
+        schedule = PollSchedule(initial=1, factor=2, max_step=10, jitter=0)
+
+        with patch("time.time", clock.time), patch("time.sleep", clock.sleep):
+            schedule.poll(lambda: True, 60, delay_first=True)
+        self.assertEqual(clock.sleeps, [1])
+
+
+class TestControllerPollSchedule(TestCase):
+    def test_transition_schedule(self):
+        controller = K8sClusterController(client=None)
+
+        self.assertIs(
+            controller.get_poll_schedule("creating", [K8sClusterStatus.ready]),
+            controller.poll_transition_schedules[("creating", "ready")],
+        )
+        self.assertIs(
+            controller.get_poll_schedule("deleting", []),
+            controller.poll_transition_schedules[("deleting", None)],
+        )
+        self.assertIs(
+            controller.get_poll_schedule("ready", [K8sClusterStatus.error]),
+            controller.poll_schedule,
+        )
+
+    def test_any_status_transition_schedule(self):
+        controller = K8sClusterController(client=None)
+        schedule = PollSchedule(initial=3)
+        controller.poll_transition_schedules = {(None, "warning"): schedule}
+
+        self.assertIs(
+            controller.get_poll_schedule(
+                "ready", [K8sClusterStatus.error, K8sClusterStatus.warning]
+            ),
+            schedule,
+        )
@@ -0,0 +1,360 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from mock import patch
+
+from hpecp.base_resource import ResourceList
+from hpecp.k8s_cluster import K8sCluster
+from hpecp.k8s_worker import WorkerK8s
+from hpecp.snapshot import Snapshot, SnapshotWriter, export_snapshot
+
+from .base import BaseTestCase, get_client
+from .k8s_cluster_mock_api_responses import (
+    mockApiSetup as k8sClusterMockApiSetup,
+)
+from .k8s_worker_mock_api_responses import (
+    mockApiSetup as k8sWorkerMockApiSetup,
+)
+from .lock_mock_api_responses import mockApiSetup as lockMockApiSetup
+from .tenant_mock_api_responses import mockApiSetup as tenantMockApiSetup
+
+# setup the mock data
+k8sClusterMockApiSetup()
+k8sWorkerMockApiSetup()
+lockMockApiSetup()
+tenantMockApiSetup()
+
+COLLECTIONS = ["k8s_cluster", "k8s_worker", "tenant", "lock"]
+
+
+class TestSnapshot(BaseTestCase):
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        super(TestSnapshot, self).tearDown()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_export_and_load(self, mock_get, mock_post):
+        client = get_client()
+        expected = {
+            "k8s_cluster": client.k8s_cluster.list().json,
+            "k8s_worker": client.k8s_worker.list().json,
+            "tenant": client.tenant.list().json,
+            "lock": [client.lock.list()],
+        }
+
+        for (format, compress) in [
+            ("jsonl", True),
+            ("jsonl", False),
+            ("binary", True),
+            ("binary", False),
+            ("indexed", False),
+        ]:
+            path = self.path("snapshot-{}-{}".format(format, compress))
+            counts = export_snapshot(
+                client,
+                path,
+                collections=COLLECTIONS,
+                format=format,
+                compress=compress,
+            )
+            self.assertEqual(
+                sorted(counts.items()),
+                sorted((c, len(r)) for (c, r) in expected.items()),
+            )
+
+            snapshot = Snapshot(path)
+            self.assertEqual(snapshot.version, 1)
+            self.assertEqual(snapshot.format, format)
+            self.assertEqual(snapshot.compressed, compress)
+            self.assertEqual(snapshot.header["api_host"], "127.0.0.1")
+            self.assertEqual(sorted(snapshot.collections), sorted(COLLECTIONS))
+            self.assertLess(snapshot.age(), 60)
+            for (collection, records) in expected.items():
+                self.assertEqual(list(snapshot.records(collection)), records)
+
+            clusters = snapshot.resources("k8s_cluster")
+            self.assertEqual(clusters[0].id, "/api/v2/k8scluster/20")
+            self.assertEqual(clusters[0].status, "ready")
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_failed_export_leaves_no_file(self, mock_get, mock_post):
+        path = self.path("snapshot.jsonl.gz")
+
+        # there is no mock response for the role list
+        with self.assertRaises(Exception):
+            export_snapshot(
+                get_client(), path, collections=["k8s_cluster", "role"]
+            )
+
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+        with self.assertRaises(AssertionError):
+            export_snapshot(get_client(), path, collections=["garbage"])
+
+    def test_writer(self):
+        path = self.path("snapshot.bin")
+        with SnapshotWriter(path, format="binary", compress=False) as writer:
+            writer.begin_collection("k8s_worker", 2)
+            writer.write_record({"status": "ready"})
+            with self.assertRaises(AssertionError):
+                writer.begin_collection("tenant", 0)
+            writer.write_record({"status": "error"})
+            writer.write_collection("tenant", [])
+            with self.assertRaises(AssertionError):
+                writer.write_record({})
+
+        snapshot = Snapshot(path)
+        self.assertEqual(
+            list(snapshot.counts.items()), [("k8s_worker", 2), ("tenant", 0)]
+        )
+        self.assertEqual(
+            list(snapshot.records("k8s_worker")),
+            [{"status": "ready"}, {"status": "error"}],
+        )
+        self.assertEqual(list(snapshot.records("tenant")), [])
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_indexed_reads(self, mock_get, mock_post):
+        client = get_client()
+        workers = client.k8s_worker.list()
+        path = self.path("snapshot.idx")
+        export_snapshot(
+            client, path, collections=COLLECTIONS, format="indexed"
+        )
+
+        for format in ["indexed", "jsonl"]:
+            if format == "jsonl":
+                path = self.path("snapshot.jsonl.gz")
+                export_snapshot(client, path, collections=COLLECTIONS)
+
+            with Snapshot(path) as snapshot:
+                self.assertEqual(
+                    snapshot.ids("k8s_worker"),
+                    ["/api/v2/worker/k8shost/4", "/api/v2/worker/k8shost/5"],
+                )
+                self.assertEqual(
+                    snapshot.column("k8s_worker", "ipaddr"),
+                    ["10.1.0.238", "10.1.0.186"],
+                )
+                self.assertEqual(
+                    snapshot.column("k8s_cluster", "k8shosts_config"),
+                    [client.k8s_cluster.list()[0].k8shosts_config],
+                )
+                self.assertEqual(
+                    snapshot.record("k8s_worker", 1), workers.json[1]
+                )
+                self.assertEqual(
+                    snapshot.find("k8s_worker", "/api/v2/worker/k8shost/5"),
+                    workers.json[1],
+                )
+                self.assertIsNone(
+                    snapshot.find("k8s_worker", "/api/v2/worker/k8shost/9")
+                )
+                with self.assertRaises(AssertionError):
+                    snapshot.record("k8s_worker", 2)
+                with self.assertRaises(AssertionError):
+                    snapshot.column("lock", "id")
+
+                json = [dict(w) for w in workers.json]
+                json[0]["status"] = "ready"
+                diff = snapshot.diff(
+                    "k8s_worker", ResourceList(WorkerK8s, json[:1])
+                )
+                self.assertEqual(
+                    [r.id for r in diff.removed], ["/api/v2/worker/k8shost/5"]
+                )
+                self.assertEqual(
+                    diff.changed[0].fields, {"status": ("unlicensed", "ready")}
+                )
+                self.assertEqual(diff.changed[0].old.json, workers.json[0])
+
+    def test_diff_large_jsonl(self):
+        def cluster(i, status):
+            id = "/api/v2/k8scluster/{}".format(i)
+            return {
+                "_links": {"self": {"href": id}},
+                "label": {"name": "c{}".format(i), "description": ""},
+                "k8s_version": "1.17.0",
+                "status": status,
+            }
+
+        path = self.path("snapshot.jsonl")
+        with SnapshotWriter(path, compress=False) as writer:
+            writer.write_collection(
+                "k8s_cluster", [cluster(i, "ready") for i in range(2000)]
+            )
+        new = ResourceList(
+            K8sCluster, [cluster(i, "error") for i in range(2000)]
+        )
+
+        started = time.time()
+        with Snapshot(path) as snapshot:
+            diff = snapshot.diff("k8s_cluster", new, ["status"])
+        self.assertEqual(len(diff.changed), 2000)
+        self.assertLess(time.time() - started, 2)
+
+    def test_indexed_writer(self):
+        path = self.path("snapshot.idx")
+        with self.assertRaises(AssertionError):
+            SnapshotWriter(path, format="indexed", compress=True)
+
+        with SnapshotWriter(path, format="indexed") as writer:
+            writer.write_collection("tenant", [])
+            writer.write_collection("lock", [{"locked": False}])
+        with Snapshot(path) as snapshot:
+            self.assertFalse(snapshot.compressed)
+            self.assertEqual(
+                list(snapshot.counts.items()), [("tenant", 0), ("lock", 1)]
+            )
+            self.assertEqual(snapshot.column("tenant", "name"), [])
+            self.assertEqual(snapshot.ids("lock"), [None])
+            self.assertEqual(
+                list(snapshot.records("lock")), [{"locked": False}]
+            )
+
+        # an interrupted export has no trailer
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 4)
+        with self.assertRaisesRegexp(AssertionError, "Corrupt snapshot"):
+            Snapshot(path)
+
+    def test_unsupported_files(self):
+        path = self.path("snapshot.jsonl")
+
+        with open(path, "w") as f:
+            f.write('{"format": "hpecp-snapshot", "version": 99}\n')
+        with self.assertRaisesRegexp(
+            AssertionError, "Unsupported snapshot version 99"
+        ):
+            Snapshot(path)
+
+        with open(path, "w") as f:
+            f.write("[]\n")
+        with self.assertRaisesRegexp(AssertionError, "is not a snapshot"):
+            Snapshot(path)
+
+
+class TestCLISnapshot(BaseTestCase):
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_export_and_info(self, mock_get, mock_post):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "snapshot.bin.gz")
+        try:
+            hpecp = self.cli.CLI()
+            hpecp.snapshot.export(
+                path, format="binary", collections="k8s_cluster,tenant"
+            )
+            hpecp.snapshot.info(path)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        output = self.out.getvalue()
+        self.assertIn("format:      binary", output)
+        self.assertIn("k8s_cluster  1", output)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_offline_list_and_get(self, mock_get, mock_post):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "snapshot.jsonl.gz")
+        try:
+            export_snapshot(get_client(), path, collections=["k8s_cluster"])
+
+            hpecp = self.cli.CLI()
+            with patch("requests.get", side_effect=Exception("offline")):
+                hpecp.k8scluster.list(
+                    columns="id,name,status",
+                    output="text",
+                    where="status=ready",
+                    offline=path,
+                )
+                hpecp.k8scluster.list(
+                    query="[*].label.name", output="json", offline=path
+                )
+                with patch.dict(os.environ, {"HPECP_OFFLINE_SNAPSHOT": path}):
+                    hpecp.k8scluster.get(
+                        "/api/v2/k8scluster/20", output="json"
+                    )
+                    with self.assertRaises(SystemExit):
+                        hpecp.k8scluster.get("/api/v2/k8scluster/2")
+                    # the snapshot has no k8s hosts
+                    with self.assertRaises(SystemExit):
+                        hpecp.k8sworker.list()
+        finally:
+            shutil.rmtree(tmpdir)
+
+        output = self.out.getvalue().splitlines()
+        self.assertEqual(output[0], "/api/v2/k8scluster/20  def  ready")
+        self.assertEqual(output[1], '["def"]')
+        self.assertEqual(
+            json.loads(output[2])["_links"]["self"]["href"],
+            "/api/v2/k8scluster/20",
+        )
+
+        error = self.err.getvalue()
+        self.assertIn("OFFLINE: snapshot '{}' taken".format(path), error)
+        self.assertIn("'/api/v2/k8scluster/2' does not exist", error)
+        self.assertIn("does not contain 'k8s_worker'", error)
+
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_offline_closes_snapshot(self, mock_get, mock_post):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "snapshot.idx")
+        closed = []
+        close = Snapshot.close
+
+        def record_close(snapshot):
+            closed.append(snapshot._mmap is not None)
+            close(snapshot)
+
+        try:
+            export_snapshot(
+                get_client(), path, format="indexed", collections=["tenant"]
+            )
+
+            hpecp = self.cli.CLI()
+            with patch.object(Snapshot, "close", record_close):
+                # the snapshot has no k8s clusters
+                with self.assertRaises(SystemExit):
+                    hpecp.k8scluster.get("/api/v1/tenant/1", offline=path)
+                hpecp.tenant.get("/api/v1/tenant/1", offline=path)
+                hpecp.tenant.list(output="text", offline=path)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(closed, [True, True, True])
@@ -0,0 +1,176 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from mock import patch
+
+from hpecp.k8s_worker import K8sWorkerController
+from hpecp.sync import InventorySync
+
+from .base import BaseTestCase, MockResponse, get_client
+
+BASE_URL = "https://127.0.0.1:8080/api/v2/worker/k8shost"
+
+
+class FakeHosts(object):
+    """Serve a mutable list of k8s hosts to requests.get."""
+
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self.fail = []
+        self.urls = []
+
+    def host(self, id):
+        for host in self.hosts:
+            if host["_links"]["self"]["href"].endswith("/{}".format(id)):
+                return host
+        return None
+
+    def __call__(self, url, **kwargs):
+        self.urls.append(url)
+        if url == BASE_URL:
+            return MockResponse(
+                json_data={"_embedded": {"k8shosts": self.hosts}},
+                status_code=200,
+                headers={},
+            )
+        id = int(url.split("?")[0].split("/")[-1])
+        host = self.host(id)
+        if id in self.fail:
+            return MockResponse(
+                json_data={},
+                status_code=500,
+                raise_for_status_flag=True,
+                headers={},
+            )
+        if host is None:
+            return MockResponse(
+                json_data={},
+                status_code=404,
+                raise_for_status_flag=True,
+                headers={},
+            )
+        host = dict(host, setup_log="log of host {}".format(id))
+        return MockResponse(json_data=host, status_code=200, headers={})
+
+    def gets(self):
+        urls = [url for url in self.urls if url != BASE_URL]
+        self.urls = []
+        return sorted(urls)
+
+
+def host(id, status="ready"):
+    return {
+        "_links": {"self": {"href": "/api/v2/worker/k8shost/{}".format(id)}},
+        "status": status,
+        "hostname": "host{}".format(id),
+        "ipaddr": "10.0.0.{}".format(id),
+    }
+
+
+class TestInventorySync(BaseTestCase):
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_sync(self, mock_post):
+        hosts = FakeHosts([host(1), host(2), host(3)])
+        with patch("requests.get", side_effect=hosts):
+            inventory = InventorySync(
+                get_client().k8s_worker, get_kwargs={"setup_log": True}
+            )
+
+            result = inventory.sync()
+            self.assertEqual(len(result.added), 3)
+            self.assertEqual(result.fetched, 3)
+            self.assertEqual(len(inventory), 3)
+            self.assertEqual(
+                hosts.gets(),
+                [BASE_URL + "/{}?setup_log=true".format(i) for i in [1, 2, 3]],
+            )
+            self.assertEqual(
+                inventory.get("/api/v2/worker/k8shost/2").json["setup_log"],
+                "log of host 2",
+            )
+
+            # nothing changed: no gets
+            result = inventory.sync()
+            self.assertFalse(result)
+            self.assertEqual(result.unchanged, 3)
+            self.assertEqual(hosts.gets(), [])
+
+            # a field that is not a summary field is ignored
+            hosts.hosts[0]["hostname"] = "renamed"
+            # status change, deletion and a new host
+            hosts.hosts[1]["status"] = "error"
+            del hosts.hosts[2]
+            hosts.hosts.append(host(4, "bundle"))
+
+            result = inventory.sync()
+            self.assertEqual(result.added, ["/api/v2/worker/k8shost/4"])
+            self.assertEqual(result.updated, ["/api/v2/worker/k8shost/2"])
+            self.assertEqual(result.deleted, ["/api/v2/worker/k8shost/3"])
+            self.assertEqual(result.unchanged, 1)
+            self.assertEqual(
+                hosts.gets(),
+                [
+                    BASE_URL + "/2?setup_log=true",
+                    BASE_URL + "/4?setup_log=true",
+                ],
+            )
+            self.assertEqual(
+                [h.id for h in inventory.list()],
+                [
+                    "/api/v2/worker/k8shost/1",
+                    "/api/v2/worker/k8shost/2",
+                    "/api/v2/worker/k8shost/4",
+                ],
+            )
+            self.assertEqual(
+                inventory.get("/api/v2/worker/k8shost/2").status, "error"
+            )
+            self.assertIsNone(inventory.get("/api/v2/worker/k8shost/3"))
+
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    def test_failed_get_is_retried(self, mock_post):
+        hosts = FakeHosts([host(1), host(2)])
+        with patch("requests.get", side_effect=hosts):
+            inventory = InventorySync(get_client().k8s_worker)
+            inventory.sync()
+            hosts.gets()
+
+            hosts.hosts[0]["status"] = "error"
+            hosts.fail = [1]
+            result = inventory.sync()
+            self.assertEqual(
+                list(result.errors.keys()), ["/api/v2/worker/k8shost/1"]
+            )
+            # the previous details are kept
+            self.assertEqual(
+                inventory.get("/api/v2/worker/k8shost/1").status, "ready"
+            )
+
+            hosts.fail = []
+            hosts.gets()
+            result = inventory.sync()
+            self.assertEqual(result.updated, ["/api/v2/worker/k8shost/1"])
+            self.assertEqual(hosts.gets(), [BASE_URL + "/1"])
+
+    def test_invalid_summary_fields(self):
+        with self.assertRaises(AssertionError):
+            InventorySync(
+                K8sWorkerController(client=None), summary_fields=["garbage"]
+            )
@@ -0,0 +1,129 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+"""Benchmark ResourceList.filter() against the equivalent JMESPath query.
+
+This is not part of the test suite, run it with:
+
+    python -m tests.where_benchmark [number of clusters]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+import jmespath
+
+from hpecp.base_resource import ResourceList
+from hpecp.k8s_cluster import K8sCluster
+from hpecp.where import Where
+
+STATUSES = ["ready", "creating", "updating", "error", "warning"]
+
+CASES = [
+    (
+        "status=ready",
+        "[?status=='ready']",
+    ),
+    (
+        "status=error and k8s_version=1.18.6",
+        "[?status=='error' && k8s_version=='1.18.6']",
+    ),
+    (
+        "name=cluster42",
+        "[?label.name=='cluster42']",
+    ),
+    (
+        "status=ready or status=warning",
+        "[?status=='ready' || status=='warning']",
+    ),
+]
+
+
+def clusters(count):
+    return [
+        {
+            "_links": {"self": {"href": "/api/v2/k8scluster/{}".format(i)}},
+            "label": {"name": "cluster{}".format(i), "description": ""},
+            "status": STATUSES[i % len(STATUSES)],
+            "k8s_version": ["1.17.0", "1.18.6", "1.20.1"][i % 3],
+        }
+        for i in range(count)
+    ]
+
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main(count=10000, number=20):
+    data = clusters(count)
+
+    print(
+        "{} clusters, best of 5 x {} runs, milliseconds per filter".format(
+            count, number
+        )
+    )
+    print(
+        "{:<40} {:>10} {:>10} {:>10} {:>10}".format(
+            "expression", "jmespath", "compiled", "where", "indexed"
+        )
+    )
+    for (where, query) in CASES:
+        compiled_query = jmespath.compile(query)
+        compiled_where = Where(where, K8sCluster)
+
+        # scan: a new list has no indexes, and no field is indexed
+        def scan():
+            resources = ResourceList(K8sCluster, data)
+            resources.resource_class = _Unindexed
+            return resources.filter(compiled_where)
+
+        indexed_list = ResourceList(K8sCluster, data)
+        indexed_list.filter(compiled_where)  # build the indexes
+
+        # the ResourceList is built in each run for a fair comparison
+        # with jmespath, which searches the raw json
+        build = best(lambda: ResourceList(K8sCluster, data), number)
+        results = [
+            best(lambda: jmespath.search(query, data), number),
+            best(lambda: compiled_query.search(data), number),
+            best(scan, number) - build,
+            best(lambda: indexed_list.filter(compiled_where), number),
+        ]
+
+        assert [r.id for r in indexed_list.filter(compiled_where)] == [
+            c["_links"]["self"]["href"] for c in compiled_query.search(data)
+        ]
+
+        print(
+            "{:<40} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                where, *[r * 1000 for r in results]
+            )
+        )
+
+
+class _Unindexed(K8sCluster):
+    indexed_fields = []
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
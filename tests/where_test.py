@@ -0,0 +1,215 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from unittest import TestCase
+
+import jmespath
+import six
+from mock import patch
+
+from hpecp.base_resource import ResourceList
+from hpecp.k8s_cluster import K8sCluster
+from hpecp.where import Where
+
+from .base import BaseTestCase
+from .k8s_cluster_mock_api_responses import mockApiSetup
+
+# setup the mock data
+mockApiSetup()
+
+
+def cluster(id, status, k8s_version, name=None):
+    return {
+        "_links": {"self": {"href": "/api/v2/k8scluster/{}".format(id)}},
+        "label": {
+            "name": name or "cluster{}".format(id),
+            "description": "my cluster",
+        },
+        "status": status,
+        "k8s_version": k8s_version,
+    }
+
+
+CLUSTERS = [
+    cluster(1, "ready", "1.17.0"),
+    cluster(2, "ready", "1.18.6"),
+    cluster(3, "error", "1.18.6"),
+    cluster(4, "creating", "1.20.1", name="my cluster"),
+    cluster(5, "ready", "1.9.2"),
+]
+
+
+def ids(resource_list):
+    return [int(r.id.split("/")[-1]) for r in resource_list.resources]
+
+
+class TestWhere(TestCase):
+    def filter(self, expression):
+        return ids(ResourceList(K8sCluster, CLUSTERS).filter(expression))
+
+    def test_equality(self):
+        self.assertEqual(self.filter("status=ready"), [1, 2, 5])
+        self.assertEqual(self.filter("status == ready"), [1, 2, 5])
+        self.assertEqual(self.filter("status!=ready"), [3, 4])
+
+    def test_versions_compare_numerically(self):
+        self.assertEqual(self.filter("k8s_version>=1.18"), [2, 3, 4])
+        self.assertEqual(self.filter("k8s_version<1.10"), [5])
+
+    def test_version_values_compare_as_versions(self):
+        clusters = [
+            cluster(1, "ready", "1.18"),
+            cluster(2, "ready", "1.18.6"),
+            cluster(3, "ready", "1.4"),
+            cluster(4, "ready", "v1.20"),
+        ]
+
+        def filter(expression):
+            return ids(ResourceList(K8sCluster, clusters).filter(expression))
+
+        # whatever the number of dots of the value or the literal
+        self.assertEqual(filter("k8s_version<1.5"), [3])
+        self.assertEqual(filter("k8s_version>1.5"), [1, 2, 4])
+        self.assertEqual(filter("k8s_version>=1.18"), [1, 2, 4])
+        self.assertEqual(filter("k8s_version>1.18.0"), [2, 4])
+        self.assertEqual(filter("k8s_version<v1.18.6"), [1, 3])
+
+    def test_numbers_compare_numerically(self):
+        class Resource(object):
+            def __init__(self, x):
+                self.x = x
+
+        values = [1.25, 1.5, 2, six.integer_types[-1](3), "1.75", "a"]
+        resources = [Resource(x) for x in values]
+        matches = [r.x for r in resources if Where("x>1.5")(r)]
+        self.assertEqual(matches, [2, 3, "1.75"])
+        matches = [r.x for r in resources if Where("x<=1.5")(r)]
+        self.assertEqual(matches, [1.25, 1.5])
+
+    def test_and_or_not(self):
+        self.assertEqual(
+            self.filter("status=ready and k8s_version>=1.18"), [2]
+        )
+        self.assertEqual(
+            self.filter("status=error or status=creating"), [3, 4]
+        )
+        self.assertEqual(
+            self.filter("not (status=ready or k8s_version>=1.20)"), [3]
+        )
+        # 'and' binds tighter than 'or'
+        self.assertEqual(
+            self.filter("status=creating or status=ready and name=cluster1"),
+            [1, 4],
+        )
+
+    def test_quoted_values_and_contains(self):
+        self.assertEqual(self.filter("name='my cluster'"), [4])
+        self.assertEqual(self.filter('name="my cluster"'), [4])
+        self.assertEqual(self.filter("name~clus"), [1, 2, 3, 4, 5])
+
+    def test_missing_field(self):
+        resources = ResourceList(
+            K8sCluster, [{"_links": CLUSTERS[0]["_links"]}]
+        )
+        self.assertEqual(ids(resources.filter("status=ready")), [])
+        self.assertEqual(ids(resources.filter("status!=ready")), [1])
+        self.assertEqual(ids(resources.filter("k8s_version>1.0")), [])
+
+    def test_invalid_expressions(self):
+        for expression in [
+            "",
+            "status",
+            "status=",
+            "status=ready and",
+            "(status=ready",
+            "status=ready)",
+            "=ready",
+        ]:
+            with self.assertRaises(AssertionError):
+                Where(expression, K8sCluster)
+
+        with self.assertRaisesRegexp(
+            AssertionError, "Unknown field 'garbage' in 'where' expression"
+        ):
+            Where("garbage=1", K8sCluster)
+
+    def test_fields(self):
+        where = Where("status=ready and (name=a or status=error)")
+        self.assertEqual(where.fields, ["status", "name"])
+        self.assertEqual(where.equalities, [("status", "ready")])
+
+    def test_index_limits_evaluation(self):
+        resources = ResourceList(K8sCluster, CLUSTERS)
+        where = Where("status=ready and k8s_version>=1.18", K8sCluster)
+
+        evaluated = []
+        predicate = where._predicate
+
+        def counting(resource):
+            evaluated.append(resource.id)
+            return predicate(resource)
+
+        where._predicate = counting
+
+        self.assertEqual(ids(resources.filter(where)), [2])
+        # only the 3 ready clusters are evaluated
+        self.assertEqual(len(evaluated), 3)
+        self.assertIn("status", resources._indexes)
+
+    def test_matches_jmespath(self):
+        resources = ResourceList(K8sCluster, CLUSTERS)
+        expected = jmespath.search(
+            "[?status=='ready' || status=='error']._links.self.href",
+            CLUSTERS,
+        )
+        actual = [
+            r.id for r in resources.filter("status=ready or status=error")
+        ]
+        self.assertEqual(actual, expected)
+
+
+class TestCLIWhere(BaseTestCase):
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    def test_k8scluster_list_where(self, mock_post, mock_get):
+
+        hpecp = self.cli.CLI()
+        hpecp.k8scluster.list(
+            columns=["id", "name"],
+            where="status=ready and k8s_version>=1.17",
+            output="text",
+        )
+        hpecp.k8scluster.list(
+            columns=["id", "name"], where="status=error", output="text"
+        )
+
+        self.assertEqual(
+            self.out.getvalue().strip(), "/api/v2/k8scluster/20  def"
+        )
+
+    @patch("requests.post", side_effect=BaseTestCase.httpPostHandlers)
+    @patch("requests.get", side_effect=BaseTestCase.httpGetHandlers)
+    def test_k8scluster_list_where_invalid(self, mock_post, mock_get):
+
+        hpecp = self.cli.CLI()
+        with self.assertRaises(SystemExit):
+            hpecp.k8scluster.list(where="status")
+
+        self.assertIn("Invalid 'where' expression", self.err.getvalue())
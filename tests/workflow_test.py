@@ -0,0 +1,174 @@
+# (C) Copyright [2020] Hewlett Packard Enterprise Development LP
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+from unittest import TestCase
+
+from mock import MagicMock
+
+from hpecp.exceptions import ContainerPlatformClientException
+from hpecp.k8s_worker import WorkerK8sStatus
+from hpecp.operation import WaitOutcome
+from hpecp.workflow import Ref, Workflow, call, wait_for
+
+
+def sleep_then(seconds, value):
+    def run(values):
+        time.sleep(seconds)
+        return value
+
+    return run
+
+
+class TestWorkflow(TestCase):
+    def test_refs_pass_values(self):
+        wf = Workflow()
+        host = wf.add("host", call(lambda ip: "/host/" + ip, "10.0.0.1"))
+        wf.add("storage", call(lambda id, disks: (id, disks), host, ["sdb"]))
+        self.assertEqual(wf.requires("storage"), ["host"])
+
+        result = wf.run()
+        self.assertTrue(result)
+        self.assertEqual(result.values["storage"], ("/host/10.0.0.1", ["sdb"]))
+        self.assertEqual(result.done, ["host", "storage"])
+
+    def test_independent_branches_run_concurrently(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def branch(values):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        wf = Workflow()
+        for i in range(4):
+            wf.add("host{}".format(i), branch)
+        wf.add(
+            "cluster", branch, requires=["host{}".format(i) for i in range(4)]
+        )
+        started = time.time()
+        result = wf.run(max_workers=4)
+
+        self.assertTrue(result)
+        self.assertEqual(peak[0], 4)
+        self.assertLess(time.time() - started, 0.2)
+        self.assertEqual(result.done[-1], "cluster")
+
+        peak[0] = 0
+        wf.run(max_workers=2)
+        self.assertEqual(peak[0], 2)
+
+    def test_failure_skips_dependents(self):
+        def fail(values):
+            raise Exception("boom")
+
+        progress = []
+        wf = Workflow()
+        wf.add("host", fail)
+        wf.add("ready", call(lambda id: id, Ref("host")))
+        wf.add("cluster", sleep_then(0, "c"), requires=["ready"])
+        wf.add("datatap", sleep_then(0, "d"))
+        result = wf.run(progress=lambda node: progress.append(node.name))
+
+        self.assertFalse(result)
+        self.assertEqual(str(result.failed["host"]), "boom")
+        self.assertEqual(result.skipped, ["ready", "cluster"])
+        self.assertEqual(result.done, ["datatap"])
+        self.assertEqual(
+            sorted(progress), ["cluster", "datatap", "host", "ready"]
+        )
+
+    def test_invalid_graphs(self):
+        wf = Workflow()
+        wf.add("a", sleep_then(0, None))
+        with self.assertRaises(AssertionError):
+            wf.add("a", sleep_then(0, None))
+        with self.assertRaises(AssertionError):
+            wf.add("b", "not callable")
+
+        wf.add("b", sleep_then(0, None), requires=["garbage"])
+        with self.assertRaisesRegexp(AssertionError, "unknown node"):
+            wf.run()
+
+        wf = Workflow()
+        wf.add("a", sleep_then(0, None), requires=["c"])
+        wf.add("b", sleep_then(0, None), requires=["a"])
+        wf.add("c", sleep_then(0, None), requires=["b"])
+        wf.add("d", sleep_then(0, None))
+        with self.assertRaisesRegexp(AssertionError, "cycle"):
+            wf.run()
+
+    def test_critical_path_and_report(self):
+        wf = Workflow()
+        wf.add("host1", sleep_then(0.01, 1))
+        wf.add("host2", sleep_then(0.1, 2))
+        wf.add("host1_ready", sleep_then(0.01, 1), requires=["host1"])
+        wf.add(
+            "cluster", sleep_then(0.05, 3), requires=["host1_ready", "host2"]
+        )
+        wf.add("lint", sleep_then(0, 4))
+        result = wf.run(max_workers=4)
+
+        self.assertEqual(result.critical_path(), ["host2", "cluster"])
+        self.assertGreaterEqual(result.nodes["host2"].elapsed, 0.1)
+        self.assertGreaterEqual(
+            result.nodes["cluster"].started, result.nodes["host2"].finished
+        )
+
+        report = result.report()
+        self.assertEqual(
+            report[0].split(), ["node", "start", "elapsed", "status"]
+        )
+        self.assertEqual(len(report), 7)
+        self.assertTrue(
+            report[-1].startswith("critical path: host2 -> cluster")
+        )
+
+    def test_wait_for(self):
+        controller = MagicMock()
+        controller.operation.return_value.result.return_value = (
+            WaitOutcome.reached
+        )
+
+        wf = Workflow()
+        host = wf.add("host", sleep_then(0, "/api/v2/worker/k8shost/1"))
+        wf.add(
+            "ready",
+            wait_for(controller, host, [WorkerK8sStatus.ready], 60),
+        )
+        result = wf.run()
+        self.assertEqual(result.values["ready"], "/api/v2/worker/k8shost/1")
+        controller.operation.assert_called_once_with(
+            "/api/v2/worker/k8shost/1", [WorkerK8sStatus.ready], 60
+        )
+
+        controller.operation.return_value.result.return_value = (
+            WaitOutcome.error
+        )
+        result = wf.run()
+        self.assertIsInstance(
+            result.failed["ready"], ContainerPlatformClientException
+        )